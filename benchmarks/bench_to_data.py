@@ -0,0 +1,86 @@
+"""
+to_data() / 分钟线读取的日期索引构建基准测试
+
+对比两种方式在全历史数据上的耗时：
+- 旧方式：先格式化为日期字符串，再用 pd.to_datetime 解析 (to_data 旧实现会对 datetime 和 date 各解析一次)
+- 新方式：由整数 YYYYMMDD / 打包的分钟线日期直接向量化计算 datetime64
+
+用法: python -m benchmarks.bench_to_data [--repeat 5]
+"""
+
+import argparse
+import tempfile
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from tdxpy.reader import TdxLCMinBarReader
+
+from kitetdx.records import LC_RECORD, read_minute
+from kitetdx.utils import datetime64_to_date_int, to_data
+
+
+def daily_frame(start='1991-01-01', end='2024-12-31') -> pd.DataFrame:
+    """约 8000 根日线，date 为整数，datetime 为字符串 (与行情接口返回的格式相同)"""
+    days = pd.bdate_range(start, end).values
+    dates = datetime64_to_date_int(days)
+    return pd.DataFrame({
+        'date': dates,
+        'datetime': pd.DatetimeIndex(days).strftime('%Y-%m-%d 15:00').to_numpy(),
+        'close': np.random.default_rng(0).random(len(days)),
+        'vol': 1000.0,
+    })
+
+
+def legacy_to_data(df: pd.DataFrame) -> pd.DataFrame:
+    """旧实现：两次 pd.to_datetime 并重建两次索引"""
+    result = df.copy()
+    result.index = pd.to_datetime(result.datetime)
+    result.index = pd.to_datetime(result.date.astype(str))
+    result['volume'] = result['vol']
+    return result
+
+
+def write_minute_file(path, sessions=250 * 5):
+    """每个交易日 240 根 1 分钟线"""
+    session_minutes = np.r_[np.arange(571, 691), np.arange(781, 901)]
+    days = pd.bdate_range('2020-01-01', periods=sessions)
+
+    records = np.zeros(len(days) * len(session_minutes), dtype=LC_RECORD)
+    records['date'] = np.repeat((days.year - 2004) * 2048 + days.month * 100 + days.day, len(session_minutes))
+    records['minute'] = np.tile(session_minutes, len(days))
+    records['close'] = 10.0
+    records['volume'] = 100
+    records.tofile(path)
+    return len(records)
+
+
+def bench(name, func, repeat):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"{name:<32} {best * 1000:>10.1f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最快一次')
+    args = parser.parse_args()
+
+    df = daily_frame()
+    print(f"日线: {len(df)} 行")
+    legacy = bench('to_data (pd.to_datetime x2)', lambda: legacy_to_data(df), args.repeat)
+    fast = bench('to_data (向量化)', lambda: to_data(df.copy()), args.repeat)
+    print(f"加速: {legacy / fast:.1f}x\n")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'sh600000.lc1'
+        rows = write_minute_file(path)
+        print(f"1 分钟线: {rows} 行")
+        legacy = bench('TdxLCMinBarReader.get_df', lambda: TdxLCMinBarReader().get_df(str(path)), args.repeat)
+        fast = bench('read_minute', lambda: read_minute(path), args.repeat)
+        print(f"加速: {legacy / fast:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
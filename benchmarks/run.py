@@ -0,0 +1,170 @@
+"""
+离线基准测试
+
+在合成通达信数据目录上运行各项读取基准，与 baselines.json 中保存的基线比较，
+耗时超过基线 threshold 倍的项目视为性能回退，以非零状态退出。
+
+用法:
+    python -m benchmarks.run                      # small 规模，与基线比较
+    python -m benchmarks.run --size medium -k daily
+    python -m benchmarks.run --save               # 更新当前规模的基线
+
+基线与机器相关，更换测试机器后应先在基线提交上运行 --save。
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+from benchmarks.synthetic import SIZES, generate
+
+BASELINES_PATH = Path(__file__).with_name('baselines.json')
+
+# 超过基线的倍数视为回退
+DEFAULT_THRESHOLD = 1.5
+
+
+def build_benchmarks(data: dict) -> dict:
+    """
+    构建基准测试函数
+
+    :param data: synthetic.generate() 的返回值
+    :return: dict {名称: 无参函数}
+    """
+    import kitetdx.adjust
+    from kitetdx.gbbq import gbbq_path, read_gbbq
+    from kitetdx.indicators import IndicatorEngine
+    from kitetdx.reader import Reader
+    from kitetdx.sws import SwsReader
+
+    # 复权因子从合成的缓存读取，不访问网络
+    kitetdx.adjust.CACHE_DIR = data['fq_cache']
+
+    reader = Reader.factory(market='std', tdxdir=str(data['tdxdir']))
+    local = Reader.factory(market='std', tdxdir=str(data['tdxdir']), fq_source='gbbq', gbbq_key=data['gbbq_key'])
+    symbols = data['symbols']
+    codes = [symbol[2:] for symbol in symbols]
+
+    # 预先读取一次，to_adjust 基准只测复权计算本身
+    frames = {symbol: reader.daily(symbol) for symbol in symbols}
+
+    # 预先构建复权存储，adjusted_build 基准测量没有新除权事件时的每晚更新
+    local.adjusted.build(symbols)
+
+    # 指标基准只测计算本身，面板预先读取；indicators_update 测量在已计算的历史上追加一天
+    prices = reader.panel(symbols, fields=['high', 'low', 'close'])
+    engine = IndicatorEngine()
+    engine.compute(prices)
+    last_bar = {field: frame.iloc[-1] for field, frame in prices.items()}
+
+    return {
+        'daily': lambda: [reader.daily(symbol) for symbol in symbols],
+        'minute': lambda: [reader.minute(symbol) for symbol in symbols],
+        'fzline': lambda: [reader.fzline(symbol) for symbol in symbols],
+        'block': lambda: reader.block(),
+        'get_stock_industry': lambda: [reader.get_stock_industry(code) for code in codes[:100]],
+        'to_adjust': lambda: [kitetdx.adjust.to_adjust(df, symbol, 'qfq') for symbol, df in frames.items()],
+        'sws_load': lambda: SwsReader(auto_download=False),
+        'gbbq_decode': lambda: read_gbbq(gbbq_path(data['tdxdir']), key=data['gbbq_key']),
+        'gbbq_factors': lambda: [local.fq_factor(symbol, 'qfq') for symbol in symbols],
+        'daily_qfq': lambda: [local.daily(symbol, adjust='qfq') for symbol in symbols],
+        'minute_qfq': lambda: local.minute_many(symbols, adjust='qfq'),
+        'adjusted_build': lambda: local.adjusted.build(symbols),
+        'adjusted_daily': lambda: [local.adjusted.daily(symbol, 'qfq') for symbol in symbols],
+        'indicators': lambda: IndicatorEngine().compute(prices),
+        'indicators_update': lambda: engine.update(last_bar),
+    }
+
+
+def run(size='small', repeat=5, select=None) -> dict:
+    """
+    生成合成数据并运行基准测试
+
+    :param size: 规模预设
+    :param repeat: 重复次数，取最快一次
+    :param select: 只运行名称包含该字符串的基准
+    :return: dict {名称: 秒}
+    """
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix='kitetdx-bench-') as tmpdir:
+        data = generate(tmpdir, **SIZES[size])
+        benchmarks = build_benchmarks(data)
+
+        for name, func in benchmarks.items():
+            if select and select not in name:
+                continue
+
+            func()  # 预热，排除首次导入和文件系统缓存的影响
+            results[name] = min(timeit.repeat(func, number=1, repeat=repeat))
+
+    return results
+
+
+def load_baselines() -> dict:
+    if BASELINES_PATH.exists():
+        return json.loads(BASELINES_PATH.read_text(encoding='utf-8'))
+    return {}
+
+
+def save_baselines(size: str, results: dict):
+    baselines = load_baselines()
+    baselines.setdefault(size, {}).update({name: round(seconds, 6) for name, seconds in results.items()})
+    baselines['_machine'] = f'{platform.system()} {platform.machine()} Python {platform.python_version()}'
+    BASELINES_PATH.write_text(json.dumps(baselines, indent=2, ensure_ascii=False, sort_keys=True) + '\n',
+                              encoding='utf-8')
+
+
+def report(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    打印结果表格
+
+    :return: list 回退的基准名称
+    """
+    regressions = []
+    print(f"{'benchmark':<22}{'time (ms)':>12}{'baseline':>12}{'ratio':>8}")
+
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        ratio = seconds / base if base else None
+        flag = ''
+
+        if ratio is not None and ratio > threshold:
+            regressions.append(name)
+            flag = '  << 回退'
+
+        print(f"{name:<22}{seconds * 1000:>12.1f}"
+              f"{(f'{base * 1000:.1f}' if base else '-'):>12}"
+              f"{(f'{ratio:.2f}' if ratio else '-'):>8}{flag}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最快一次')
+    parser.add_argument('-k', dest='select', help='只运行名称包含该字符串的基准')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='超过基线的倍数视为回退')
+    parser.add_argument('--save', action='store_true', help='将结果保存为基线')
+    args = parser.parse_args()
+
+    results = run(args.size, repeat=args.repeat, select=args.select)
+
+    if args.save:
+        save_baselines(args.size, results)
+        print(f"基线已保存: {BASELINES_PATH}")
+
+    regressions = report(results, load_baselines().get(args.size, {}), args.threshold)
+
+    if regressions and not args.save:
+        print(f"\n性能回退: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+合成通达信数据目录
+
+生成与真实客户端结构一致的数据文件，用于离线基准测试：
+
+- vipdoc/{sh,sz}/lday/*.day     日线 (含上证指数 sh000001，交易日历由它推导)
+- vipdoc/{sh,sz}/minline/*.lc1  1 分钟线
+- vipdoc/{sh,sz}/fzline/*.lc5   5 分钟线
+- T0002/hq_cache/infoharbor_ex.code, infoharbor_block.dat, tdxzs3.cfg, tdxhy.cfg  代码名称、板块、行业
+- fq_cache/*.json               复权因子缓存 (与 kitetdx.adjust 的缓存格式相同)
+- T0002/hq_cache/gbbq, gbbq.key 除权除息 (用随机生成的密钥表加密)
+
+用法: python -m benchmarks.synthetic OUT_DIR [--stocks 500] [--days 2500] [--minute-days 20]
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from kitetdx.gbbq import GBBQ_RECORD, KEY_SIZE, encode_records, gbbq_path, load_key
+from kitetdx.writer import write_daily, write_minute
+
+# 规模预设 {名称: 参数}
+SIZES = {
+    'small': dict(stocks=50, days=1000, minute_days=5, blocks=20, industries=10),
+    'medium': dict(stocks=500, days=2500, minute_days=20, blocks=100, industries=30),
+    'large': dict(stocks=5000, days=6000, minute_days=20, blocks=400, industries=60),
+}
+
+# 交易时段内的分钟数 (从 0 点开始)，上午 9:31-11:30，下午 13:01-15:00
+SESSION_MINUTES = np.r_[np.arange(571, 691), np.arange(781, 901)]
+
+FQ_CACHE_DIRNAME = 'fq_cache'
+
+
+def stock_symbols(count: int):
+    """一半上海、一半深圳的股票代码，如 ['sh600000', 'sz000001', ...]"""
+    sh = [f'sh{600000 + i}' for i in range((count + 1) // 2)]
+    sz = [f'sz{i + 1:06d}' for i in range(count // 2)]
+    return sh + sz
+
+
+def trading_days(days: int, end='2024-12-31') -> np.ndarray:
+    """以工作日近似交易日"""
+    return pd.bdate_range(end=end, periods=days).values
+
+
+def random_bars(rng, count: int, start_price=10.0) -> pd.DataFrame:
+    """几何随机游走生成 OHLC、成交量和成交额"""
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.02, count)))
+    open_ = close * np.exp(rng.normal(0, 0.005, count))
+    high = np.maximum(open_, close) * (1 + rng.random(count) * 0.02)
+    low = np.minimum(open_, close) * (1 - rng.random(count) * 0.02)
+    volume = rng.integers(1000, 100000, count).astype(np.float64)
+
+    return pd.DataFrame({
+        'open': np.round(open_, 2), 'high': np.round(high, 2),
+        'low': np.round(low, 2), 'close': np.round(close, 2),
+        'volume': volume, 'amount': volume * close * 100,
+    })
+
+
+def make_daily(tdxdir: Path, symbol: str, days: np.ndarray, rng, start_price=10.0):
+    bars = random_bars(rng, len(days), start_price)
+    bars['date'] = days
+
+    path = tdxdir / 'vipdoc' / symbol[:2] / 'lday' / f'{symbol}.day'
+    write_daily(path, bars, mode='rewrite')
+
+
+def make_minutes(tdxdir: Path, symbol: str, days: np.ndarray, rng, per_bar: int, subdir: str, suffix: str):
+    minutes = SESSION_MINUTES[per_bar - 1::per_bar]
+    bars = random_bars(rng, len(days) * len(minutes))
+    bars['date'] = np.repeat(days.astype('M8[m]'), len(minutes)) + np.tile(minutes, len(days)).astype('m8[m]')
+
+    path = tdxdir / 'vipdoc' / symbol[:2] / subdir / f'{symbol}.{suffix}'
+    write_minute(path, bars, mode='rewrite')
+
+
+def write_hq_cache(tdxdir: Path, symbols, blocks: int, industries: int, rng):
+    """代码名称、概念板块、行业配置文件 (GBK 编码)"""
+    hq_cache = tdxdir / 'T0002' / 'hq_cache'
+    hq_cache.mkdir(parents=True, exist_ok=True)
+    codes = [symbol[2:] for symbol in symbols]
+
+    names = [f'{code}|股票{code}|合成数据' for code in codes]
+    (hq_cache / 'infoharbor_ex.code').write_text('\n'.join(names), encoding='gbk')
+
+    lines = []
+    for i in range(blocks):
+        kind = ('GN', 'FG', 'ZS')[i % 3]
+        lines.append(f'#{kind}_板块{i},{1},{880500 + i}')
+        members = rng.choice(len(symbols), size=min(len(symbols), 30), replace=False)
+        lines.append(','.join(f"{0 if symbols[m].startswith('sz') else 1}#{codes[m]}" for m in sorted(members)))
+    (hq_cache / 'infoharbor_block.dat').write_text('\n'.join(lines), encoding='gbk')
+
+    # 一级行业 T01..，每个一级行业下 3 个二级行业
+    config = []
+    for i in range(industries):
+        code = f'T{10 + i:02d}{1:02d}'
+        config.append(f'行业{i}|{880200 + i * 4}|2|1|1|{code}')
+        for j in range(3):
+            config.append(f'行业{i}-{j}|{880200 + i * 4 + j + 1}|2|1|2|{code}{j + 1:02d}')
+    (hq_cache / 'tdxzs3.cfg').write_text('\n'.join(config), encoding='gbk')
+
+    mapping = []
+    for code in codes:
+        i, j = rng.integers(0, industries), rng.integers(0, 3)
+        market = 0 if code.startswith('0') else 1
+        mapping.append(f'{market}|{code}|T{10 + i:02d}01{j + 1:02d}|||X{100 + i}')
+    (hq_cache / 'tdxhy.cfg').write_text('\n'.join(mapping), encoding='gbk')
+
+
+def write_fq_cache(tdxdir: Path, symbols, days: np.ndarray, rng):
+    """每只股票若干个除权日的前复权/后复权因子"""
+    cache_dir = tdxdir / FQ_CACHE_DIRNAME
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    dates = pd.DatetimeIndex(days)
+
+    for symbol in symbols:
+        events = np.sort(rng.choice(len(dates), size=min(len(dates), 10), replace=False))[::-1]
+        factors = np.cumprod(1 + rng.random(len(events)) * 0.1)
+
+        for method in ('qfq', 'hfq'):
+            data = [{'d': dates[e].strftime('%Y-%m-%d'), 'f': str(round(f, 4))} for e, f in zip(events, factors)]
+            payload = {'data': data, 'update_time': time.time()}
+            (cache_dir / f'{symbol}_{method}.json').write_text(json.dumps(payload), encoding='utf-8')
+
+
+def write_gbbq(tdxdir: Path, symbols, days: np.ndarray, rng) -> Path:
+    """每只股票若干次分红送转，返回密钥表路径"""
+    key_path = tdxdir / 'gbbq.key'
+    key_path.write_bytes(rng.integers(0, 2 ** 32, KEY_SIZE // 4, dtype=np.uint32).tobytes())
+
+    dates = pd.DatetimeIndex(days).strftime('%Y%m%d').astype(int).to_numpy()
+    per_symbol = min(len(dates) - 1, 10)
+    records = np.zeros(len(symbols) * per_symbol, dtype=GBBQ_RECORD)
+
+    for i, symbol in enumerate(symbols):
+        part = records[i * per_symbol:(i + 1) * per_symbol]
+        part['market'] = 1 if symbol.startswith('sh') else 0
+        part['code'] = symbol[2:].encode()
+        part['date'] = np.sort(rng.choice(dates[1:], size=per_symbol, replace=False))
+        part['category'] = 1
+        part['value1'] = np.round(rng.random(per_symbol) * 3, 2)
+        part['value3'] = rng.choice([0.0, 0.0, 3.0, 10.0], size=per_symbol)
+
+    path = gbbq_path(tdxdir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(encode_records(records, load_key(key_path)))
+    return key_path
+
+
+def generate(tdxdir, stocks=50, days=1000, minute_days=5, blocks=20, industries=10, seed=0) -> dict:
+    """
+    生成合成通达信数据目录
+
+    :param tdxdir: 输出目录
+    :param stocks: 股票数量
+    :param days: 日线交易日数
+    :param minute_days: 分钟线交易日数
+    :param blocks: 概念板块数量
+    :param industries: 一级行业数量
+    :param seed: 随机种子
+    :return: dict {'tdxdir': 目录, 'symbols': 股票代码列表, 'fq_cache': 复权因子缓存目录, 'gbbq_key': gbbq 密钥表}
+    """
+    tdxdir = Path(tdxdir)
+    rng = np.random.default_rng(seed)
+
+    symbols = stock_symbols(stocks)
+    days = trading_days(days)
+    recent = days[-minute_days:]
+
+    make_daily(tdxdir, 'sh000001', days, rng, start_price=3000.0)
+
+    for symbol in symbols:
+        make_daily(tdxdir, symbol, days, rng)
+        make_minutes(tdxdir, symbol, recent, rng, 1, 'minline', 'lc1')
+        make_minutes(tdxdir, symbol, recent, rng, 5, 'fzline', 'lc5')
+
+    write_hq_cache(tdxdir, symbols, blocks, industries, rng)
+    write_fq_cache(tdxdir, symbols, days, rng)
+    gbbq_key = write_gbbq(tdxdir, symbols, days, rng)
+
+    return {'tdxdir': tdxdir, 'symbols': symbols, 'fq_cache': tdxdir / FQ_CACHE_DIRNAME, 'gbbq_key': gbbq_key}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('out', help='输出目录')
+    parser.add_argument('--size', choices=SIZES, default='small', help='规模预设，可被下面的参数覆盖')
+    parser.add_argument('--stocks', type=int)
+    parser.add_argument('--days', type=int)
+    parser.add_argument('--minute-days', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    params = dict(SIZES[args.size])
+    params.update({k: v for k, v in vars(args).items() if k in params and v is not None})
+
+    result = generate(args.out, seed=args.seed, **params)
+    print(f"已生成 {len(result['symbols'])} 只股票的合成数据: {result['tdxdir']}")
+
+
+if __name__ == '__main__':
+    main()
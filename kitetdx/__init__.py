@@ -1,11 +1,47 @@
-# 自动应用 py_mini_racer 兼容性补丁 (Mac M1/M2/M3 兼容)
+"""
+kitetdx
+
+公开接口按需导入 (PEP 562)：`import kitetdx` 本身不加载 pandas / mootdx，
+访问 `kitetdx.Reader` 时才导入 reader 模块，命令行等只用到部分功能的场景不必承担全部依赖的导入开销。
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+# 自动应用 py_mini_racer 兼容性补丁 (Mac M1/M2/M3 兼容)，quickjs 在首次使用时才导入
 from . import py_mini_racer_patch  # noqa: F401
 
-from .quotes import Quotes
-from .reader import Reader
-from .affair import Affair
-from .adjust import to_adjust, fetch_fq_factor
+if TYPE_CHECKING:
+    from .quotes import Quotes
+    from .reader import Reader
+    from .affair import Affair
+    from .adjust import to_adjust, fetch_fq_factor
+    from .sws import SwsReader
 
-from .sws import SwsReader
+# {公开名称: 所在模块}
+_LAZY_ATTRS = {
+    'Quotes': '.quotes',
+    'Reader': '.reader',
+    'Affair': '.affair',
+    'SwsReader': '.sws',
+    'to_adjust': '.adjust',
+    'fetch_fq_factor': '.adjust',
+}
 
 __all__ = ['Quotes', 'Reader', 'Affair', 'SwsReader', 'to_adjust', 'fetch_fq_factor']
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module, __name__), name)
+    # 缓存到模块命名空间，之后的访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,3 @@
+from kitetdx.cli import main
+
+main()
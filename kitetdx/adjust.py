@@ -8,10 +8,12 @@ import time
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 import urllib.request
 
 from mootdx.logger import logger
+from kitetdx import metrics
 
 
 # 新浪复权因子接口
@@ -95,6 +97,7 @@ def _save_cache(cache_path: Path, data: list):
         logger.warning(f"保存缓存失败: {e}")
 
 
+@metrics.timed('adjust.fetch_fq_factor')
 def fetch_fq_factor(symbol: str, method: str = 'qfq', timeout: int = 10) -> Optional[pd.DataFrame]:
     """
     从新浪获取复权因子（带缓存，一周内不重复请求）
@@ -175,16 +178,42 @@ def fetch_fq_factor(symbol: str, method: str = 'qfq', timeout: int = 10) -> Opti
 
 
 
-def to_adjust(df: pd.DataFrame, symbol: str, adjust: str = None) -> pd.DataFrame:
+def factor_at(factors: Optional[pd.DataFrame], times) -> np.ndarray:
+    """
+    按时间取复权因子
+
+    每个时间取不晚于它的最近一个因子 (与 reindex(method='ffill') 相同)，第一个因子之前为 1。
+    只做一次 searchsorted，时间可以是日线日期，也可以是分钟线时间。
+
+    :param factors: 复权因子，格式同 fetch_fq_factor()
+    :param times: DatetimeIndex 或 datetime64 数组
+    :return: np.ndarray (float64)
+    """
+    times = np.asarray(times, dtype='M8[ns]')
+
+    if factors is None or factors.empty:
+        return np.ones(len(times))
+
+    factors = factors.sort_index()
+    points = factors.index.values.astype('M8[ns]')
+    values = factors['factor'].to_numpy(dtype=np.float64)
+
+    pos = np.searchsorted(points, times, side='right') - 1
+    return np.where(pos >= 0, values[np.maximum(pos, 0)], 1.0)
+
+
+@metrics.timed('adjust.to_adjust')
+def to_adjust(df: pd.DataFrame, symbol: str, adjust: str = None, factors: pd.DataFrame = None) -> pd.DataFrame:
     """
     对股票数据进行复权处理
     
-    使用新浪复权因子对股票数据进行前复权或后复权处理。
+    使用新浪复权因子对股票数据进行前复权或后复权处理，日线和分钟线均可。
     
     Args:
-        df: 原始股票数据，需要包含 date, open, high, low, close 列
+        df: 原始股票数据，需要包含 date, open, high, low, close 列 (或 DatetimeIndex)
         symbol: 股票代码
         adjust: 复权方式，'qfq' 前复权，'hfq' 后复权，None 不复权
+        factors: 已有的复权因子 (格式同 fetch_fq_factor)，传入时不再请求新浪，如本地 gbbq 计算的因子
         
     Returns:
         复权后的DataFrame
@@ -196,7 +225,7 @@ def to_adjust(df: pd.DataFrame, symbol: str, adjust: str = None) -> pd.DataFrame
         return df
     
     # 获取复权因子
-    factor_df = fetch_fq_factor(symbol, adjust)
+    factor_df = factors if factors is not None else fetch_fq_factor(symbol, adjust)
     
     if factor_df is None or factor_df.empty:
         logger.warning(f"无法获取 {symbol} 的复权因子，返回原始数据")
@@ -221,24 +250,19 @@ def to_adjust(df: pd.DataFrame, symbol: str, adjust: str = None) -> pd.DataFrame
             return df
     
     
-    # 必须先排序，因为 fetch_fq_factor 返回的是降序，而 reindex 的 ffill 需要升序索引
-    df_copy = df_copy.sort_index()
-    factor_df = factor_df.sort_index()
-    
-    # 使用 reindex 方式对齐因子，确保输入数据即使只是子集且不包含除权日也能正确获取因子
-    # reindex(method='ffill') 会将 factor_df 中的因子按日期向前填充到 df_copy 的每一个日期上
-    factors = factor_df.reindex(df_copy.index, method='ffill')['factor'].fillna(1.0)
-    
-    # 应用复权因子到各价格列
-    price_cols = ['open', 'high', 'low', 'close']
+    if not df_copy.index.is_monotonic_increasing:
+        df_copy = df_copy.sort_index()
+
+    # 每个时间取不晚于它的最近一个因子 (日线和分钟线通用)，只做一次 searchsorted
+    factors = factor_at(factor_df, df_copy.index)
     
-    for col in price_cols:
-        if col in df_copy.columns:
-            if adjust == 'hfq':
-                # 后复权：价格 * 因子
-                df_copy[col] = df_copy[col] * factors
-            else:
-                # 前复权：价格 / 因子
-                df_copy[col] = df_copy[col] / factors
+    # 应用复权因子到各价格列，所有价格列一次完成
+    price_cols = [col for col in ('open', 'high', 'low', 'close') if col in df_copy.columns]
+
+    if price_cols:
+        prices = df_copy[price_cols].to_numpy(dtype=np.float64)
+        # 后复权：价格 * 因子；前复权：价格 / 因子
+        prices = prices * factors[:, None] if adjust == 'hfq' else prices / factors[:, None]
+        df_copy[price_cols] = prices
     
     return df_copy
@@ -0,0 +1,312 @@
+"""
+复权日线存储
+
+前复权价格只在出现新的除权除息事件时整体变化，每次 daily(adjust='qfq') 都重新获取因子并
+对全部历史做乘除是重复劳动。AdjustedStore 把前复权/后复权序列保存到
+{tdxdir}/adjusted/{qfq,hfq}/{symbol}.npy，并在 index.json 中记录每只证券的因子摘要和日线文件状态：
+
+- 因子和日线文件都未变化: 直接读取已保存的序列
+- 因子未变化、日线文件只是追加了新 K 线: 只复权新增的 K 线并追加
+- 因子变化 (新的除权除息) 或日线文件被改写: 重新计算该证券的全部历史
+
+用法::
+
+    store = reader.adjusted               # 或 AdjustedStore(reader)
+    store.build(symbols)                  # 每晚运行，只重算因子变化的证券
+    df = store.daily('600036', 'qfq')     # 与 reader.daily('600036', adjust='qfq') 相同
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from mootdx.logger import logger
+from kitetdx.adjust import factor_at
+from kitetdx.records import DAILY_COLUMNS, DAY_RECORD, PRICE_COLUMNS, security_coefficient
+from kitetdx.updater import iter_daily_files
+from kitetdx.utils import atomic_write, date_int_to_datetime64
+
+
+ADJUSTED_DIRNAME = 'adjusted'
+ADJUSTED_VERSION = 1
+ADJUST_METHODS = ('qfq', 'hfq')
+
+ADJUSTED_RECORD = np.dtype([('date', '<i4')] + [(col, '<f8') for col in DAILY_COLUMNS])
+
+
+def factor_signature(factors: Optional[pd.DataFrame]) -> str:
+    """
+    复权因子表的摘要，因子表不变则复权序列不变
+
+    :param factors: 格式同 fetch_fq_factor()
+    :return: str
+    """
+    if factors is None or factors.empty:
+        return ''
+
+    factors = factors.sort_index()
+    digest = hashlib.sha1(factors.index.values.astype('M8[D]').astype(np.int64).tobytes())
+    # 舍入到 10 位有效数字，忽略浮点计算顺序带来的微小差异
+    digest.update(np.array([float(f'{v:.10g}') for v in factors['factor']], dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def adjust_records(records: np.ndarray, price_coef: float, volume_coef: float,
+                   factors: Optional[pd.DataFrame], method: str) -> np.ndarray:
+    """
+    原始 .day 记录转换为复权后的 ADJUSTED_RECORD
+
+    :param records: DAY_RECORD 数组
+    :param price_coef: 价格缩放系数
+    :param volume_coef: 成交量缩放系数
+    :param factors: 复权因子
+    :param method: 'qfq' 或 'hfq'
+    :return: np.ndarray (ADJUSTED_RECORD)
+    """
+    dates = records['date'].astype(np.int64)
+    factor = factor_at(factors, date_int_to_datetime64(dates))
+
+    result = np.zeros(len(records), dtype=ADJUSTED_RECORD)
+    result['date'] = dates
+
+    for col in PRICE_COLUMNS:
+        prices = records[col] * price_coef
+        result[col] = prices * factor if method == 'hfq' else prices / factor
+
+    result['amount'] = records['amount']
+    result['volume'] = records['volume'] * volume_coef
+
+    return result
+
+
+class AdjustedStore(object):
+    """
+    复权日线存储
+    """
+
+    def __init__(self, reader, path=None):
+        """
+        构造函数
+
+        :param reader: StdReader 实例，复权因子通过 reader.fq_factor() 获取 (来源由 fq_source 决定)
+        :param path: 存储目录，默认 {tdxdir}/adjusted
+        """
+        self.reader = reader
+        self.path = Path(path) if path else Path(reader.tdxdir) / ADJUSTED_DIRNAME
+        self.index_path = self.path / 'index.json'
+        self.entries = {method: {} for method in ADJUST_METHODS}
+        self.load()
+
+    def load(self):
+        """从磁盘加载索引，文件缺失或损坏时从空索引开始"""
+        self.entries = {method: {} for method in ADJUST_METHODS}
+
+        if not self.index_path.exists():
+            return
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            if data.get('version') == ADJUSTED_VERSION:
+                self.entries.update(data.get('entries', {}))
+        except Exception as e:
+            logger.warning(f"加载复权存储索引失败，将重新生成: {e}")
+
+    def save(self):
+        """写入临时文件后原子替换"""
+        with atomic_write(self.index_path) as tmp_path, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': ADJUSTED_VERSION, 'entries': self.entries}, f)
+
+    def series_path(self, symbol: str, method: str) -> Path:
+        return self.path / method / f'{symbol}.npy'
+
+    def _day_path(self, symbol: str) -> Optional[Path]:
+        path = self.reader.find_path(symbol=Path(symbol).stem, subdir='lday', suffix='day')
+        return Path(path) if path else None
+
+    def _write_series(self, symbol: str, method: str, series: np.ndarray):
+        with atomic_write(self.series_path(symbol, method)) as tmp_path, open(tmp_path, 'wb') as f:
+            np.save(f, series)
+
+    def _read_series(self, symbol: str, method: str) -> Optional[np.ndarray]:
+        path = self.series_path(symbol, method)
+        if not path.exists():
+            return None
+        return np.load(path)
+
+    def signature(self, symbol: str, method: str, factors: Optional[pd.DataFrame] = None,
+                  last_date: Optional[int] = None) -> tuple:
+        """
+        复权因子摘要
+
+        本地 gbbq 来源的因子只由除权除息记录和日线决定，日线文件未变时比较除权除息记录即可，
+        不必先计算因子；其他来源需要获取因子后比较。
+
+        :param last_date: 最后一根日线的日期 (YYYYMMDD)，之后的除权除息尚未生效，不计入摘要；
+                          新 K 线到达除权日时摘要随之变化，触发重算
+        :return: (摘要, 已获取的因子或 None)
+        """
+        if factors is None and getattr(self.reader, 'fq_source', None) == 'gbbq':
+            gbbq = self.reader.gbbq
+            if gbbq is not None:
+                events = gbbq.events(symbol)
+                effective = slice(None) if last_date is None else np.asarray(events['date']) <= last_date
+
+                digest = hashlib.sha1()
+                for values in events.values():
+                    digest.update(np.ascontiguousarray(values[effective], dtype=np.float64).tobytes())
+                return f'gbbq:{digest.hexdigest()}', None
+
+        factors = self.reader.fq_factor(symbol, method) if factors is None else factors
+        return factor_signature(factors), factors
+
+    def update(self, symbol: str, method: str = 'qfq', factors: Optional[pd.DataFrame] = None,
+               save=True) -> str:
+        """
+        按需更新单只证券的复权序列
+
+        :param symbol: 证券代码，如 '600036' 或 'sh600036'
+        :param method: 'qfq' 或 'hfq'
+        :param factors: 已获取的复权因子，默认通过 reader.fq_factor() 获取
+        :param save: 是否写回索引
+        :return: 'unchanged' / 'appended' / 'recomputed' / 'missing'
+        """
+        if method not in ADJUST_METHODS:
+            raise ValueError(f"不支持的复权方式: {method}，可选 {ADJUST_METHODS}")
+
+        day_path = self._day_path(symbol)
+        if day_path is None:
+            return 'missing'
+
+        key = day_path.stem.lower()
+        stat = day_path.stat()
+        count = stat.st_size // DAY_RECORD.itemsize
+
+        last_date = 0
+        if count:
+            last_date = int(np.fromfile(day_path, dtype=DAY_RECORD, count=1,
+                                        offset=(count - 1) * DAY_RECORD.itemsize)['date'][0])
+
+        signature, factors = self.signature(symbol, method, factors, last_date=last_date)
+
+        entry = self.entries[method].get(key)
+        status = 'recomputed'
+
+        if entry and entry['factors'] == signature and self.series_path(key, method).exists():
+            if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+                return 'unchanged'
+
+            if count > entry['count']:
+                status = 'appended'
+
+        records = np.fromfile(day_path, dtype=DAY_RECORD, count=count)
+        price_coef, volume_coef = security_coefficient(day_path)
+        series = None
+
+        if factors is None:
+            factors = self.reader.fq_factor(symbol, method)
+
+        # 追加前的最后一根 K 线未变，且已保存的序列完整时，只复权新增的 K 线
+        if status == 'appended' and records['date'][entry['count'] - 1] == entry['last_date']:
+            series = self._read_series(key, method)
+
+        if series is not None and len(series) == entry['count']:
+            tail = adjust_records(records[entry['count']:], price_coef, volume_coef, factors, method)
+            series = np.concatenate([series, tail])
+        else:
+            status = 'recomputed'
+            series = adjust_records(records, price_coef, volume_coef, factors, method)
+
+        self._write_series(key, method, series)
+        self.entries[method][key] = {
+            'factors': signature,
+            'count': count,
+            'last_date': last_date,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+        }
+
+        if save:
+            self.save()
+
+        return status
+
+    def build(self, symbols: Optional[Iterable[str]] = None, methods: Sequence[str] = ADJUST_METHODS) -> dict:
+        """
+        批量更新复权序列，只重算因子或日线文件变化的证券
+
+        :param symbols: 证券代码列表，默认本地全部日线文件
+        :param methods: 复权方式
+        :return: dict {'unchanged': 数量, 'appended': [代码], 'recomputed': [代码], 'missing': [代码]}
+        """
+        if symbols is None:
+            symbols = [path.stem for path in iter_daily_files(self.reader.tdxdir)]
+
+        stats = {'unchanged': 0, 'appended': [], 'recomputed': [], 'missing': []}
+
+        try:
+            for symbol in symbols:
+                for method in methods:
+                    status = self.update(symbol, method, save=False)
+
+                    if status == 'unchanged':
+                        stats['unchanged'] += 1
+                    elif stats[status][-1:] != [symbol]:
+                        stats[status].append(symbol)
+        finally:
+            self.save()
+
+        logger.info(f"复权存储更新完成: 重算 {len(stats['recomputed'])} 只，追加 {len(stats['appended'])} 只，"
+                    f"未变化 {stats['unchanged']} 项")
+        return stats
+
+    def daily(self, symbol: str, method: str = 'qfq', columns: Optional[Sequence[str]] = None,
+              refresh=True) -> Optional[pd.DataFrame]:
+        """
+        读取复权日线
+
+        :param symbol: 证券代码
+        :param method: 'qfq' 或 'hfq'
+        :param columns: 只返回的列，默认 open, high, low, close, amount, volume
+        :param refresh: 日线文件在上次构建后发生变化时是否先更新该证券 (会重新获取因子)
+        :return: pd.DataFrame (索引 date)，没有日线文件时为 None
+        """
+        day_path = self._day_path(symbol)
+        if day_path is None:
+            return None
+
+        key = day_path.stem.lower()
+        entry = self.entries.get(method, {}).get(key)
+
+        if entry is None:
+            self.update(symbol, method)
+        elif refresh:
+            stat = day_path.stat()
+            if entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime_ns:
+                self.update(symbol, method)
+
+        series = self._read_series(key, method)
+        if series is None:
+            return None
+
+        columns = list(columns) if columns is not None else list(DAILY_COLUMNS)
+        index = pd.DatetimeIndex(date_int_to_datetime64(series['date']).astype('M8[ns]'), name='date')
+
+        return pd.DataFrame({col: np.array(series[col]) for col in columns}, index=index)
+
+    def remove(self, symbol: str):
+        """删除单只证券的复权序列"""
+        key = Path(symbol).stem.lower()
+
+        for method in ADJUST_METHODS:
+            self.entries[method].pop(key, None)
+            path = self.series_path(key, method)
+            if path.exists():
+                path.unlink()
+
+        self.save()
@@ -1,6 +1,31 @@
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
 from mootdx.affair import Affair as MooAffair
+from mootdx.logger import logger
+from kitetdx.utils import atomic_write
+
+# 解析结果缓存目录 (位于下载目录下) 和记录源文件哈希的状态文件
+PARSED_DIRNAME = 'parsed'
+STATE_FILENAME = '.affair_state.json'
+
+# 并发下载的文件数
+DOWNLOAD_WORKERS = 4
+
+# 财报公告日期字段 (col314)
+ANNOUNCE_COLUMN = 'col314'
+
+# 面板查找时单个分块的最大 (日期 × 证券) 元素数
+PANEL_QUERY_SIZE = 1 << 22
+
+# 缺少公告日期时按法定披露截止日处理: 报告期 (月日) -> (年份偏移, 截止月日)
+DISCLOSURE_DEADLINES = {331: (0, 430), 630: (0, 831), 930: (0, 1031), 1231: (1, 430)}
 
 def get_default_downdir():
     """
@@ -10,6 +35,243 @@ def get_default_downdir():
     os.makedirs(path, exist_ok=True)
     return path
 
+
+def file_md5(path) -> str:
+    """计算文件的 md5，与远程文件列表中的哈希值比较"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download_file(downdir, filename):
+    """
+    下载单个财务文件
+
+    :param downdir: 下载目录
+    :param filename: 文件名
+    """
+    from mootdx.financial.financial import Financial
+
+    Financial().fetch_only(report_hook=None, filename=filename, downdir=str(downdir))
+
+
+def parse_partition(path, target):
+    """
+    解析单个财务文件并保存为 Parquet，在子进程中执行
+
+    财务字段的中文表头有重名，缓存中使用 col1, col2 ... 列名，读取时再转换。
+
+    :param path: 财务文件路径 (.zip)
+    :param target: Parquet 文件路径
+    :return: int 证券数量
+    """
+    from mootdx.financial.financial import FinancialReader
+
+    df = FinancialReader.to_data(str(path), header='en')
+
+    if df is None or df.empty:
+        return 0
+
+    with atomic_write(target) as tmp_path:
+        df.to_parquet(tmp_path, compression='zstd')
+
+    return len(df)
+
+
+def to_zh_columns(df):
+    """
+    col1, col2 ... 列名转换为 mootdx 的中文表头 (按 col 编号对应，其他列保持不变)
+
+    :param df: 缓存读取的 DataFrame
+    :return: pd.DataFrame
+    """
+    from mootdx.financial.financial import columns
+
+    def zh_name(name):
+        name = str(name)
+        if name.startswith('col') and name[3:].isdigit() and int(name[3:]) < len(columns):
+            return columns[int(name[3:])]
+        return name
+
+    df.columns = [zh_name(name) for name in df.columns]
+    return df
+
+
+def field_column(name):
+    """
+    字段名转换为缓存中的列名，支持中文表头 ('每股净资产') 和 col 编号 ('col4')
+
+    :param name: 字段名
+    :return: str
+    """
+    from mootdx.financial.financial import columns
+
+    if name == 'report_date' or str(name).startswith('col'):
+        return name
+
+    try:
+        return f'col{columns.index(name)}'
+    except ValueError:
+        raise ValueError(f"未知的财务字段: {name}")
+
+
+def announce_dates(df) -> np.ndarray:
+    """
+    每条财报的公告日期 (YYYYMMDD)
+
+    公告日期字段为 YYMMDD 格式，缺失时按法定披露截止日推算，保证不会提前使用财报数据。
+
+    :param df: 缓存读取的财务数据 (col 列名)
+    :return: np.ndarray (int64)
+    """
+    report = df['report_date'].to_numpy(dtype=np.int64)
+
+    year_shift = np.zeros(len(df), dtype=np.int64)
+    deadline = np.full(len(df), 1231, dtype=np.int64)
+    for mmdd, (shift, day) in DISCLOSURE_DEADLINES.items():
+        hit = report % 10000 == mmdd
+        year_shift[hit] = shift
+        deadline[hit] = day
+
+    fallback = (report // 10000 + year_shift) * 10000 + deadline
+
+    if ANNOUNCE_COLUMN not in df.columns:
+        return fallback
+
+    announce = np.nan_to_num(df[ANNOUNCE_COLUMN].to_numpy(dtype=np.float64)).astype(np.int64)
+    announce = np.where(announce >= 19000000, announce, announce + np.where(announce >= 900000, 19000000, 20000000))
+
+    valid = (announce > 19900000) & (announce >= report)
+    return np.where(valid, announce, fallback)
+
+
+def build_factor_panel(df, fields, dates, stocks=None):
+    """
+    构建无未来数据的财务因子面板
+
+    每个交易日使用已公告财报中报告期最新的一期；公告晚于更新报告期的旧财报被忽略。
+    查找通过 (证券, 公告日期) 组合键上的 np.searchsorted 向量化完成。
+
+    :param df: 缓存读取的财务数据 (索引为代码，col 列名)
+    :param fields: 字段列表
+    :param dates: 交易日序列
+    :param stocks: 证券代码列表，默认全部
+    :return: dict {字段: pd.DataFrame (float32，索引为交易日，列为分类类型的证券代码)}
+    """
+    from kitetdx.calendar import to_date_ints
+    from kitetdx.utils import date_int_to_datetime64
+
+    columns = {field: field_column(field) for field in fields}
+    dates = to_date_ints(dates)
+
+    codes = df.index.astype(str)
+    stocks = pd.Index(sorted(codes.unique()) if stocks is None else [str(s) for s in stocks])
+    stock_idx = stocks.get_indexer(codes)
+
+    report = df['report_date'].to_numpy(dtype=np.int64)
+    announce = announce_dates(df)
+
+    keep = stock_idx >= 0
+    order = np.lexsort((report[keep], announce[keep], stock_idx[keep]))
+    rows = np.flatnonzero(keep)[order]
+
+    stock_sorted = stock_idx[rows]
+    report_sorted = report[rows]
+    announce_sorted = announce[rows]
+
+    # 同一证券内，只保留报告期不早于此前已公告财报的记录
+    frontier = pd.Series(report_sorted).groupby(stock_sorted).cummax().to_numpy()
+    current = report_sorted >= frontier
+    rows, stock_sorted, announce_sorted = rows[current], stock_sorted[current], announce_sorted[current]
+
+    keys = stock_sorted * 100000000 + announce_sorted
+    stock_range = np.arange(len(stocks), dtype=np.int64)
+
+    values = {field: df[column].to_numpy(dtype=np.float32)[rows] for field, column in columns.items()}
+    matrices = {field: np.full((len(dates), len(stocks)), np.nan, dtype=np.float32) for field in fields}
+
+    # 按日期分块查找，限制 (日期 × 证券) 查询矩阵的内存
+    step = max(PANEL_QUERY_SIZE // max(len(stocks), 1), 1)
+    for start in range(0, len(dates), step):
+        block = dates[start:start + step].astype(np.int64)
+        pos = np.searchsorted(keys, stock_range[None, :] * 100000000 + block[:, None], side='right') - 1
+
+        found = pos >= 0
+        found[found] = stock_sorted[pos[found]] == np.broadcast_to(stock_range, pos.shape)[found]
+
+        for field in fields:
+            matrices[field][start:start + step][found] = values[field][pos[found]]
+
+    index = pd.DatetimeIndex(date_int_to_datetime64(dates), name='date')
+    columns_index = pd.CategoricalIndex(stocks, name='code')
+
+    return {field: pd.DataFrame(matrices[field], index=index, columns=columns_index) for field in fields}
+
+
+class AffairCache(object):
+    """
+    财务文件解析结果缓存
+
+    {downdir}/parsed/{文件名}.parquet 为各季度的解析结果，
+    {downdir}/.affair_state.json 记录每个缓存对应的源文件哈希。
+    """
+
+    def __init__(self, downdir):
+        self.downdir = Path(downdir)
+        self.parsed_dir = self.downdir / PARSED_DIRNAME
+        self.state_path = self.downdir / STATE_FILENAME
+        self.state = self.load()
+
+    def load(self) -> dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        with atomic_write(self.state_path) as tmp_path, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+
+    def partition(self, filename) -> Path:
+        return self.parsed_dir / f'{Path(filename).stem}.parquet'
+
+    def is_fresh(self, filename, file_hash) -> bool:
+        """缓存存在且对应的源文件哈希一致"""
+        return self.state.get(filename) == file_hash and self.partition(filename).exists()
+
+    def read(self, filenames=None, header='zh', columns=None) -> pd.DataFrame:
+        """
+        读取缓存的解析结果
+
+        :param filenames: 文件名列表，默认全部
+        :param header: 'zh' 为中文表头，其他为 col1, col2 ...
+        :param columns: 只读取的列 (col 列名)，各季度文件中不存在的列会被忽略
+        :return: pd.DataFrame or None
+        """
+        filenames = sorted(self.state) if filenames is None else filenames
+        paths = [self.partition(name) for name in filenames if self.partition(name).exists()]
+
+        if not paths:
+            return None
+
+        frames = []
+        for path in paths:
+            if columns is None:
+                frames.append(pd.read_parquet(path))
+            else:
+                from kitetdx.utils import import_pyarrow
+
+                _, pq = import_pyarrow()
+                names = set(pq.read_schema(path).names)
+                frames.append(pd.read_parquet(path, columns=[c for c in columns if c in names]))
+
+        df = pd.concat(frames)
+        return to_zh_columns(df) if header == 'zh' else df
+
+
 class Affair(object):
     """
     Kitetdx Affair Module
@@ -39,13 +301,141 @@ class Affair(object):
         return MooAffair.fetch(downdir=downdir, filename=filename)
 
     @staticmethod
-    def parse(downdir=None, filename=''):
+    def sync(downdir=None, workers=None, filenames=None):
+        """
+        同步财务文件并缓存解析结果
+
+        只下载远程哈希与本地不一致的文件，在进程池中并发解析，
+        解析结果按季度保存为 Parquet，之后 parse() 直接读取缓存。
+        需要安装 pyarrow: pip install kitetdx[parquet]
+
+        :param downdir: 下载目录 (默认为 ~/.kitetdx/tmp)
+        :param workers: 解析进程数，默认为 CPU 核数
+        :param filenames: 只同步指定的文件，默认全部
+        :return: dict 统计信息 {'files': 远程文件数, 'downloaded': 下载数, 'parsed': 解析数, 'failed': 失败文件列表}
+        """
+        from kitetdx.utils import import_pyarrow
+
+        import_pyarrow()
+
+        downdir = Path(downdir or get_default_downdir())
+        cache = AffairCache(downdir)
+        cache.parsed_dir.mkdir(parents=True, exist_ok=True)
+
+        remote = Affair.files() or []
+        if filenames is not None:
+            wanted = set(filenames)
+            remote = [item for item in remote if item['filename'] in wanted]
+
+        stats = {'files': len(remote), 'downloaded': 0, 'parsed': 0, 'failed': []}
+
+        def is_current(item):
+            path = downdir / item['filename']
+            return path.exists() and file_md5(path) == item['hash']
+
+        stale = [item for item in remote if not is_current(item)]
+
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+            for item, error in zip(stale, executor.map(lambda x: Affair._download(downdir, x), stale)):
+                if error:
+                    logger.warning(f"下载 {item['filename']} 失败: {error}")
+                    stats['failed'].append(item['filename'])
+                else:
+                    stats['downloaded'] += 1
+
+        todo = [
+            item for item in remote
+            if item['filename'] not in stats['failed'] and not cache.is_fresh(item['filename'], item['hash'])
+        ]
+
+        if todo:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    item['filename']: executor.submit(
+                        parse_partition, downdir / item['filename'], cache.partition(item['filename'])
+                    )
+                    for item in todo
+                }
+
+                for item in todo:
+                    try:
+                        futures[item['filename']].result()
+                    except Exception as e:
+                        logger.warning(f"解析 {item['filename']} 失败: {e}")
+                        stats['failed'].append(item['filename'])
+                        continue
+
+                    cache.state[item['filename']] = item['hash']
+                    stats['parsed'] += 1
+
+            cache.save()
+
+        logger.info(f"财务数据同步完成: 下载 {stats['downloaded']} 个, 解析 {stats['parsed']} 个, 失败 {len(stats['failed'])} 个")
+        return stats
+
+    @staticmethod
+    def panel(fields, dates, stocks=None, downdir=None):
+        """
+        按公告日期对齐的财务因子面板 (无未来数据)
+
+        每个交易日使用当日已公告的最新一期财报，数据来自 sync() 的缓存。
+
+        :param fields: 字段列表，中文表头 ('每股净资产') 或 col 编号 ('col4')
+        :param dates: 交易日序列，如 reader.calendar.to_index(sessions)
+        :param stocks: 股票代码列表，默认全部
+        :param downdir: 下载目录 (默认为 ~/.kitetdx/tmp)
+        :return: dict {字段: pd.DataFrame (float32，索引为交易日，列为股票代码)}
+        """
+        downdir = downdir or get_default_downdir()
+
+        needed = ['report_date', ANNOUNCE_COLUMN] + [field_column(field) for field in fields]
+        cache = AffairCache(downdir)
+        df = cache.read(header='en', columns=list(dict.fromkeys(needed)))
+
+        if df is None:
+            raise ValueError("没有已缓存的财务数据，请先调用 Affair.sync()")
+
+        return build_factor_panel(df, fields, dates, stocks)
+
+    @staticmethod
+    def _download(downdir, item):
+        try:
+            download_file(downdir, item['filename'])
+        except Exception as e:
+            return e
+
+        if file_md5(Path(downdir) / item['filename']) != item['hash']:
+            return ValueError("文件哈希与远程列表不一致")
+
+        return None
+
+    @staticmethod
+    def parse(downdir=None, filename='', **kwargs):
         """
         解析财务文件
-        
+
+        已通过 sync() 缓存的文件直接读取 Parquet 缓存。
+
         :param downdir: 下载目录 (默认为 ~/.kitetdx/tmp)
-        :param filename: 文件名 (可选，如果不指定则解析目录下所有)
+        :param filename: 文件名 (可选，如果不指定则返回全部已缓存季度的合并结果)
+        :param header: 'zh' 为中文表头 (默认)，其他为 col1, col2 ...
         :return: pd.DataFrame or None
         """
         downdir = downdir or get_default_downdir()
-        return MooAffair.parse(downdir=downdir, filename=filename)
+        header = kwargs.get('header', 'zh')
+        cache = AffairCache(downdir)
+
+        if not filename:
+            df = cache.read(header=header)
+
+            if df is None:
+                logger.warning("没有已缓存的财务数据，请先调用 Affair.sync()")
+
+            return df
+
+        path = Path(downdir) / filename
+        if filename in cache.state and cache.partition(filename).exists() and path.exists() \
+                and cache.partition(filename).stat().st_mtime >= path.stat().st_mtime:
+            return cache.read([filename], header=header)
+
+        return MooAffair.parse(downdir=downdir, filename=filename, **kwargs)
@@ -0,0 +1,249 @@
+"""
+异步读取
+
+StdReader 的文件读取和 pandas 计算都是同步阻塞的，直接在 async 处理函数中调用会卡住事件循环。
+AsyncReader 把每次读取放到一个有界线程池中执行，并限制并发数：
+
+- 全局并发上限 max_concurrency，超出的调用在事件循环中排队，不会堆积到线程池
+- 按方法的并发上限 limits，如 {'block': 1} 让板块解析同一时间只跑一份
+- *_many 批量读取可单独指定本次调用的并发数 concurrency
+- 调用被取消时，尚未开始的读取直接撤销；已在线程中运行的读取无法中断，
+  完成前继续占用并发名额，避免取消后线程池被新的调用挤满
+
+用法::
+
+    from kitetdx.aio import AsyncReader
+
+    reader = AsyncReader(tdxdir='C:/new_tdx', max_workers=8)
+
+    @app.get('/daily/{symbol}')
+    async def daily(symbol: str):
+        df = await reader.daily(symbol, adjust='qfq')
+        ...
+
+    frames = await reader.daily_many(['600036', '000001'], concurrency=4)
+"""
+
+import asyncio
+import functools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from mootdx.logger import logger
+
+
+DEFAULT_MAX_WORKERS = 4
+
+
+class AsyncReader(object):
+    """
+    StdReader 的 asyncio 封装
+    """
+
+    def __init__(self, reader=None, max_workers=DEFAULT_MAX_WORKERS, max_concurrency=None,
+                 limits: Optional[Dict[str, int]] = None, executor=None, **kwargs):
+        """
+        构造函数
+
+        :param reader: 已有的 StdReader，默认使用 Reader.factory(market='std', **kwargs) 创建
+        :param max_workers: 线程池大小
+        :param max_concurrency: 同时执行的读取数上限，默认与 max_workers 相同
+        :param limits: 按方法的并发上限，如 {'daily': 8, 'block': 1}
+        :param executor: 已有的线程池，传入时忽略 max_workers 且不会关闭该线程池
+        :param kwargs: 创建 StdReader 的参数，如 tdxdir
+        """
+        if reader is None:
+            from kitetdx.reader import Reader
+            reader = Reader.factory(market='std', **kwargs)
+
+        self.reader = reader
+        self.max_concurrency = max_concurrency or max_workers
+        self.limits = dict(limits or {})
+
+        self._owned = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='kitetdx-aio')
+
+        # 信号量在事件循环中创建，兼容 Python 3.8/3.9；事件循环变化时重新创建
+        self._loop = None
+        self._semaphores = {}
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphores = {}
+
+        if name not in self._semaphores:
+            value = self.max_concurrency if name is None else self.limits[name]
+            self._semaphores[name] = asyncio.Semaphore(value)
+
+        return self._semaphores[name]
+
+    async def run(self, method: str, *args, **kwargs):
+        """
+        在线程池中调用 StdReader 的方法
+
+        :param method: 方法名，如 'daily'
+        :param args: 位置参数
+        :param kwargs: 关键字参数
+        :return: 方法的返回值
+        """
+        if self._executor is None:
+            raise RuntimeError("AsyncReader 已关闭")
+
+        func = functools.partial(getattr(self.reader, method), *args, **kwargs)
+        semaphores = [self._semaphore(None)]
+        if method in self.limits:
+            semaphores.insert(0, self._semaphore(method))
+
+        acquired = []
+        try:
+            for semaphore in semaphores:
+                await semaphore.acquire()
+                acquired.append(semaphore)
+
+            future = self._executor.submit(func)
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+
+        # 读取真正结束 (完成、异常或被撤销) 后才释放并发名额
+        loop = self._loop
+        future.add_done_callback(lambda _: self._release(loop, acquired))
+
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _release(loop, semaphores):
+        def release():
+            for semaphore in semaphores:
+                semaphore.release()
+
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+
+    async def map(self, method: str, symbols: Iterable[str], concurrency=None, return_exceptions=False,
+                  **kwargs) -> dict:
+        """
+        并发读取多只证券
+
+        :param method: 方法名，如 'daily'
+        :param symbols: 证券代码列表
+        :param concurrency: 本次调用同时进行的读取数，默认不额外限制
+        :param return_exceptions: 为 True 时失败的证券以异常作为结果，否则第一个异常会取消其余读取并抛出
+        :param kwargs: 传给方法的参数
+        :return: dict {证券代码: 结果}
+        """
+        symbols = list(dict.fromkeys(symbols))
+        limit = asyncio.Semaphore(concurrency) if concurrency else None
+
+        async def read(symbol):
+            if limit is None:
+                return await self.run(method, symbol, **kwargs)
+            async with limit:
+                return await self.run(method, symbol, **kwargs)
+
+        tasks = [asyncio.ensure_future(read(symbol)) for symbol in symbols]
+
+        try:
+            results = await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        return dict(zip(symbols, results))
+
+    async def daily(self, symbol=None, columns=None, dtype=None, **kwargs):
+        """异步 StdReader.daily()"""
+        return await self.run('daily', symbol, columns=columns, dtype=dtype, **kwargs)
+
+    async def daily_many(self, symbols: Iterable[str], concurrency=None, return_exceptions=False, **kwargs) -> dict:
+        """
+        并发读取多只证券的日线
+
+        :param symbols: 证券代码列表
+        :param concurrency: 本次调用同时进行的读取数
+        :param return_exceptions: 是否以异常作为失败证券的结果
+        :param kwargs: 传给 daily() 的参数，如 adjust='qfq'
+        :return: dict {证券代码: pd.DataFrame}
+        """
+        return await self.map('daily', symbols, concurrency=concurrency, return_exceptions=return_exceptions,
+                              **kwargs)
+
+    async def minute(self, symbol=None, suffix=1, **kwargs):
+        """异步 StdReader.minute()"""
+        return await self.run('minute', symbol, suffix=suffix, **kwargs)
+
+    async def minute_many(self, symbols: Iterable[str], concurrency=None, return_exceptions=False, **kwargs) -> dict:
+        """并发读取多只证券的分钟线，参数同 daily_many()"""
+        return await self.map('minute', symbols, concurrency=concurrency, return_exceptions=return_exceptions,
+                              **kwargs)
+
+    async def fzline(self, symbol=None):
+        """异步 StdReader.fzline()"""
+        return await self.run('fzline', symbol)
+
+    async def xdxr(self, symbol='', **kwargs):
+        """异步 StdReader.xdxr()"""
+        return await self.run('xdxr', symbol, **kwargs)
+
+    async def panel(self, symbols, fields=None, start=None, end=None, **kwargs):
+        """异步 StdReader.panel()"""
+        return await self.run('panel', symbols, fields=fields, start=start, end=end, **kwargs)
+
+    async def block(self, concept_type=None, return_df=False):
+        """异步 StdReader.block()"""
+        return await self.run('block', concept_type=concept_type, return_df=return_df)
+
+    async def get_industries(self, source='tdx', **kwargs):
+        """异步 StdReader.get_industries()"""
+        return await self.run('get_industries', source=source, **kwargs)
+
+    async def get_industry_stocks(self, industry_code, source='tdx', **kwargs):
+        """异步 StdReader.get_industry_stocks()"""
+        return await self.run('get_industry_stocks', industry_code, source=source, **kwargs)
+
+    async def get_stock_industry(self, stock_code, source='tdx', **kwargs):
+        """异步 StdReader.get_stock_industry()"""
+        return await self.run('get_stock_industry', stock_code, source=source, **kwargs)
+
+    def close(self, wait=True):
+        """
+        关闭线程池，尚未开始的读取被撤销
+
+        :param wait: 是否等待正在执行的读取结束
+        """
+        executor, self._executor = self._executor, None
+
+        if executor is None or not self._owned:
+            return
+
+        if sys.version_info >= (3, 9):
+            executor.shutdown(wait=wait, cancel_futures=True)
+        else:
+            executor.shutdown(wait=wait)
+
+        logger.debug("AsyncReader 线程池已关闭")
+
+    async def aclose(self):
+        """在线程池中等待正在执行的读取结束，不阻塞事件循环"""
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
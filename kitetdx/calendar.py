@@ -0,0 +1,225 @@
+"""
+交易日历
+
+从本地上证指数日线文件 (sh000001.day) 推导上交所交易日历，
+以升序的 int32 (YYYYMMDD) 数组缓存，所有日期运算通过 np.searchsorted 向量化完成。
+
+本地数据之后的日期无法得知节假日安排，按工作日 (周一至周五) 延伸。
+"""
+
+import datetime
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from mootdx.logger import logger
+from kitetdx.records import DAY_RECORD
+from kitetdx.utils import date_int_to_datetime64, datetime64_to_date_int
+
+
+# 推导交易日历使用的指数
+CALENDAR_SYMBOL = 'sh000001'
+
+# 本地数据之后按工作日延伸的天数
+EXTEND_DAYS = 400
+
+# 没有本地指数文件时，按工作日生成日历的起始日期
+FALLBACK_START = 19901219
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def to_date_ints(dates):
+    """
+    将各种日期格式转换为 YYYYMMDD 整数数组
+
+    支持 YYYYMMDD 整数、'YYYYMMDD' / 'YYYY-MM-DD' 字符串、datetime.date、
+    pd.Timestamp、np.datetime64 及其数组 / DatetimeIndex。
+
+    :param dates: 日期或日期数组
+    :return: np.ndarray (int32)
+    """
+    values = np.asarray(dates)
+
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int32)
+
+    if values.dtype.kind != 'M':
+        values = np.asarray(pd.to_datetime(values.ravel()).values).reshape(values.shape)
+
+    return datetime64_to_date_int(values)
+
+
+def _weekdays(start: int, end: int) -> np.ndarray:
+    """[start, end] 之间的工作日，YYYYMMDD 整数"""
+    start_day, end_day = date_int_to_datetime64([start, end])
+    days = np.arange(start_day, end_day + np.timedelta64(1, 'D'), dtype='M8[D]')
+    return datetime64_to_date_int(days[np.is_busday(days)])
+
+
+class TradingCalendar(object):
+    """
+    交易日历
+
+    sessions: 升序 int32 数组 (YYYYMMDD)，来自本地指数数据
+    last: 最后一个已知交易日，之后的日期按工作日处理
+    """
+
+    def __init__(self, sessions):
+        """
+        构造函数
+
+        :param sessions: 交易日数组 (YYYYMMDD)
+        """
+        sessions = np.unique(np.asarray(sessions, dtype=np.int32))
+
+        if sessions.size == 0:
+            raise ValueError("交易日历不能为空")
+
+        self.sessions = sessions
+        self.first = int(sessions[0])
+        self.last = int(sessions[-1])
+
+        extension = _weekdays(self.last, int(datetime64_to_date_int(
+            date_int_to_datetime64([self.last])[0] + np.timedelta64(EXTEND_DAYS, 'D')
+        )))
+        self._all = np.concatenate([sessions, extension[extension > self.last]])
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        从指数日线文件读取交易日
+
+        :param path: .day 文件路径
+        :return: TradingCalendar
+        """
+        records = np.fromfile(path, dtype=DAY_RECORD)
+        return cls(records['date'])
+
+    @classmethod
+    def weekdays(cls, start=FALLBACK_START, end=None):
+        """
+        只排除周末的日历，用于缺少本地指数数据的情况
+
+        :param start: 起始日期
+        :param end: 截止日期，默认今天
+        :return: TradingCalendar
+        """
+        end = int(to_date_ints(end or datetime.date.today()))
+        return cls(_weekdays(int(to_date_ints(start)), end))
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __repr__(self):
+        return f'TradingCalendar({self.first} - {self.last}, {len(self.sessions)} sessions)'
+
+    def is_trading_day(self, dates):
+        """
+        判断是否为交易日，支持标量和数组
+
+        :param dates: 日期或日期数组
+        :return: bool or np.ndarray(bool)
+        """
+        values = to_date_ints(dates)
+        pos = np.searchsorted(self._all, values).clip(max=len(self._all) - 1)
+        result = self._all[pos] == values
+
+        return bool(result) if result.ndim == 0 else result
+
+    def shift(self, dates, n=0):
+        """
+        按交易日平移
+
+        非交易日先回退到之前最近的交易日再平移，因此 shift(date, 0) 即最近的交易日。
+        超出日历范围的结果会被截断到首尾交易日。
+
+        :param dates: 日期或日期数组
+        :param n: 平移的交易日数，正数向后，负数向前
+        :return: int or np.ndarray (YYYYMMDD)
+        """
+        values = to_date_ints(dates)
+        pos = np.searchsorted(self._all, values, side='right') - 1 + n
+        result = self._all[pos.clip(0, len(self._all) - 1)]
+
+        return int(result) if result.ndim == 0 else result
+
+    def sessions_between(self, start=None, end=None):
+        """
+        [start, end] 之间的全部交易日
+
+        :param start: 起始日期，默认日历第一天
+        :param end: 截止日期，默认最后一个已知交易日
+        :return: np.ndarray (int32, YYYYMMDD)
+        """
+        start = self.first if start is None else int(to_date_ints(start))
+        end = self.last if end is None else int(to_date_ints(end))
+
+        left = np.searchsorted(self._all, start, side='left')
+        right = np.searchsorted(self._all, end, side='right')
+
+        return self._all[left:right]
+
+    def count(self, start, end):
+        """
+        (start, end] 之间的交易日数量，支持数组
+
+        :param start: 起始日期 (不含)
+        :param end: 截止日期 (含)
+        :return: int or np.ndarray
+        """
+        left = np.searchsorted(self._all, to_date_ints(start), side='right')
+        right = np.searchsorted(self._all, to_date_ints(end), side='right')
+        result = np.maximum(right - left, 0)
+
+        return int(result) if result.ndim == 0 else result
+
+    def to_index(self, sessions=None) -> pd.DatetimeIndex:
+        """
+        交易日数组转换为 DatetimeIndex
+
+        :param sessions: 交易日数组，默认全部已知交易日
+        :return: pd.DatetimeIndex
+        """
+        sessions = self.sessions if sessions is None else sessions
+        return pd.DatetimeIndex(date_int_to_datetime64(sessions), name='date')
+
+
+def get_calendar(tdxdir, symbol=CALENDAR_SYMBOL) -> TradingCalendar:
+    """
+    获取通达信目录对应的交易日历
+
+    结果按文件大小和修改时间缓存，指数文件更新后自动重新加载；
+    缺少指数文件时退化为只排除周末的日历。
+
+    :param tdxdir: 通达信数据目录
+    :param symbol: 推导日历使用的指数文件
+    :return: TradingCalendar
+    """
+    path = Path(tdxdir) / 'vipdoc' / symbol[:2] / 'lday' / f'{symbol}.day'
+
+    try:
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        key = None
+
+    with _cache_lock:
+        cached = _cache.get(str(path))
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+    if key is None or key[0] == 0:
+        logger.debug(f"未找到 {path}，交易日历退化为工作日")
+        calendar = TradingCalendar.weekdays()
+    else:
+        calendar = TradingCalendar.from_file(path)
+
+    with _cache_lock:
+        _cache[str(path)] = (key, calendar)
+
+    return calendar
@@ -0,0 +1,285 @@
+"""
+命令行工具
+
+    kitetdx export daily --universe all --out ./daily --format parquet --workers 8
+    kitetdx export blocks --out blocks.parquet
+    kitetdx export industries --source tdx --level 1 --out industries.csv
+    kitetdx update --mode auto
+    kitetdx serve --port 8765
+
+日线导出按证券逐个读取、逐个写入，同时在途的任务不超过 workers 的两倍，
+内存占用与证券数量无关。
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import click
+
+
+FORMATS = ('parquet', 'csv')
+
+MARKETS = ('sh', 'sz', 'bj')
+
+
+def resolve_universe(tdxdir, universe: str):
+    """
+    解析导出范围为日线文件列表
+
+    :param tdxdir: 通达信数据目录
+    :param universe: 'all'；市场列表如 'sh,sz'；代码列表如 'sh600000,sz000001'；或 '@文件' (每行一个代码)
+    :return: list[Path]
+    """
+    from kitetdx.updater import iter_daily_files
+
+    if universe.startswith('@'):
+        items = Path(universe[1:]).read_text(encoding='utf-8').split()
+    else:
+        items = [item.strip() for item in universe.split(',') if item.strip()]
+
+    items = [item.lower() for item in items]
+
+    if items == ['all']:
+        return list(iter_daily_files(tdxdir, MARKETS))
+
+    if all(item in MARKETS for item in items):
+        return list(iter_daily_files(tdxdir, items))
+
+    paths = []
+    for item in items:
+        if item[:2] not in MARKETS:
+            raise click.BadParameter(f"代码需带市场前缀，如 sh600000: {item}", param_hint='--universe')
+
+        path = Path(tdxdir) / 'vipdoc' / item[:2] / 'lday' / f'{item}.day'
+        if path.exists():
+            paths.append(path)
+        else:
+            click.echo(f"未找到 {item} 的日线数据文件，已跳过", err=True)
+
+    return paths
+
+
+def write_frame(df, path, fmt: str, index=True):
+    """
+    写入单个文件，写入临时文件后原子替换
+
+    :param df: pd.DataFrame
+    :param path: 目标路径
+    :param fmt: 'parquet' or 'csv'
+    :param index: 是否写入索引
+    """
+    from kitetdx.utils import atomic_write
+
+    with atomic_write(path) as tmp_path:
+        if fmt == 'parquet':
+            df.to_parquet(tmp_path, index=index, compression='zstd')
+        else:
+            df.to_csv(tmp_path, index=index)
+
+
+def check_format(fmt: str):
+    """Parquet 需要可选依赖 pyarrow，开始导出前先检查"""
+    if fmt == 'parquet':
+        from kitetdx.utils import import_pyarrow
+
+        try:
+            import_pyarrow()
+        except ImportError as e:
+            raise click.ClickException(str(e))
+
+
+def export_daily(reader, paths, out, fmt='parquet', workers=8, adjust=None, columns=None, dtype=None,
+                 progress=True):
+    """
+    并发导出日线，每只证券一个文件 {out}/{代码}.{fmt}
+
+    :param reader: StdReader 实例，复权因子来源由其 fq_source 决定
+    :param paths: 日线文件列表
+    :param out: 输出目录
+    :param fmt: 'parquet' or 'csv'
+    :param workers: 并发线程数
+    :param adjust: 复权方式 'qfq' / 'hfq'
+    :param columns: 导出的列
+    :param dtype: 数值列的数据类型
+    :param progress: 是否显示进度条
+    :return: dict {'files': 导出文件数, 'rows': 总行数, 'failed': [代码]}
+    """
+    from tqdm import tqdm
+
+    out = Path(out)
+    stats = {'files': 0, 'rows': 0, 'failed': []}
+
+    def export(path):
+        df = reader.daily(path.stem, columns=columns, dtype=dtype, adjust=adjust)
+        if df is None or df.empty:
+            return 0
+
+        write_frame(df, out / f'{path.stem}.{fmt}', fmt)
+        return len(df)
+
+    pending = {}
+    bar = tqdm(total=len(paths) if hasattr(paths, '__len__') else None, unit='只', disable=not progress)
+    paths = iter(paths)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            # 限制在途任务数量，已完成的结果不在内存中堆积
+            for path in paths:
+                pending[executor.submit(export, path)] = path
+                if len(pending) >= workers * 2:
+                    break
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                path = pending.pop(future)
+                bar.update(1)
+
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    stats['failed'].append(path.stem)
+                    click.echo(f"导出 {path.stem} 失败: {e}", err=True)
+                    continue
+
+                if rows:
+                    stats['files'] += 1
+                    stats['rows'] += rows
+
+    bar.close()
+    return stats
+
+
+def output_path(out, fmt: str) -> Path:
+    """单文件导出时，未指定扩展名则按格式补全"""
+    out = Path(out)
+    return out if out.suffix else out.with_suffix(f'.{fmt}')
+
+
+@click.group()
+@click.option('--tdxdir', envvar='TDXDIR', default=None, help='通达信数据目录，默认读取环境变量 TDXDIR')
+@click.option('--fq-source', type=click.Choice(['sina', 'gbbq']), default='sina', show_default=True,
+              help='复权因子来源: sina 新浪接口, gbbq 本地 gbbq 文件')
+@click.option('--gbbq-key', default=None, type=click.Path(dir_okay=False),
+              help='gbbq 密钥表路径，默认查找环境变量 KITETDX_GBBQ_KEY 和 ~/.kitetdx/gbbq.key')
+@click.pass_context
+def cli(ctx, tdxdir, fq_source, gbbq_key):
+    """kitetdx 命令行工具"""
+    ctx.ensure_object(dict)
+    ctx.obj['tdxdir'] = tdxdir
+    ctx.obj['reader'] = {'fq_source': fq_source, 'gbbq_key': gbbq_key}
+
+
+def get_reader(ctx):
+    from kitetdx.reader import Reader
+
+    return Reader.factory(market='std', tdxdir=ctx.obj.get('tdxdir'), **ctx.obj.get('reader', {}))
+
+
+@cli.group()
+def export():
+    """批量导出数据到 Parquet / CSV"""
+
+
+@export.command('daily')
+@click.option('--universe', default='all', show_default=True,
+              help="导出范围: all、市场 (sh,sz,bj)、代码列表 (sh600000,sz000001) 或 @文件")
+@click.option('--out', required=True, type=click.Path(file_okay=False), help='输出目录')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='parquet', show_default=True)
+@click.option('--workers', type=int, default=8, show_default=True, help='并发线程数')
+@click.option('--adjust', type=click.Choice(['qfq', 'hfq']), default=None, help='复权方式')
+@click.option('--columns', default=None, help='导出的列，逗号分隔，如 close,volume')
+@click.option('--dtype', default=None, help="数值列的数据类型，如 float32")
+@click.option('--quiet', is_flag=True, help='不显示进度条')
+@click.pass_context
+def export_daily_command(ctx, universe, out, fmt, workers, adjust, columns, dtype, quiet):
+    """导出日线，每只证券一个文件"""
+    check_format(fmt)
+    reader = get_reader(ctx)
+
+    paths = resolve_universe(reader.tdxdir, universe)
+    columns = [col.strip() for col in columns.split(',')] if columns else None
+
+    stats = export_daily(reader, paths, out, fmt=fmt, workers=workers, adjust=adjust, columns=columns, dtype=dtype,
+                         progress=not quiet)
+
+    click.echo(f"导出完成: {stats['files']} 个文件, {stats['rows']} 行, 失败 {len(stats['failed'])} 只")
+
+    if stats['failed']:
+        ctx.exit(1)
+
+
+@export.command('blocks')
+@click.option('--out', required=True, type=click.Path(dir_okay=False), help='输出文件')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='parquet', show_default=True)
+@click.option('--type', 'concept_type', type=click.Choice(['GN', 'FG', 'ZS']), default=None,
+              help='板块类型，默认全部')
+@click.pass_context
+def export_blocks_command(ctx, out, fmt, concept_type):
+    """导出板块成分股"""
+    check_format(fmt)
+    df = get_reader(ctx).block(concept_type=concept_type, return_df=True)
+
+    if df.empty:
+        raise click.ClickException('未找到板块数据 (T0002/hq_cache/infoharbor_block.dat)')
+
+    path = output_path(out, fmt)
+    write_frame(df, path, fmt, index=False)
+    click.echo(f"导出完成: {len(df)} 行 -> {path}")
+
+
+@export.command('industries')
+@click.option('--out', required=True, type=click.Path(dir_okay=False), help='输出文件')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='parquet', show_default=True)
+@click.option('--source', type=click.Choice(['tdx', 'sws']), default='tdx', show_default=True)
+@click.option('--level', type=click.IntRange(1, 2), default=1, show_default=True, help='行业级别')
+@click.pass_context
+def export_industries_command(ctx, out, fmt, source, level):
+    """导出行业列表"""
+    check_format(fmt)
+    df = get_reader(ctx).get_industries(source=source, level=level)
+
+    if df is None or df.empty:
+        raise click.ClickException('未找到行业数据')
+
+    path = output_path(out, fmt)
+    write_frame(df, path, fmt, index=False)
+    click.echo(f"导出完成: {len(df)} 行 -> {path}")
+
+
+@cli.command()
+@click.option('--mode', type=click.Choice(['auto', 'delta', 'full']), default='auto', show_default=True,
+              help='auto 自动选择, delta 只增量补齐, full 下载完整数据包')
+@click.pass_context
+def update(ctx, mode):
+    """更新本地日线数据"""
+    get_reader(ctx).update_data(mode=mode)
+
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help='监听地址')
+@click.option('--port', type=int, default=8765, show_default=True, help='监听端口')
+@click.option('--socket', 'socket_path', default=None, type=click.Path(dir_okay=False),
+              help='改为监听 Unix socket')
+@click.option('--cache-size', type=int, default=1024, show_default=True, help='缓存的最大条目数')
+@click.pass_context
+def serve(ctx, host, port, socket_path, cache_size):
+    """启动本地只读数据服务 (Arrow IPC over HTTP)"""
+    from kitetdx.server import serve as run_server
+
+    try:
+        run_server(tdxdir=ctx.obj.get('tdxdir'), host=host, port=port, socket_path=socket_path,
+                   cache_size=cache_size, **ctx.obj.get('reader', {}))
+    except ImportError as e:
+        raise click.ClickException(str(e))
+
+
+def main():
+    cli(obj={})
+
+
+if __name__ == '__main__':
+    main()
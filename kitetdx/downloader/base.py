@@ -8,10 +8,20 @@ import os
 import shutil
 import time
 import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from mootdx.logger import logger
+from kitetdx.utils import atomic_write
+
+
+# 解压时的流式拷贝缓冲区大小
+UNZIP_BUFFER_SIZE = 1024 * 1024
+
+# 解压线程数，解压与 CRC 校验大部分时间释放 GIL
+UNZIP_WORKERS = min(8, (os.cpu_count() or 1) + 4)
 
 
 class TdxSeleniumDownloader:
@@ -37,6 +47,9 @@ class TdxSeleniumDownloader:
         self.zip_filename = "hsjday.zip"
         self.target_url = "https://data.tdx.com.cn/vipdoc/hsjday.zip"
         self.auth_url = "https://data.tdx.com.cn/vipdoc/"
+
+        # 最近一次解压中实际发生变化的文件，供下游按文件失效缓存
+        self.changed_files: List[Path] = []
     
     def _get_chrome_driver(self):
         """
@@ -241,69 +254,140 @@ class TdxSeleniumDownloader:
             if driver:
                 driver.quit()
     
-    def _unzip_file(self, zip_path: Path) -> bool:
+    def _unzip_file(self, zip_path: Path, workers: Optional[int] = None) -> bool:
         """
-        解压 ZIP 文件，覆盖已有文件
-        
+        解压 ZIP 文件，仅覆盖内容发生变化的文件
+
+        按固定大小缓冲区流式拷贝，先写临时文件再原子替换；
+        大小与 CRC32 均与 ZIP 记录一致的已有文件直接跳过。
+        解压完成后，实际变化的文件列表保存在 ``self.changed_files`` 中。
+
         Args:
             zip_path: ZIP 文件路径
-            
+            workers: 解压线程数，默认 UNZIP_WORKERS
+
         Returns:
             bool: 解压是否成功
         """
         logger.info(f"开始解压: {zip_path}")
+        self.changed_files = []
+
         try:
             if not zipfile.is_zipfile(zip_path):
                 logger.error("文件损坏，不是有效的 ZIP")
                 return False
-            
+
+            vipdoc_root = str(self.vipdoc_dir.resolve())
+            jobs = []
+
             with zipfile.ZipFile(zip_path, 'r') as zip_ref:
                 file_list = zip_ref.infolist()
-                logger.info(f"包含 {len(file_list)} 个文件，解压并覆盖旧文件...")
-                
+                logger.info(f"包含 {len(file_list)} 个文件，解压并更新有变化的文件...")
+
                 for member in file_list:
                     # 处理路径分隔符和安全检查
-                    member.filename = member.filename.replace('\\', '/').lstrip('/')
-                    
+                    filename = member.filename.replace('\\', '/').lstrip('/')
+
                     # 修复：如果有 vipdoc 前缀，去掉它，避免形成 vipdoc/vipdoc/sh/...
-                    if member.filename.lower().startswith('vipdoc/'):
-                        member.filename = member.filename[7:]
-                        
-                    if not member.filename:  # 如果只是 vipdoc/ 目录本身，跳过
+                    if filename.lower().startswith('vipdoc/'):
+                        filename = filename[7:]
+
+                    if not filename:  # 如果只是 vipdoc/ 目录本身，跳过
                         continue
 
-                    target_path = self.vipdoc_dir / member.filename
-                    
+                    target_path = self.vipdoc_dir / filename
+
                     # 安全检查：确保解压路径在 vipdoc_dir 内
-                    if not str(target_path.resolve()).startswith(str(self.vipdoc_dir.resolve())):
+                    if not str(target_path.resolve()).startswith(vipdoc_root):
                         continue
-                    
-                    # 如果是目录，确保目录存在
+
                     if member.is_dir():
                         target_path.mkdir(parents=True, exist_ok=True)
                     else:
-                        # 确保父目录存在
-                        target_path.parent.mkdir(parents=True, exist_ok=True)
-                        # 如果文件已存在，先删除再解压（覆盖）
-                        if target_path.exists():
-                            target_path.unlink()
-                        # 解压文件
-                        with zip_ref.open(member) as src, open(target_path, 'wb') as dst:
-                            dst.write(src.read())
-            
-            logger.info(f"成功！数据已解压至: {self.vipdoc_dir}")
-            
+                        jobs.append((member, target_path))
+
+            # 先在主线程创建全部父目录，避免线程间竞争
+            for parent in {target_path.parent for _, target_path in jobs}:
+                parent.mkdir(parents=True, exist_ok=True)
+
+            workers = max(1, min(workers or UNZIP_WORKERS, len(jobs) or 1))
+
+            # 按线程交错分组，每个线程持有独立的 ZipFile 句柄
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_extract_members, zip_path, jobs[i::workers])
+                    for i in range(workers)
+                ]
+                for future in futures:
+                    self.changed_files.extend(future.result())
+
+            logger.info(
+                f"成功！数据已解压至: {self.vipdoc_dir} "
+                f"(更新 {len(self.changed_files)} 个文件，跳过 {len(jobs) - len(self.changed_files)} 个未变化文件)"
+            )
+
             # 删除原始 zip
             zip_path.unlink()
             logger.info("已删除临时 ZIP 文件")
-            
+
             return True
-            
+
         except Exception as e:
             logger.error(f"解压失败: {e}")
             return False
 
 
+def _file_crc32(path: Path) -> int:
+    """流式计算文件的 CRC32"""
+    crc = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(UNZIP_BUFFER_SIZE)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+    return crc & 0xFFFFFFFF
+
+
+def _is_unchanged(member: zipfile.ZipInfo, target_path: Path) -> bool:
+    """已有文件的大小和 CRC32 与 ZIP 记录一致时视为未变化"""
+    try:
+        if target_path.stat().st_size != member.file_size:
+            return False
+    except OSError:
+        return False
+
+    return _file_crc32(target_path) == member.CRC
+
+
+def _extract_members(zip_path: Path, jobs: List[Tuple[zipfile.ZipInfo, Path]]) -> List[Path]:
+    """
+    解压一组成员，返回实际写入的文件路径
+
+    Args:
+        zip_path: ZIP 文件路径
+        jobs: (成员信息, 目标路径) 列表
+
+    Returns:
+        List[Path]: 内容发生变化并被重写的文件
+    """
+    changed = []
+
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for member, target_path in jobs:
+            if _is_unchanged(member, target_path):
+                continue
+
+            # 写入同目录下的临时文件，完成后原子替换，读者不会看到半写的文件
+            with atomic_write(target_path, prefix=f'.{target_path.name}.') as tmp_path:
+                with zip_ref.open(member) as src, open(tmp_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, UNZIP_BUFFER_SIZE)
+
+            changed.append(target_path)
+
+    return changed
+
+
 def download_tdx_data(tdxdir: str, timeout: int = 300) -> bool:
     """
     便捷函数：下载 TDX 日线数据
@@ -0,0 +1,387 @@
+"""
+本地除权除息数据 (gbbq)
+
+通达信客户端把全市场的股本变迁和分红送配记录保存在 T0002/hq_cache/gbbq，
+一次解码即可得到所有股票的除权除息表，再结合本地日线收盘价计算前复权/后复权因子，
+复权不再需要逐只请求新浪接口。
+
+文件格式: 4 字节记录数，之后每条记录 29 字节
+(市场 u1, 代码 7s, 日期 u4, 类别 u1, 4 个 f4)，前 24 字节按 8 字节分组加密。
+加密使用 Blowfish 结构，密钥表 (18 个 P 盒 + 4 个 S 盒，共 4168 字节) 取自通达信客户端，
+不随本项目分发；通过 key 参数、环境变量 KITETDX_GBBQ_KEY 或 ~/.kitetdx/gbbq.key 指定。
+
+复权公式 (与通达信一致):
+
+    除权参考价 = (前收盘 - 分红 / 10 + 配股价 * 配股 / 10) / (1 + 送转股 / 10 + 配股 / 10)
+    当次复权系数 = 前收盘 / 除权参考价
+
+后复权因子为各次系数自上市起的累乘，前复权因子为最新累乘值除以后复权因子，
+与 fetch_fq_factor() 的格式相同 (前复权价格 = 价格 / 因子，后复权价格 = 价格 * 因子)。
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from mootdx.logger import logger
+from mootdx.utils import get_stock_market
+from kitetdx import metrics
+from kitetdx.utils import date_int_to_datetime64
+
+
+GBBQ_RECORD = np.dtype([
+    ('market', 'u1'), ('code', 'S7'), ('date', '<u4'), ('category', 'u1'),
+    ('value1', '<f4'), ('value2', '<f4'), ('value3', '<f4'), ('value4', '<f4'),
+])
+
+# 每条记录前 24 字节加密
+ENCRYPTED_SIZE = 24
+
+# 密钥表: P[0..17] + S[0..3][0..255]，均为 uint32
+KEY_SIZE = (18 + 4 * 256) * 4
+
+DEFAULT_KEY_PATH = Path.home() / '.kitetdx' / 'gbbq.key'
+
+MARKETS = {0: 'sz', 1: 'sh', 2: 'bj'}
+
+# 除权除息类别 (与 mootdx 的 xdxr 一致)
+CATEGORIES = {
+    1: '除权除息', 2: '送配股上市', 3: '非流通股上市', 4: '未知股本变动', 5: '股本变化',
+    6: '增发新股', 7: '股份回购', 8: '增发新股上市', 9: '转配股上市', 10: '可转债上市',
+    11: '扩缩股', 12: '非流通股缩股', 13: '送认购权证', 14: '送认沽权证',
+}
+
+XDXR_COLUMNS = [
+    'symbol', 'date', 'category', 'name',
+    'fenhong', 'peigujia', 'songzhuangu', 'peigu', 'suogu', 'xingquanjia', 'fenshu',
+    'panqianliutong', 'qianzongguben', 'panhouliutong', 'houzongguben',
+]
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_key(key: Union[bytes, str, Path, None] = None) -> np.ndarray:
+    """
+    读取 gbbq 密钥表
+
+    :param key: 密钥表内容或文件路径，默认依次查找环境变量 KITETDX_GBBQ_KEY 和 ~/.kitetdx/gbbq.key
+    :return: np.ndarray (uint32)
+    """
+    if key is None:
+        key = os.environ.get('KITETDX_GBBQ_KEY') or DEFAULT_KEY_PATH
+
+    if not isinstance(key, (bytes, bytearray)):
+        path = Path(key)
+        if not path.exists():
+            raise FileNotFoundError(f"未找到 gbbq 密钥表: {path}，可通过环境变量 KITETDX_GBBQ_KEY 指定")
+        key = path.read_bytes()
+
+    if len(key) < KEY_SIZE:
+        raise ValueError(f"gbbq 密钥表长度应至少为 {KEY_SIZE} 字节，实际 {len(key)} 字节")
+
+    return np.frombuffer(bytes(key[:KEY_SIZE]), dtype='<u4').astype(np.uint32)
+
+
+def feistel(x: np.ndarray, sbox: np.ndarray) -> np.ndarray:
+    """Blowfish 轮函数 F(x) = ((S0[a] + S1[b]) ^ S2[c]) + S3[d]"""
+    return ((sbox[0][x >> 24] + sbox[1][(x >> 16) & 0xff]) ^ sbox[2][(x >> 8) & 0xff]) + sbox[3][x & 0xff]
+
+
+def decrypt(blocks: np.ndarray, key: np.ndarray) -> np.ndarray:
+    """
+    批量解密 8 字节分组
+
+    :param blocks: (n, 2) uint32
+    :param key: load_key() 的返回值
+    :return: (n, 2) uint32
+    """
+    p, sbox = key[:18], key[18:].reshape(4, 256)
+    left, right = blocks[:, 0] ^ p[17], blocks[:, 1]
+
+    for i in range(16, 0, -1):
+        left, right = right ^ feistel(left, sbox) ^ p[i], left
+
+    return np.stack([right ^ p[0], left], axis=1)
+
+
+def encrypt(blocks: np.ndarray, key: np.ndarray) -> np.ndarray:
+    """批量加密 8 字节分组，decrypt() 的逆运算"""
+    p, sbox = key[:18], key[18:].reshape(4, 256)
+    right, left = blocks[:, 0] ^ p[0], blocks[:, 1]
+
+    for i in range(1, 17):
+        left, right = right, left ^ feistel(right, sbox) ^ p[i]
+
+    return np.stack([left ^ p[17], right], axis=1)
+
+
+def decode_records(content: bytes, key: np.ndarray) -> np.ndarray:
+    """
+    解码 gbbq 文件内容
+
+    :param content: 文件内容
+    :param key: load_key() 的返回值
+    :return: np.ndarray (GBBQ_RECORD)
+    """
+    count = int(np.frombuffer(content[:4], dtype='<u4')[0]) if len(content) >= 4 else 0
+    count = min(count, (len(content) - 4) // GBBQ_RECORD.itemsize)
+
+    raw = np.frombuffer(content, dtype=np.uint8, count=count * GBBQ_RECORD.itemsize, offset=4)
+    raw = raw.reshape(count, GBBQ_RECORD.itemsize).copy()
+
+    blocks = raw[:, :ENCRYPTED_SIZE].copy().view('<u4').reshape(-1, 2)
+    raw[:, :ENCRYPTED_SIZE] = decrypt(blocks, key).astype('<u4').view(np.uint8).reshape(count, ENCRYPTED_SIZE)
+
+    return raw.view(GBBQ_RECORD).reshape(count)
+
+
+def encode_records(records: np.ndarray, key: np.ndarray) -> bytes:
+    """GBBQ_RECORD 数组编码为 gbbq 文件内容，用于生成测试数据"""
+    raw = records.astype(GBBQ_RECORD).view(np.uint8).reshape(len(records), GBBQ_RECORD.itemsize).copy()
+
+    blocks = raw[:, :ENCRYPTED_SIZE].copy().view('<u4').reshape(-1, 2)
+    raw[:, :ENCRYPTED_SIZE] = encrypt(blocks, key).astype('<u4').view(np.uint8).reshape(len(records), ENCRYPTED_SIZE)
+
+    return np.uint32(len(records)).astype('<u4').tobytes() + raw.tobytes()
+
+
+def to_xdxr(records: np.ndarray) -> pd.DataFrame:
+    """
+    解码后的记录转换为除权除息表
+
+    各类别 4 个数值的含义不同：除权除息为分红、配股价、送转股、配股 (每 10 股)；
+    扩缩股为缩股比例；权证为行权价和份数；其余为前后流通盘和总股本 (万股)。
+
+    :param records: np.ndarray (GBBQ_RECORD)
+    :return: pd.DataFrame，按 symbol, date 排序
+    """
+    markets = np.array([MARKETS.get(m, '') for m in range(256)], dtype=object)
+    codes = records['code'].astype(str)
+    category = records['category'].astype(np.int64)
+    values = [records[f'value{i}'].astype(np.float64) for i in range(1, 5)]
+
+    def pick(mask, value):
+        return np.where(mask, value, np.nan)
+
+    bonus = category == 1
+    scale = np.isin(category, (11, 12))
+    warrant = np.isin(category, (13, 14))
+    capital = ~(bonus | scale | warrant)
+
+    df = pd.DataFrame({
+        'symbol': markets[records['market']] + codes.astype(object),
+        'date': records['date'].astype(np.int64),
+        'category': category,
+        'name': pd.Series(category).map(CATEGORIES).to_numpy(),
+        'fenhong': pick(bonus, values[0]),
+        'peigujia': pick(bonus, values[1]),
+        'songzhuangu': pick(bonus, values[2]),
+        'peigu': pick(bonus, values[3]),
+        'suogu': pick(scale, values[2]),
+        'xingquanjia': pick(warrant, values[0]),
+        'fenshu': pick(warrant, values[2]),
+        'panqianliutong': pick(capital, values[0]),
+        'qianzongguben': pick(capital, values[1]),
+        'panhouliutong': pick(capital, values[2]),
+        'houzongguben': pick(capital, values[3]),
+    }, columns=XDXR_COLUMNS)
+
+    return df.sort_values(['symbol', 'date'], kind='stable').reset_index(drop=True)
+
+
+def read_gbbq(filename, key=None) -> pd.DataFrame:
+    """
+    读取 gbbq 文件
+
+    :param filename: gbbq 文件路径
+    :param key: 密钥表内容或文件路径，见 load_key()
+    :return: pd.DataFrame 全市场除权除息表
+    """
+    content = Path(filename).read_bytes()
+    return to_xdxr(decode_records(content, load_key(key)))
+
+
+def adjust_ratios(events, dates: np.ndarray, closes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算每个除权日的复权系数 (前收盘 / 除权参考价)
+
+    :param events: 单只股票的除权除息记录 (category == 1)，包含 date, fenhong, peigujia, songzhuangu, peigu 列，
+                   可以是 pd.DataFrame 或结构化数组，缺失值按 0 处理
+    :param dates: 日线日期 (YYYYMMDD 升序)
+    :param closes: 日线收盘价
+    :return: (除权日 YYYYMMDD, 复权系数)，同一天多条记录的系数相乘
+    """
+    ex_dates = np.asarray(events['date'], dtype=np.int64)
+    dates = np.asarray(dates, dtype=np.int64)
+
+    # 前收盘为除权日前一根 K 线的收盘价；上市前和本地数据之后的事件忽略
+    pos = np.searchsorted(dates, ex_dates)
+    valid = (pos > 0) & (ex_dates <= (dates[-1] if len(dates) else 0))
+
+    cash, price, bonus, rights = (np.nan_to_num(np.asarray(events[col], dtype=np.float64)[valid])
+                                  for col in ('fenhong', 'peigujia', 'songzhuangu', 'peigu'))
+    ex_dates, preclose = ex_dates[valid], np.asarray(closes, dtype=np.float64)[pos[valid] - 1]
+
+    reference = (preclose - cash / 10 + price * rights / 10) / (1 + bonus / 10 + rights / 10)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = np.where(reference > 0, preclose / reference, 1.0)
+
+    if not len(ex_dates):
+        return ex_dates, ratios
+
+    order = np.argsort(ex_dates, kind='stable')
+    ex_dates, ratios = ex_dates[order], ratios[order]
+    starts = np.flatnonzero(np.r_[True, ex_dates[1:] != ex_dates[:-1]])
+
+    return ex_dates[starts], np.multiply.reduceat(ratios, starts)
+
+
+def compute_factors(events, dates: np.ndarray, closes: np.ndarray, method='qfq') -> pd.DataFrame:
+    """
+    计算复权因子
+
+    :param events: 单只股票的除权除息记录，见 adjust_ratios()
+    :param dates: 日线日期 (YYYYMMDD 升序)
+    :param closes: 日线收盘价 (不复权)
+    :param method: 'qfq' 前复权或 'hfq' 后复权
+    :return: pd.DataFrame (索引 date，列 factor)，与 fetch_fq_factor() 格式相同
+    """
+    if method not in ('qfq', 'hfq'):
+        raise ValueError(f"不支持的复权方式: {method}")
+
+    ex_dates, ratios = adjust_ratios(events, dates, closes)
+
+    # 第一根 K 线起因子为 1，之后每个除权日累乘
+    start = np.asarray(dates[:1], dtype=np.int64)
+    points = np.r_[start, ex_dates]
+    hfq = np.r_[np.ones(len(start)), np.cumprod(ratios)]
+
+    if method == 'qfq' and len(hfq):
+        factor = hfq[-1] / hfq
+    else:
+        factor = hfq
+
+    index = pd.DatetimeIndex(date_int_to_datetime64(points).astype('M8[ns]'), name='date')
+    return pd.DataFrame({'factor': factor}, index=index)
+
+
+class Gbbq(object):
+    """
+    全市场除权除息表，按股票索引
+    """
+
+    def __init__(self, xdxr: pd.DataFrame):
+        """
+        构造函数
+
+        :param xdxr: to_xdxr() / read_gbbq() 的返回值 (按 symbol, date 排序)
+        """
+        self.table = xdxr
+        self._slices = self.group_slices(xdxr['symbol'].to_numpy())
+
+        # 复权只用到除权除息记录，预先转换为 numpy 数组，计算因子时不再经过 pandas
+        bonus = xdxr[xdxr['category'] == 1]
+        self._events = {col: bonus[col].to_numpy() for col in ('date', 'fenhong', 'peigujia', 'songzhuangu', 'peigu')}
+        self._event_slices = self.group_slices(bonus['symbol'].to_numpy())
+
+    @staticmethod
+    def group_slices(symbols: np.ndarray) -> dict:
+        """已排序的代码数组按代码分段，返回 {代码: slice}"""
+        if not len(symbols):
+            return {}
+
+        starts = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1]])
+        ends = np.r_[starts[1:], len(symbols)]
+        return {symbols[s]: slice(s, e) for s, e in zip(starts, ends)}
+
+    @classmethod
+    def from_file(cls, filename, key=None) -> 'Gbbq':
+        return cls(read_gbbq(filename, key=key))
+
+    @staticmethod
+    def to_symbol(symbol: str) -> str:
+        """'600000' / 'sh600000' 统一为 'sh600000'"""
+        symbol = str(symbol).strip().lower()
+        return symbol if symbol[:2] in ('sh', 'sz', 'bj') else f'{get_stock_market(symbol, True)}{symbol}'
+
+    @property
+    def symbols(self) -> list:
+        return list(self._slices)
+
+    def xdxr(self, symbol: str) -> pd.DataFrame:
+        """
+        单只股票的除权除息记录
+
+        :param symbol: 股票代码
+        :return: pd.DataFrame，没有记录时为空
+        """
+        part = self._slices.get(self.to_symbol(symbol))
+        if part is None:
+            return self.table.iloc[:0]
+        return self.table.iloc[part].reset_index(drop=True)
+
+    def events(self, symbol: str) -> dict:
+        """
+        单只股票的除权除息 (category == 1) 记录
+
+        :param symbol: 股票代码
+        :return: dict {列名: np.ndarray}
+        """
+        part = self._event_slices.get(self.to_symbol(symbol), slice(0, 0))
+        return {col: values[part] for col, values in self._events.items()}
+
+    def factors(self, symbol: str, dates: np.ndarray, closes: np.ndarray, method='qfq') -> pd.DataFrame:
+        """
+        单只股票的复权因子
+
+        :param symbol: 股票代码
+        :param dates: 日线日期 (YYYYMMDD 升序)
+        :param closes: 日线收盘价 (不复权)
+        :param method: 'qfq' 或 'hfq'
+        :return: pd.DataFrame (索引 date，列 factor)
+        """
+        return compute_factors(self.events(symbol), dates, closes, method=method)
+
+
+def gbbq_path(tdxdir) -> Path:
+    return Path(tdxdir) / 'T0002' / 'hq_cache' / 'gbbq'
+
+
+@metrics.timed('gbbq.load')
+def get_gbbq(tdxdir, key=None) -> Optional[Gbbq]:
+    """
+    获取通达信目录对应的除权除息表
+
+    结果按文件大小和修改时间缓存，客户端更新 gbbq 后自动重新解码。
+
+    :param tdxdir: 通达信数据目录
+    :param key: 密钥表内容或文件路径，见 load_key()
+    :return: Gbbq，没有 gbbq 文件时为 None
+    """
+    path = gbbq_path(tdxdir)
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        logger.debug(f"未找到 {path}")
+        return None
+
+    signature = (stat.st_size, stat.st_mtime_ns)
+
+    with _cache_lock:
+        cached = _cache.get(str(path))
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    gbbq = Gbbq.from_file(path, key=key)
+
+    with _cache_lock:
+        _cache[str(path)] = (signature, gbbq)
+
+    return gbbq
@@ -0,0 +1,152 @@
+"""
+本地优先的混合读取
+
+日线优先从本地 vipdoc 文件读取，只有文件的最后一根 K 线早于目标交易日时，
+才从行情服务器获取缺失的尾部并追加到本地文件，之后的读取都是纯本地读取。
+"""
+
+import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from mootdx.logger import logger
+from kitetdx.reader import StdReader, get_target_trading_day
+from kitetdx.records import read_daily, read_last_daily
+from kitetdx.updater import FETCH_PADDING, DeltaUpdater, to_date_int
+from kitetdx.utils import date_int_to_datetime64, normalize_adjust, to_data
+
+
+class HybridReader(StdReader):
+    """本地日线 + 在线补齐"""
+
+    def __init__(self, tdxdir=None, client=None, **kwargs):
+        """
+        构造函数
+
+        :param tdxdir: 通达信数据目录
+        :param client: mootdx 行情客户端，默认在首次需要补齐时创建
+        :param kwargs: StdReader 的其他参数，如 fq_source='gbbq'
+        """
+        super().__init__(tdxdir=tdxdir, **kwargs)
+
+        self._client = client
+        self._updater = None
+        # {文件路径: 已补齐到的目标交易日}，避免停牌证券每次读取都访问服务器
+        self._synced = {}
+
+    @property
+    def updater(self) -> DeltaUpdater:
+        """Lazy-created 增量更新器"""
+        if self._updater is None:
+            self._updater = DeltaUpdater(self.tdxdir, client=self._client, calendar=self.calendar)
+        return self._updater
+
+    def sync(self, path, target_date: datetime.date = None) -> int:
+        """
+        将单个日线文件补齐到目标交易日，并把新 K 线写入本地文件
+
+        :param path: .day 文件路径
+        :param target_date: 目标交易日，默认为当前应具备数据的最近交易日 (盘中为上一交易日)
+        :return: int 追加的 K 线数量
+        """
+        path = Path(path)
+        target_date = target_date or get_target_trading_day(self.calendar)
+
+        if self._synced.get(path) == target_date:
+            return 0
+
+        last = read_last_daily(path)
+        if last is not None and last['date'] >= to_date_int(target_date):
+            self._synced[path] = target_date
+            return 0
+
+        try:
+            appended = self.updater.update_file(path, target_date)
+        except Exception as e:
+            logger.warning(f"在线补齐 {path.stem} 失败，使用本地数据: {e}")
+            return 0
+
+        self._synced[path] = target_date
+
+        if appended and self._manifest is not None:
+            self.manifest.update([path])
+
+        logger.debug(f"{path.stem} 在线补齐 {appended} 根 K 线")
+        return appended
+
+    def live_bars(self, path) -> pd.DataFrame:
+        """
+        获取晚于本地最后日期的在线 K 线 (盘中未完成的当日 K 线)，不写入本地文件
+
+        :param path: .day 文件路径
+        :return: pd.DataFrame，格式与本地日线一致
+        """
+        path = Path(path)
+        last = read_last_daily(path)
+
+        try:
+            bars = pd.DataFrame(self.updater.fetch_bars(path, FETCH_PADDING))
+        except Exception as e:
+            logger.warning(f"获取 {path.stem} 实时 K 线失败: {e}")
+            return pd.DataFrame()
+
+        if bars.empty:
+            return bars
+
+        bars['date'] = bars['year'] * 10000 + bars['month'] * 100 + bars['day']
+
+        if last is not None:
+            bars = bars[bars['date'] > last['date']]
+
+        index = pd.DatetimeIndex(date_int_to_datetime64(bars['date']).astype('M8[ns]'), name='date')
+
+        return pd.DataFrame({
+            'open': bars['open'].to_numpy(),
+            'high': bars['high'].to_numpy(),
+            'low': bars['low'].to_numpy(),
+            'close': bars['close'].to_numpy(),
+            'amount': bars['amount'].to_numpy(),
+            'volume': bars['vol'].to_numpy(),
+        }, index=index)
+
+    def daily(self, symbol=None, live=False, columns=None, dtype=None, **kwargs):
+        """
+        获取日线数据，本地缺失的尾部自动从服务器补齐并缓存到本地
+
+        :param symbol: 证券代码
+        :param live: 是否附加盘中未完成的当日 K 线 (只在内存中附加，不写入本地)
+        :param columns: 只读取的列，默认全部
+        :param dtype: 数值列的数据类型，如 'float32'
+        :param kwargs: 其他参数，如 adjust='qfq'
+        :return: pd.DataFrame or None
+        """
+        symbol = Path(symbol).stem
+        path = self.find_path(symbol=symbol, subdir='lday', suffix='day')
+
+        if path is None:
+            logger.warning(f"未找到 {symbol} 的日线数据文件，无法确定需要补齐的范围")
+            return None
+
+        self.sync(path)
+
+        # 直接解码本地文件，与实时 K 线拼接后只整理一次
+        result = read_daily(path, columns=columns, dtype=dtype or 'float64')
+        if result is not None and result.empty:
+            result = None
+
+        if live:
+            bars = self.live_bars(path)
+            if not bars.empty:
+                bars = bars[list(columns)] if columns else bars
+                result = bars if result is None else pd.concat([result, bars[result.columns]])
+
+        if result is None:
+            logger.warning(f"读取 {symbol} 日线数据为空")
+            return None
+
+        if self.fq_source == 'gbbq' and normalize_adjust(kwargs.get('adjust')) and 'factors' not in kwargs:
+            kwargs['factors'] = self.fq_factor(symbol, normalize_adjust(kwargs['adjust']), bars=result)
+
+        result = to_data(result, symbol=symbol, **kwargs)
+        return result.astype(dtype) if dtype else result
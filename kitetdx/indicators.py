@@ -0,0 +1,496 @@
+"""
+面板技术指标
+
+对 reader.panel() / SharedPanel 得到的 (日期 × 证券) 矩阵按列一次性计算 MA/EMA/MACD/RSI/ATR/BOLL，
+不再逐只证券调用 pandas rolling；计算后保留递推状态，新交易日只需 update() 追加一行，不必重算全部历史。
+
+约定 (与通达信公式一致):
+- MA(N): 最近 N 个有效值的算术平均
+- EMA(N): 平滑系数 2 / (N + 1)，以第一个有效值为初值
+- MACD(S, L, M): DIF = EMA(C, S) - EMA(C, L)，DEA = EMA(DIF, M)，MACD = 2 * (DIF - DEA)
+- RSI(N): SMA(MAX(C - LC, 0), N, 1) / SMA(ABS(C - LC), N, 1) * 100
+- ATR(N): MA(MAX(H - L, ABS(H - LC), ABS(L - LC)), N)
+- BOLL(N, K): MID = MA(C, N)，UPPER/LOWER = MID ± K * STD(C, N) (样本标准差)
+
+停牌、未上市等缺失的交易日 (NaN) 不参与计算，当天输出 NaN，递推状态保持不变，
+结果与对每只证券去掉缺失日后单独计算相同。
+
+MA/ATR/BOLL 用累加和整列计算；EMA/MACD/RSI 是递推指标，按日期逐行计算，每一行对全部证券向量化，
+Python 循环次数等于交易日数 (与证券数量无关)。对宽面板而言，这比把递推展开为累加和的整列计算更快
+(后者需要多遍扫描整个矩阵)。
+
+用法::
+
+    from kitetdx.indicators import IndicatorEngine
+
+    engine = IndicatorEngine(ma=(5, 20), rsi=(14,))
+    result = engine.compute(reader.panel(symbols, fields=['high', 'low', 'close'], adjust='qfq'))
+    result['ma5']                       # pd.DataFrame (日期 × 证券)
+
+    row = engine.update({'high': high, 'low': low, 'close': close}, date='2024-10-11')
+    row['ma5']                          # pd.Series (证券)，新交易日的指标值
+"""
+
+from typing import Dict, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+
+def compact(values: np.ndarray) -> tuple:
+    """
+    把每列的有效值按原顺序移到列首，缺失值移到列尾
+
+    :param values: (日期 × 证券) 矩阵
+    :return: (压缩后的矩阵, 布局 (没有缺失值时为 None), 每列有效值个数)
+    """
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+
+    if counts.min(initial=len(values)) == len(values):
+        return values, None, counts
+
+    # 按列 (转置后按行) 做布尔索引，不需要排序
+    head = np.arange(len(values))[:, None] < counts
+    compacted = np.full(values.shape, np.nan)
+    compacted.T[head.T] = values.T[valid.T]
+    return compacted, (valid, head), counts
+
+
+def expand(compacted: np.ndarray, layout, values: np.ndarray) -> np.ndarray:
+    """compact() 的逆操作，原矩阵中缺失的位置输出 NaN"""
+    if layout is None:
+        return compacted
+
+    valid, head = layout
+    result = np.full(values.shape, np.nan)
+    result.T[valid.T] = compacted.T[head.T]
+    return result
+
+
+def last_valid(compacted: np.ndarray, counts: np.ndarray, window: int) -> np.ndarray:
+    """
+    每列最近 window 个有效值
+
+    :return: (window × 证券) 矩阵，有效值不足时前面补 NaN
+    """
+    if not len(compacted):
+        return np.full((window, compacted.shape[1]), np.nan)
+
+    rows = counts[None, :] - window + np.arange(window)[:, None]
+    tail = np.take_along_axis(compacted, np.clip(rows, 0, len(compacted) - 1), axis=0)
+    tail[rows < 0] = np.nan
+    return tail
+
+
+def window_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """按列计算长度为 window 的滑动和，返回 len(values) - window + 1 行"""
+    total = np.cumsum(values, axis=0)
+    result = total[window - 1:].copy()
+    result[1:] -= total[:-window]
+    return result
+
+
+class Rolling(object):
+    """
+    最近 window 个有效值的滑动均值和标准差
+    """
+
+    def __init__(self, window: int, std=False):
+        if window < 1:
+            raise ValueError(f"窗口长度必须为正整数: {window}")
+
+        self.window = window
+        self.std = std
+        self.tail = None
+
+    def compute(self, values: np.ndarray) -> tuple:
+        """
+        :param values: (日期 × 证券) 矩阵
+        :return: (均值矩阵, 标准差矩阵或 None)
+        """
+        window = self.window
+        compacted, layout, counts = compact(values)
+        self.tail = last_valid(compacted, counts, window)
+
+        mean = np.full(values.shape, np.nan)
+        dev = np.full(values.shape, np.nan) if self.std else None
+
+        if len(values) >= window:
+            # 减去每列第一个有效值再累加，降低累加和相减时的精度损失
+            base = compacted[:1]
+            shifted = compacted - base
+            s1 = window_sum(shifted, window)
+            mean[window - 1:] = s1 / window + base
+
+            if self.std and window > 1:
+                s2 = window_sum(shifted * shifted, window)
+                dev[window - 1:] = np.sqrt(np.maximum(s2 - s1 * s1 / window, 0) / (window - 1))
+
+        mean = expand(mean, layout, values)
+        return mean, expand(dev, layout, values) if self.std else None
+
+    def update(self, values: np.ndarray) -> tuple:
+        """
+        :param values: 新交易日的值 (证券)
+        :return: (均值, 标准差或 None)
+        """
+        valid = ~np.isnan(values)
+        self.tail[:-1, valid] = self.tail[1:, valid]
+        self.tail[-1, valid] = values[valid]
+
+        mean = self.tail.mean(axis=0)
+        mean[~valid] = np.nan
+
+        if not self.std:
+            return mean, None
+
+        dev = self.tail.std(axis=0, ddof=1) if self.window > 1 else np.full(len(values), np.nan)
+        dev[~valid] = np.nan
+        return mean, dev
+
+
+class Smoothing(object):
+    """
+    指数平滑 Y = alpha * X + (1 - alpha) * Y'，以第一个有效值为初值
+    """
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.state = None
+
+    def reset(self, size: int):
+        self.state = np.full(size, np.nan)
+
+    def step(self, values: np.ndarray) -> np.ndarray:
+        missing = np.isnan(values)
+        smoothed = self.alpha * values + (1 - self.alpha) * self.state
+        self.state = np.where(missing, self.state, np.where(np.isnan(self.state), values, smoothed))
+        return np.where(missing, np.nan, self.state)
+
+
+class Indicator(object):
+    """
+    指标基类
+
+    compute() 计算全部历史并保存递推状态，update() 用保存的状态计算新交易日的值。
+    递推类指标只需实现 reset() 和 step()。
+    """
+
+    fields = ('close',)
+    names = ()
+
+    def compute(self, data: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        按日期逐行调用 step()，每行对全部证券向量化计算
+
+        :param data: {字段: (日期 × 证券) 矩阵}
+        :return: {指标名: (日期 × 证券) 矩阵}
+        """
+        rows, size = data[self.fields[0]].shape
+        self.reset(size)
+        result = {name: np.empty((rows, size)) for name in self.names}
+
+        for i in range(rows):
+            for name, values in self.step({field: data[field][i] for field in self.fields}).items():
+                result[name][i] = values
+
+        return result
+
+    def update(self, bar: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        :param bar: {字段: 新交易日的值 (证券)}
+        :return: {指标名: 新交易日的指标值 (证券)}
+        """
+        return self.step(bar)
+
+    def reset(self, size: int):
+        raise NotImplementedError
+
+    def step(self, bar: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+
+class MA(Indicator):
+    def __init__(self, window=5):
+        self.window = window
+        self.names = (f'ma{window}',)
+        self.rolling = Rolling(window)
+
+    def compute(self, data):
+        return {self.names[0]: self.rolling.compute(data['close'])[0]}
+
+    def update(self, bar):
+        return {self.names[0]: self.rolling.update(bar['close'])[0]}
+
+
+class EMA(Indicator):
+    def __init__(self, span=12):
+        self.span = span
+        self.names = (f'ema{span}',)
+        self.smoothing = Smoothing(2 / (span + 1))
+
+    def reset(self, size):
+        self.smoothing.reset(size)
+
+    def step(self, bar):
+        return {self.names[0]: self.smoothing.step(bar['close'])}
+
+
+class MACD(Indicator):
+    names = ('dif', 'dea', 'macd')
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = Smoothing(2 / (fast + 1))
+        self.slow = Smoothing(2 / (slow + 1))
+        self.signal = Smoothing(2 / (signal + 1))
+
+    def reset(self, size):
+        for smoothing in (self.fast, self.slow, self.signal):
+            smoothing.reset(size)
+
+    def step(self, bar):
+        dif = self.fast.step(bar['close']) - self.slow.step(bar['close'])
+        dea = self.signal.step(dif)
+        return {'dif': dif, 'dea': dea, 'macd': 2 * (dif - dea)}
+
+
+class RSI(Indicator):
+    def __init__(self, window=14):
+        self.window = window
+        self.names = (f'rsi{window}',)
+        self.gain = Smoothing(1 / window)
+        self.change = Smoothing(1 / window)
+        self.prev = None
+
+    def reset(self, size):
+        self.gain.reset(size)
+        self.change.reset(size)
+        self.prev = np.full(size, np.nan)
+
+    def step(self, bar):
+        close = bar['close']
+        diff = close - self.prev
+        self.prev = np.where(np.isnan(close), self.prev, close)
+
+        gain = self.gain.step(np.maximum(diff, 0))
+        change = self.change.step(np.abs(diff))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {self.names[0]: gain / change * 100}
+
+
+class ATR(Indicator):
+    fields = ('high', 'low', 'close')
+
+    def __init__(self, window=14):
+        self.window = window
+        self.names = (f'atr{window}',)
+        self.rolling = Rolling(window)
+        self.prev = None
+
+    @staticmethod
+    def true_range(high, low, prev):
+        # fmax 忽略 NaN，第一根 K 线没有前收盘时真实波幅为 H - L
+        return np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+
+    def compute(self, data):
+        close = data['close']
+        compacted, layout, counts = compact(close)
+
+        prev = np.full(close.shape, np.nan)
+        prev[1:] = compacted[:-1]
+        tr = self.true_range(data['high'], data['low'], expand(prev, layout, close))
+        tr[np.isnan(close)] = np.nan
+
+        self.prev = last_valid(compacted, counts, 1)[0]
+        return {self.names[0]: self.rolling.compute(tr)[0]}
+
+    def update(self, bar):
+        close = bar['close']
+        tr = self.true_range(bar['high'], bar['low'], self.prev)
+        tr[np.isnan(close)] = np.nan
+        self.prev = np.where(np.isnan(close), self.prev, close)
+        return {self.names[0]: self.rolling.update(tr)[0]}
+
+
+class BOLL(Indicator):
+    names = ('boll', 'boll_upper', 'boll_lower')
+
+    def __init__(self, window=20, width=2):
+        self.window = window
+        self.width = width
+        self.rolling = Rolling(window, std=True)
+
+    def bands(self, mid, dev):
+        return {'boll': mid, 'boll_upper': mid + self.width * dev, 'boll_lower': mid - self.width * dev}
+
+    def compute(self, data):
+        return self.bands(*self.rolling.compute(data['close']))
+
+    def update(self, bar):
+        return self.bands(*self.rolling.update(bar['close']))
+
+
+def last_index_date(index):
+    """
+    面板最后一个交易日，只识别 DatetimeIndex 和 YYYYMMDD 整数日期，其他索引返回 None
+
+    :param index: 面板的行索引
+    :return: pd.Timestamp or None
+    """
+    if index is None or not len(index):
+        return None
+
+    if isinstance(index, pd.DatetimeIndex):
+        return index[-1]
+
+    if pd.api.types.is_integer_dtype(index) and 19000101 <= index[-1] <= 99991231:
+        return pd.Timestamp(str(index[-1]))
+
+    return None
+
+
+def as_tuple(value) -> tuple:
+    if value is None or value is False:
+        return ()
+    return tuple(value) if isinstance(value, (list, tuple)) else (value,)
+
+
+class IndicatorEngine(object):
+    """
+    面板技术指标引擎
+    """
+
+    def __init__(self, ma: Iterable[int] = (5, 10, 20, 60), ema: Iterable[int] = (), macd=(12, 26, 9),
+                 rsi: Iterable[int] = (6, 12, 24), atr: Iterable[int] = (14,), boll=(20, 2)):
+        """
+        构造函数，参数为 None 或空时不计算该指标
+
+        :param ma: MA 窗口，如 (5, 10, 20)
+        :param ema: EMA 周期
+        :param macd: (短周期, 长周期, DEA 周期)
+        :param rsi: RSI 周期
+        :param atr: ATR 周期
+        :param boll: (周期, 标准差倍数)
+        """
+        self.indicators = [MA(n) for n in as_tuple(ma)] + [EMA(n) for n in as_tuple(ema)]
+
+        if macd:
+            self.indicators.append(MACD(*macd))
+
+        self.indicators += [RSI(n) for n in as_tuple(rsi)] + [ATR(n) for n in as_tuple(atr)]
+
+        if boll:
+            self.indicators.append(BOLL(*boll))
+
+        names = [name for indicator in self.indicators for name in indicator.names]
+        if len(set(names)) != len(names):
+            raise ValueError(f"指标名称重复: {names}")
+
+        self.symbols = None
+        self.last_date = None
+        self.size = None
+
+    @property
+    def fields(self) -> tuple:
+        """计算所需的行情字段"""
+        return tuple(dict.fromkeys(field for indicator in self.indicators for field in indicator.fields))
+
+    @property
+    def names(self) -> tuple:
+        """输出的指标名称"""
+        return tuple(name for indicator in self.indicators for name in indicator.names)
+
+    def compute(self, panel) -> dict:
+        """
+        计算全部历史，并保存递推状态供 update() 使用
+
+        :param panel: reader.panel() 的结果 {字段: pd.DataFrame}、SharedPanel 或 {字段: np.ndarray}
+        :return: {指标名: pd.DataFrame (日期 × 证券)}，输入为 np.ndarray 时为 np.ndarray
+        """
+        index, symbols = None, None
+
+        if hasattr(panel, 'array'):
+            # SharedPanel: 直接使用共享内存中的矩阵
+            data = {field: np.asarray(panel.array(field), dtype=np.float64) for field in self.fields}
+            index, symbols = panel.index, list(panel.symbols)
+        else:
+            first = panel[self.fields[0]]
+            if isinstance(first, pd.DataFrame):
+                index, symbols = first.index, list(first.columns)
+                data = {field: panel[field].reindex(index=index, columns=symbols).to_numpy(dtype=np.float64)
+                        for field in self.fields}
+            else:
+                data = {field: np.asarray(panel[field], dtype=np.float64) for field in self.fields}
+
+        shape = data[self.fields[0]].shape
+        if any(values.ndim != 2 or values.shape != shape for values in data.values()):
+            raise ValueError(f"面板字段的形状不一致: { {field: values.shape for field, values in data.items()} }")
+
+        self.symbols = symbols
+        self.size = shape[1]
+        self.last_date = last_index_date(index)
+
+        result = {}
+        for indicator in self.indicators:
+            result.update(indicator.compute(data))
+
+        if index is None:
+            return result
+
+        return {name: pd.DataFrame(values, index=index, columns=symbols) for name, values in result.items()}
+
+    def row(self, bar, field: str) -> np.ndarray:
+        values = bar[field]
+
+        if isinstance(values, pd.Series) and self.symbols is not None:
+            values = values.reindex(self.symbols)
+
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != (self.size,):
+            raise ValueError(f"{field} 的长度应为 {self.size}，实际为 {values.shape}")
+
+        return values
+
+    def update(self, bar, date=None) -> dict:
+        """
+        追加一个新交易日，只用保存的递推状态计算，不重算历史
+
+        :param bar: {字段: pd.Series (按证券代码对齐) 或 np.ndarray}，或行为证券、列为字段的 pd.DataFrame；
+                    停牌的证券为 NaN (或不在 Series 中)
+        :param date: 交易日，用于检查不会重复追加同一天
+        :return: {指标名: pd.Series (证券)}，compute() 的输入为 np.ndarray 时为 np.ndarray
+        """
+        if self.size is None:
+            raise RuntimeError("请先调用 compute() 计算历史")
+
+        if date is not None:
+            date = pd.Timestamp(str(date))
+            if self.last_date is not None and date <= self.last_date:
+                raise ValueError(f"{date.date()} 不晚于已计算的最后交易日 {self.last_date.date()}")
+
+        data = {field: self.row(bar, field) for field in self.fields}
+
+        result = {}
+        for indicator in self.indicators:
+            result.update(indicator.update(data))
+
+        if date is not None:
+            self.last_date = date
+
+        if self.symbols is None:
+            return result
+
+        return {name: pd.Series(values, index=self.symbols, name=date) for name, values in result.items()}
+
+
+def compute(panel, **kwargs) -> dict:
+    """
+    计算面板技术指标
+
+    :param panel: reader.panel() 的结果、SharedPanel 或 {字段: np.ndarray}
+    :param kwargs: IndicatorEngine 的参数，如 ma=(5, 20), macd=None
+    :return: {指标名: pd.DataFrame (日期 × 证券)}
+    """
+    return IndicatorEngine(**kwargs).compute(panel)
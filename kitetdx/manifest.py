@@ -0,0 +1,200 @@
+"""
+日线数据新鲜度清单
+
+记录每个 .day 文件的最后一根 K 线日期、记录数、文件大小和修改时间，
+只在文件大小或修改时间变化时重新读取该文件的最后一条记录。
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from mootdx.logger import logger
+from kitetdx.records import DAY_RECORD_SIZE, read_last_daily
+from kitetdx.calendar import get_calendar
+from kitetdx.updater import DELTA_MAX_SESSIONS, from_date_int, iter_daily_files, to_date_int
+from kitetdx.utils import atomic_write
+
+
+MANIFEST_FILENAME = '.kitetdx_manifest.json'
+MANIFEST_VERSION = 1
+
+MANIFEST_COLUMNS = ['last_date', 'count', 'size', 'mtime']
+
+
+class Manifest(object):
+    """
+    日线文件清单
+
+    entries: {symbol: {'last_date': YYYYMMDD, 'count': 记录数, 'size': 字节数, 'mtime': 修改时间(ns)}}
+    """
+
+    def __init__(self, tdxdir, path=None):
+        """
+        构造函数
+
+        :param tdxdir: 通达信数据目录
+        :param path: 清单文件路径，默认 {tdxdir}/vipdoc/.kitetdx_manifest.json
+        """
+        self.tdxdir = tdxdir
+        self.path = Path(path) if path else Path(tdxdir) / 'vipdoc' / MANIFEST_FILENAME
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        """从磁盘加载清单，文件缺失或损坏时从空清单开始"""
+        self.entries = {}
+
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('entries', {})
+        except Exception as e:
+            logger.warning(f"加载数据清单失败，将重新生成: {e}")
+
+    def save(self):
+        """写入临时文件后原子替换"""
+        with atomic_write(self.path) as tmp_path, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f)
+
+    def _update_entry(self, path: Path) -> bool:
+        """
+        更新单个文件的清单记录
+
+        :return: bool 记录是否发生变化
+        """
+        symbol = path.stem.lower()
+
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return self.entries.pop(symbol, None) is not None
+
+        entry = self.entries.get(symbol)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            return False
+
+        last = read_last_daily(path)
+        self.entries[symbol] = {
+            'last_date': int(last['date']) if last is not None else 0,
+            'count': stat.st_size // DAY_RECORD_SIZE,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+        }
+        return True
+
+    def update(self, paths: Iterable, save=True) -> List[str]:
+        """
+        增量更新指定文件的记录
+
+        :param paths: .day 文件路径列表 (如解压或增量更新后变化的文件)
+        :param save: 是否写回磁盘
+        :return: list[str] 发生变化的代码
+        """
+        changed = [Path(p).stem.lower() for p in paths if str(p).endswith('.day') and self._update_entry(Path(p))]
+
+        if changed and save:
+            self.save()
+
+        return changed
+
+    def refresh(self, save=True) -> List[str]:
+        """
+        扫描全部日线文件，只重新读取大小或修改时间变化的文件
+
+        :param save: 是否写回磁盘
+        :return: list[str] 发生变化 (新增、修改、删除) 的代码
+        """
+        paths = list(iter_daily_files(self.tdxdir))
+        changed = self.update(paths, save=False)
+
+        existing = {p.stem.lower() for p in paths}
+        removed = [symbol for symbol in self.entries if symbol not in existing]
+        for symbol in removed:
+            del self.entries[symbol]
+
+        changed += removed
+
+        if changed and save:
+            self.save()
+
+        return changed
+
+    def latest_date(self):
+        """
+        全部文件中最新的 K 线日期，即本地数据整体达到的日期
+
+        :return: datetime.date or None
+        """
+        dates = [entry['last_date'] for entry in self.entries.values() if entry['last_date']]
+        return from_date_int(max(dates)) if dates else None
+
+    def data_date(self, calendar=None, max_lag: int = DELTA_MAX_SESSIONS):
+        """
+        仍在交易的证券中最早的最后 K 线日期，即全部证券都已达到的日期
+
+        以全部文件最后日期的中位数为基准，落后基准超过 max_lag 个交易日的文件视为已退市，不参与判断。
+        个别文件较新 (如单独刷新过的上证指数) 不会掩盖其余文件的落后。
+
+        :param calendar: 交易日历，默认由本地上证指数推导
+        :param max_lag: 视为仍在交易的最大落后交易日数
+        :return: datetime.date or None
+        """
+        dates = np.array([entry['last_date'] for entry in self.entries.values() if entry['last_date']],
+                         dtype=np.int64)
+        if not len(dates):
+            return None
+
+        calendar = calendar if calendar is not None else get_calendar(self.tdxdir)
+        median = int(np.sort(dates)[len(dates) // 2])
+        active = dates[calendar.count(dates, np.full(len(dates), median)) <= max_lag]
+
+        return from_date_int(int(active.min()))
+
+    def last_date(self, symbol: str):
+        """
+        指定代码的最后一根 K 线日期
+
+        :param symbol: 带市场前缀的代码，如 'sh600000'
+        :return: datetime.date or None
+        """
+        entry = self.entries.get(symbol.lower())
+        return from_date_int(entry['last_date']) if entry and entry['last_date'] else None
+
+    def to_frame(self) -> pd.DataFrame:
+        """清单转换为 DataFrame，索引为代码"""
+        df = pd.DataFrame.from_dict(self.entries, orient='index', columns=MANIFEST_COLUMNS)
+        df.index.name = 'symbol'
+        return df
+
+    def stale(self, target_date, min_date: Optional[int] = None, calendar=None) -> pd.DataFrame:
+        """
+        落后于目标交易日的文件
+
+        :param target_date: 目标交易日
+        :param min_date: 只返回最后日期不早于该日期 (YYYYMMDD) 的文件，用于排除已退市证券
+        :param calendar: 交易日历，默认由本地上证指数推导
+        :return: pd.DataFrame (symbol, last_date, count, size, mtime, lag)
+        """
+        calendar = calendar if calendar is not None else get_calendar(self.tdxdir)
+        target = to_date_int(target_date)
+
+        df = self.to_frame()
+        df = df[df['last_date'] < target]
+
+        if min_date:
+            df = df[df['last_date'] >= min_date]
+
+        last_dates = df['last_date'].to_numpy(dtype=np.int64)
+        lag = calendar.count(last_dates, np.full(len(df), target)).astype(float)
+        lag[last_dates == 0] = np.nan
+
+        return df.assign(lag=lag).sort_values('last_date')
@@ -0,0 +1,203 @@
+"""
+热点路径埋点
+
+记录文件查找、K 线解码、日期转换、复权、申万数据加载和行情请求的调用次数、读取字节数和耗时分布。
+默认关闭，关闭时每次调用只多一次布尔判断；通过 enable() 或环境变量 KITETDX_METRICS=1 开启。
+
+用法::
+
+    from kitetdx import metrics
+
+    metrics.enable()
+    reader.daily('600036')
+
+    metrics.snapshot()['records.read_daily']['count']
+    print(metrics.to_prometheus())
+
+    # 每次调用结束后回调，可转发到 StatsD / OpenTelemetry 等
+    metrics.add_callback(lambda name, seconds, nbytes, error: ...)
+"""
+
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# 耗时直方图的桶上限 (秒)，最后一个桶为 +Inf
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_PREFIX = 'kitetdx'
+
+_enabled = os.environ.get('KITETDX_METRICS', '').lower() in ('1', 'true', 'yes')
+_lock = threading.Lock()
+_stats: Dict[str, dict] = {}
+_callbacks: List[Callable] = []
+
+
+def enable():
+    """开启埋点"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """关闭埋点，已记录的数据保留"""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """清空已记录的数据"""
+    with _lock:
+        _stats.clear()
+
+
+def add_callback(callback: Callable):
+    """
+    注册回调，每次埋点调用结束后以 (名称, 秒, 字节数, 是否异常) 调用
+
+    :param callback: 回调函数，抛出的异常会被记录并忽略
+    """
+    _callbacks.append(callback)
+
+
+def remove_callback(callback: Callable):
+    if callback in _callbacks:
+        _callbacks.remove(callback)
+
+
+def record(name: str, seconds: float, nbytes: int = 0, error: bool = False):
+    """
+    记录一次调用
+
+    :param name: 埋点名称，如 'records.read_daily'
+    :param seconds: 耗时 (秒)
+    :param nbytes: 读取的字节数
+    :param error: 是否抛出异常
+    """
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = {
+                'count': 0, 'errors': 0, 'bytes': 0, 'sum': 0.0,
+                'buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+            }
+
+        stat['count'] += 1
+        stat['errors'] += bool(error)
+        stat['bytes'] += nbytes
+        stat['sum'] += seconds
+        stat['buckets'][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    for callback in list(_callbacks):
+        try:
+            callback(name, seconds, nbytes, error)
+        except Exception as e:
+            logger.warning(f"metrics 回调 {callback!r} 出错: {e}")
+
+
+def timed(name: str, size: Optional[Callable] = None):
+    """
+    埋点装饰器
+
+    :param name: 埋点名称
+    :param size: 根据返回值计算读取字节数的函数，如 lambda df: len(df) * 32
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                record(name, time.perf_counter() - started, error=True)
+                raise
+
+            elapsed = time.perf_counter() - started
+            nbytes = 0
+            if size is not None and result is not None:
+                try:
+                    nbytes = int(size(result))
+                except Exception:
+                    nbytes = 0
+
+            record(name, elapsed, nbytes)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def snapshot() -> Dict[str, dict]:
+    """
+    当前记录的数据
+
+    :return: dict {名称: {'count', 'errors', 'bytes', 'sum', 'buckets': {桶上限: 累计次数}}}
+    """
+    with _lock:
+        result = {}
+        for name, stat in _stats.items():
+            cumulative, buckets = 0, {}
+            for le, count in zip(LATENCY_BUCKETS + (float('inf'),), stat['buckets']):
+                cumulative += count
+                buckets[le] = cumulative
+
+            result[name] = {
+                'count': stat['count'], 'errors': stat['errors'], 'bytes': stat['bytes'],
+                'sum': stat['sum'], 'buckets': buckets,
+            }
+
+        return result
+
+
+def _format_le(le: float) -> str:
+    return '+Inf' if le == float('inf') else repr(le)
+
+
+def to_prometheus(prefix: str = PROMETHEUS_PREFIX) -> str:
+    """
+    Prometheus 文本格式 (exposition format 0.0.4)
+
+    :param prefix: 指标名前缀
+    :return: str
+    """
+    stats = snapshot()
+    lines = []
+
+    counters = (
+        ('calls_total', 'count', '调用次数'),
+        ('errors_total', 'errors', '抛出异常的调用次数'),
+        ('bytes_read_total', 'bytes', '读取的字节数'),
+    )
+
+    for suffix, key, help_text in counters:
+        metric = f'{prefix}_{suffix}'
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} counter')
+        lines.extend(f'{metric}{{op="{name}"}} {stat[key]}' for name, stat in sorted(stats.items()))
+
+    metric = f'{prefix}_latency_seconds'
+    lines.append(f'# HELP {metric} 调用耗时')
+    lines.append(f'# TYPE {metric} histogram')
+
+    for name, stat in sorted(stats.items()):
+        for le, count in stat['buckets'].items():
+            lines.append(f'{metric}_bucket{{op="{name}",le="{_format_le(le)}"}} {count}')
+        lines.append(f'{metric}_sum{{op="{name}"}} {stat["sum"]:.6f}')
+        lines.append(f'{metric}_count{{op="{name}"}} {stat["count"]}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,87 @@
+"""
+日线面板
+
+将多只证券的日线按交易日历对齐为 (日期 × 证券) 矩阵，
+缺失的交易日 (停牌、未上市) 填充为 NaN。
+"""
+
+from typing import Dict, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from mootdx.logger import logger
+from kitetdx.calendar import to_date_ints
+from kitetdx.records import DAILY_COLUMNS
+
+
+DEFAULT_FIELDS = ('open', 'high', 'low', 'close', 'amount', 'volume')
+
+
+def align_to_sessions(sessions: np.ndarray, dates) -> tuple:
+    """
+    计算日期在交易日数组中的行号
+
+    :param sessions: 升序交易日数组 (YYYYMMDD)
+    :param dates: 待对齐的日期
+    :return: (行号数组, 命中掩码)
+    """
+    dates = to_date_ints(dates)
+    rows = np.searchsorted(sessions, dates)
+    hit = rows < len(sessions)
+    hit[hit] = sessions[rows[hit]] == dates[hit]
+    return rows, hit
+
+
+def fill_panel(reader, symbols: Sequence[str], sessions: np.ndarray, arrays: Dict[str, np.ndarray], **kwargs):
+    """
+    逐只读取日线并写入预先分配的 (日期 × 证券) 矩阵
+
+    :param reader: StdReader 实例
+    :param symbols: 证券代码列表，对应矩阵的列
+    :param sessions: 交易日数组 (YYYYMMDD)，对应矩阵的行
+    :param arrays: {字段: 矩阵}，缺失的数据保持原值
+    :param kwargs: 传给 reader.daily() 的参数，如 adjust='qfq'
+    """
+    fields = list(arrays)
+
+    # 只解码面板需要的日线字段
+    columns = [field for field in fields if field in DAILY_COLUMNS] or None
+
+    for col, symbol in enumerate(symbols):
+        df = reader.daily(symbol, columns=columns, **kwargs)
+
+        if df is None or df.empty:
+            logger.debug(f"{symbol} 没有日线数据，面板中保持为空")
+            continue
+
+        rows, hit = align_to_sessions(sessions, df.index)
+
+        for field in fields:
+            if field in df.columns:
+                arrays[field][rows[hit], col] = df[field].to_numpy()[hit]
+
+
+def build_panel(reader, symbols: Iterable[str], fields: Sequence[str] = DEFAULT_FIELDS,
+                start=None, end=None, dtype='float64', **kwargs) -> Dict[str, pd.DataFrame]:
+    """
+    构建日线面板
+
+    :param reader: StdReader 实例
+    :param symbols: 证券代码列表
+    :param fields: 字段列表
+    :param start: 起始日期，默认交易日历第一天
+    :param end: 截止日期，默认最后一个已知交易日
+    :param dtype: 矩阵数据类型
+    :param kwargs: 传给 reader.daily() 的参数，如 adjust='qfq'
+    :return: dict {字段: pd.DataFrame (索引为交易日，列为证券代码)}
+    """
+    symbols = list(symbols)
+    calendar = reader.calendar
+    sessions = calendar.sessions_between(start, end)
+
+    arrays = {field: np.full((len(sessions), len(symbols)), np.nan, dtype=dtype) for field in fields}
+    fill_panel(reader, symbols, sessions, arrays, **kwargs)
+
+    index = calendar.to_index(sessions)
+    return {field: pd.DataFrame(arrays[field], index=index, columns=symbols) for field in fields}
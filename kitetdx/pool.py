@@ -0,0 +1,375 @@
+"""
+行情连接池
+
+维护到多台通达信行情服务器的连接，供多线程批量获取在线数据：
+请求按轮询分配到不同服务器，连接失败的服务器暂时剔除，请求自动在其他服务器上重试。
+"""
+
+import copy
+import datetime
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mootdx import config
+from mootdx.consts import HQ_HOSTS, MAX_KLINE_COUNT
+from mootdx.logger import logger
+from mootdx.quotes import Quotes as MooQuotes
+from mootdx.utils import get_frequency
+from tdxpy.exceptions import TdxConnectionError, TdxFunctionCallError
+
+from kitetdx import metrics
+
+
+# 连接失败的服务器在该时间 (秒) 内不再分配新连接
+SERVER_COOLDOWN = 60
+
+# 视为连接故障 (需要换服务器重试) 的异常
+CONNECTION_ERRORS = (OSError, EOFError, TdxConnectionError, TdxFunctionCallError)
+
+# 每个交易日的 K 线数量，按 mootdx 的频次编号
+BARS_PER_SESSION = {
+    0: 48, 1: 16, 2: 8, 3: 4, 4: 1, 5: 1 / 5, 6: 1 / 20,
+    7: 240, 8: 240, 9: 1, 10: 1 / 60, 11: 1 / 240,
+}
+
+# 工作日中实际交易日的比例下限，用于估算分页位置时留出节假日余量
+TRADING_RATIO = 0.9
+
+# mootdx 的构造函数会改写全局配置中的 BESTIP，创建连接时需要串行
+_config_lock = threading.Lock()
+
+
+def estimate_pages(frequency, start_date, end_date, today=None, page_size=MAX_KLINE_COUNT) -> List[int]:
+    """
+    估算覆盖 [start_date, end_date] 所需的分页起始位置
+
+    通达信按从新到旧的位置分页 (start=0 为最新的 K 线)，
+    这里按工作日数估算区间两端距今的 K 线数，并为节假日留出余量：
+    区间之后跳过的 K 线数往少估，区间内需要的 K 线数往多估。
+
+    :param frequency: K 线频次
+    :param start_date: 起始日期
+    :param end_date: 截止日期
+    :param today: 当前日期，默认今天
+    :param page_size: 每页 K 线数量
+    :return: list[int] 分页起始位置
+    """
+    per_session = BARS_PER_SESSION.get(get_frequency(frequency), 1)
+    today = np.datetime64(today or datetime.date.today(), 'D') + 1
+
+    start_day = np.datetime64(pd.Timestamp(start_date).date(), 'D')
+    end_day = np.datetime64(pd.Timestamp(end_date).date(), 'D') + 1 if end_date else today
+    end_day = min(end_day, today)
+
+    after = np.busday_count(end_day, today) * TRADING_RATIO * per_session
+    within = np.busday_count(start_day, end_day) * per_session
+
+    first = int(after) // page_size * page_size
+    last = int(np.ceil(after + within)) + 1
+
+    return list(range(first, max(last, first + 1), page_size))
+
+
+def default_servers() -> List[Tuple[str, int]]:
+    """mootdx 内置的行情服务器列表"""
+    return [(host[1], int(host[2])) for host in HQ_HOSTS]
+
+
+class QuotesPool(object):
+    """
+    行情连接池
+
+    连接以 (server, client) 形式保存在空闲队列中，client 为 mootdx 的 StdQuotes 对象。
+    """
+
+    def __init__(self, servers: Optional[Sequence[Tuple[str, int]]] = None, size=4, retries=2, timeout=5,
+                 client_factory: Optional[Callable] = None, **kwargs):
+        """
+        构造函数
+
+        :param servers: 服务器列表 [(ip, port), ...]，默认使用 mootdx 内置列表
+        :param size: 最大连接数
+        :param retries: 单个请求在其他服务器上的重试次数
+        :param timeout: 连接超时时间 (秒)
+        :param client_factory: 创建连接的函数 factory(server) -> client，默认创建 mootdx 标准行情连接
+        :param kwargs: 传给 mootdx Quotes.factory 的其他参数
+        """
+        self.servers = [tuple(server) for server in (servers or default_servers())]
+
+        if not self.servers:
+            raise ValueError("服务器列表不能为空")
+
+        self.size = size
+        self.retries = retries
+        self.timeout = timeout
+        self.client_factory = client_factory
+        self.kwargs = kwargs
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._cycle = itertools.cycle(range(len(self.servers)))
+        self._failed: Dict[Tuple[str, int], float] = {}
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _create_client(self, server):
+        if self.client_factory:
+            return self.client_factory(server)
+
+        with _config_lock:
+            bestip = copy.deepcopy(config.get('BESTIP'))
+            try:
+                return MooQuotes.factory(market='std', server=server, timeout=self.timeout,
+                                         auto_retry=False, raise_exception=True, **self.kwargs)
+            finally:
+                config.set('BESTIP', bestip)
+
+    def _next_servers(self) -> List[Tuple[str, int]]:
+        """按轮询顺序排列的候选服务器，冷却中的服务器排在最后"""
+        now = time.monotonic()
+
+        with self._lock:
+            start = next(self._cycle)
+
+        ordered = self.servers[start:] + self.servers[:start]
+        healthy = [s for s in ordered if now - self._failed.get(s, -SERVER_COOLDOWN) >= SERVER_COOLDOWN]
+
+        return healthy + [s for s in ordered if s not in healthy]
+
+    def mark_failed(self, server):
+        """标记服务器故障"""
+        logger.debug(f"行情服务器 {server[0]}:{server[1]} 连接失败，暂停使用 {SERVER_COOLDOWN} 秒")
+
+        with self._lock:
+            self._failed[server] = time.monotonic()
+
+    def _connect(self, exclude=()):
+        last_error = None
+
+        for server in self._next_servers():
+            if server in exclude:
+                continue
+
+            try:
+                return server, self._create_client(server)
+            except CONNECTION_ERRORS as e:
+                last_error = e
+                self.mark_failed(server)
+
+        raise TdxConnectionError(f"没有可用的行情服务器: {last_error}")
+
+    def acquire(self, exclude=()):
+        """
+        获取一个连接，没有空闲连接时新建
+
+        :param exclude: 不使用的服务器
+        :return: (server, client)
+        """
+        if self._closed:
+            raise RuntimeError("连接池已关闭")
+
+        self._slots.acquire()
+
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect(exclude)
+
+                if conn[0] not in exclude:
+                    return conn
+
+                self._close_client(conn[1])
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        """
+        归还连接
+
+        :param conn: acquire() 返回的 (server, client)
+        :param broken: 连接已失效，直接关闭
+        """
+        if broken or self._closed:
+            self._close_client(conn[1])
+        else:
+            self._idle.put(conn)
+
+        self._slots.release()
+
+    @contextmanager
+    def connection(self, exclude=()):
+        """
+        以上下文管理器方式使用连接，发生连接故障时关闭该连接并标记服务器
+
+        :param exclude: 不使用的服务器
+        """
+        conn = self.acquire(exclude)
+
+        try:
+            yield conn
+        except CONNECTION_ERRORS:
+            self.mark_failed(conn[0])
+            self.release(conn, broken=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def call(self, method, *args, **kwargs):
+        """
+        调用行情接口，连接故障时换服务器重试
+
+        :param method: mootdx 行情方法名，如 'bars', 'transactions'；也可以是以客户端为第一个参数的函数
+        :return: 接口返回值
+        """
+        if metrics.is_enabled():
+            name = method if isinstance(method, str) else method.__name__
+            return metrics.timed(f'quotes.{name}')(self._call)(method, *args, **kwargs)
+
+        return self._call(method, *args, **kwargs)
+
+    def _call(self, method, *args, **kwargs):
+        tried = []
+
+        for attempt in range(self.retries + 1):
+            # 服务器全部试过之后允许重新使用
+            exclude = tried if len(tried) < len(self.servers) else ()
+
+            try:
+                with self.connection(exclude) as (server, client):
+                    tried.append(server)
+                    if callable(method):
+                        return method(client, *args, **kwargs)
+
+                    return getattr(client, method)(*args, **kwargs)
+            except CONNECTION_ERRORS as e:
+                logger.debug(f"{getattr(method, '__name__', method)}{args or ''} 第 {attempt + 1} 次请求失败: {e}")
+
+                if attempt == self.retries:
+                    raise
+
+    def map(self, method: str, symbols: Iterable[str], workers: Optional[int] = None, **kwargs) -> Dict:
+        """
+        对多个代码并发调用同一行情接口
+
+        :param method: mootdx 行情方法名
+        :param symbols: 证券代码列表
+        :param workers: 线程数，默认等于连接池大小
+        :param kwargs: 行情接口参数
+        :return: dict {代码: 返回值}，重试后仍失败的代码值为 None
+        """
+        symbols = list(dict.fromkeys(symbols))
+
+        def fetch(symbol):
+            try:
+                return self.call(method, symbol=symbol, **kwargs)
+            except Exception as e:
+                logger.warning(f"获取 {symbol} 的 {method} 数据失败: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=workers or self.size) as executor:
+            return dict(zip(symbols, executor.map(fetch, symbols)))
+
+    def bars_range(self, symbol: str, frequency, start_date, end_date=None, index=False,
+                   today=None, page_size=MAX_KLINE_COUNT) -> pd.DataFrame:
+        """
+        获取日期区间内的全部 K 线，自动分页并发获取
+
+        先按估算的分页位置并发获取，之后检查两端是否覆盖了区间，
+        估算不足时继续向更新或更旧的方向补充分页。
+
+        :param symbol: 证券代码
+        :param frequency: K 线频次
+        :param start_date: 起始日期
+        :param end_date: 截止日期 (含当天)，默认到最新
+        :param index: 是否为指数
+        :param today: 当前日期，默认今天
+        :param page_size: 每页 K 线数量，最大 800
+        :return: pd.DataFrame 按时间升序、去重后的 K 线
+        """
+        method = 'index_bars' if index else 'bars'
+        page_size = min(page_size, MAX_KLINE_COUNT)
+
+        start = pd.Timestamp(start_date)
+        stop = pd.Timestamp(end_date) + pd.Timedelta(days=1) if end_date else None
+
+        pages = {}
+
+        def fetch(position):
+            df = self.call(method, symbol=symbol, frequency=frequency, start=position, offset=page_size)
+            return df if isinstance(df, pd.DataFrame) else pd.DataFrame()
+
+        def fetch_all(positions):
+            positions = [p for p in positions if p not in pages]
+            with ThreadPoolExecutor(max_workers=min(self.size, max(len(positions), 1))) as executor:
+                pages.update(zip(positions, executor.map(fetch, positions)))
+
+        fetch_all(estimate_pages(frequency, start, end_date, today=today, page_size=page_size))
+
+        # 较新的一端：跳过的 K 线过多时向前补页
+        while stop is not None:
+            newest = min(pages)
+            df = pages[newest]
+            if newest == 0 or (not df.empty and df.index.max() >= stop):
+                break
+            fetch_all([max(newest - page_size, 0)])
+
+        # 较旧的一端：历史数据未取完且尚未覆盖起始日期时继续向后补页
+        while True:
+            oldest = max(pages)
+            df = pages[oldest]
+            if len(df) < page_size or df.index.min() <= start:
+                break
+            fetch_all([oldest + page_size])
+
+        frames = [df for df in pages.values() if not df.empty]
+
+        if not frames:
+            return pd.DataFrame()
+
+        df = pd.concat(frames).sort_index()
+        df = df[~df.index.duplicated(keep='last')]
+        df = df[df.index >= start]
+
+        if stop is not None:
+            df = df[df.index < stop]
+
+        return df
+
+    def close(self):
+        """关闭全部空闲连接"""
+        self._closed = True
+
+        while True:
+            try:
+                _, client = self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+            self._close_client(client)
+
+    @staticmethod
+    def _close_client(client):
+        try:
+            client.close()
+        except Exception as e:
+            logger.debug(f"关闭行情连接失败: {e}")
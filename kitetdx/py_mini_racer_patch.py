@@ -13,14 +13,23 @@ py_mini_racer 兼容性补丁
 """
 
 import json
+import logging
 import sys
 
-try:
-    import quickjs
-except ImportError:
-    raise ImportError(
-        "M1 芯片兼容性需要 quickjs。请安装: pip install quickjs"
-    )
+
+logger = logging.getLogger(__name__)
+
+
+def _import_quickjs():
+    """延迟导入 quickjs，只有真正创建 MiniRacer 时才需要"""
+    try:
+        import quickjs
+    except ImportError:
+        raise ImportError(
+            "M1 芯片兼容性需要 quickjs。请安装: pip install quickjs"
+        )
+
+    return quickjs
 
 
 class MiniRacer:
@@ -31,7 +40,7 @@ class MiniRacer:
     """
     
     def __init__(self):
-        self._context = quickjs.Context()
+        self._context = _import_quickjs().Context()
     
     def _convert_result(self, result):
         """
@@ -145,4 +154,4 @@ class _FakePyMiniRacer:
 _fake_module = _FakePyMiniRacer()
 sys.modules['py_mini_racer'] = _fake_module
 
-print("[py_mini_racer_patch] 成功使用 quickjs 后端修复 py_mini_racer 兼容性")
+logger.debug("[py_mini_racer_patch] 成功使用 quickjs 后端修复 py_mini_racer 兼容性")
@@ -1,6 +1,52 @@
+import pandas as pd
+
 from mootdx.quotes import Quotes as MooQuotes
 from mootdx.consts import MARKET_SH
 
+from kitetdx import metrics
+
+
+# 记录 quotes.<方法名> 埋点的行情方法
+TIMED_METHODS = frozenset({
+    'bars', 'index_bars', 'minute', 'minutes', 'transaction', 'transactions', 'F10', 'finance', 'k',
+    'block', 'stock_count', 'stocks', 'stock_all', 'xdxr', 'quotes', 'get_k_data',
+})
+
+
+class TimedClient(object):
+    """
+    mootdx 行情客户端的埋点代理
+
+    TIMED_METHODS 中的方法调用记录到 quotes.<方法名>，其他属性原样转发给客户端。
+    """
+
+    def __init__(self, client):
+        object.__setattr__(self, '_client', client)
+        object.__setattr__(self, '_methods', {})
+
+    def __getattr__(self, name):
+        value = getattr(self._client, name)
+
+        if name not in TIMED_METHODS or not callable(value):
+            return value
+
+        # 按方法名缓存包装后的函数，客户端替换了方法时重新包装
+        cached = self._methods.get(name)
+        if cached is None or cached[0] != value:
+            cached = self._methods[name] = (value, metrics.timed(f'quotes.{name}')(value))
+
+        return cached[1]
+
+    def __setattr__(self, name, value):
+        setattr(self._client, name, value)
+
+    def __dir__(self):
+        return dir(self._client)
+
+    def __repr__(self):
+        return f'TimedClient({self._client!r})'
+
+
 class Quotes(object):
     """
     Kitetdx Quotes Module
@@ -15,13 +61,107 @@ class Quotes(object):
         
         :param market: std (Standard Market), ext (Extended Market)
         :param kwargs: Variable arguments
-        :return: Quotes object
+        :return: Quotes object (开启埋点时为 mootdx 客户端的埋点代理，接口与 mootdx 相同)
+        """
+        client = MooQuotes.factory(market=market, **kwargs)
+        return TimedClient(client) if metrics.is_enabled() else client
+
+    @staticmethod
+    def batch(method, symbols, workers=4, servers=None, pool=None, **kwargs):
+        """
+        多服务器并发批量获取行情数据
+
+        请求通过连接池分配到多台服务器，失败的请求自动换服务器重试。
+
+        :param method: 行情方法名，如 'bars', 'transactions', 'minutes'
+        :param symbols: 股票代码列表
+        :param workers: 并发线程数 (同时也是连接数)
+        :param servers: 服务器列表 [(ip, port), ...]，默认使用 mootdx 内置列表
+        :param pool: 已有的 QuotesPool，传入时忽略 servers 且不会关闭该连接池
+        :param kwargs: 行情方法参数
+        :return: pd.DataFrame 合并后的数据，附加 symbol 列；获取失败的代码会被跳过
+        """
+        from kitetdx.pool import QuotesPool
+
+        owned = pool is None
+        pool = pool or QuotesPool(servers=servers, size=workers)
+
+        try:
+            results = pool.map(method, symbols, workers=workers, **kwargs)
+        finally:
+            if owned:
+                pool.close()
+
+        frames = [
+            df.assign(symbol=symbol)
+            for symbol, df in results.items()
+            if isinstance(df, pd.DataFrame) and not df.empty
+        ]
+
+        if not frames:
+            return pd.DataFrame()
+
+        return pd.concat(frames)
+
+    @staticmethod
+    def bars_range(symbol, frequency=9, start_date=None, end_date=None, index=False, workers=4,
+                   servers=None, pool=None):
+        """
+        获取日期区间内的全部 K 线
+
+        单次请求最多返回 800 条，这里按区间估算所需的分页位置，
+        通过连接池并发获取后去除重叠部分，合并为按时间升序的一张表。
+
+        :param symbol: 股票代码
+        :param frequency: 数据频次 9=日线, 8=1分钟
+        :param start_date: 起始日期
+        :param end_date: 截止日期 (含当天)，默认到最新
+        :param index: 是否为指数 (使用 index_bars)
+        :param workers: 并发连接数
+        :param servers: 服务器列表 [(ip, port), ...]，默认使用 mootdx 内置列表
+        :param pool: 已有的 QuotesPool，传入时忽略 servers 且不会关闭该连接池
+        :return: pd.DataFrame
         """
-        return MooQuotes.factory(market=market, **kwargs)
+        from kitetdx.pool import QuotesPool
+
+        if start_date is None:
+            raise ValueError("start_date 不能为空")
+
+        owned = pool is None
+        pool = pool or QuotesPool(servers=servers, size=workers)
+
+        try:
+            return pool.bars_range(symbol, frequency, start_date, end_date, index=index)
+        finally:
+            if owned:
+                pool.close()
+
+    @staticmethod
+    def stream(symbols, interval=3.0, **kwargs):
+        """
+        实时行情快照推送 (asyncio)
+
+        按间隔批量获取快照 (每次请求最多 80 只)，只推送与上一次相比发生变化的行；
+        消费者处理不过来时暂停轮询。
+
+        用法::
+
+            async for changed in Quotes.stream(['600036', '000001'], interval=3):
+                print(changed[['price', 'vol']])
+
+        :param symbols: 股票代码列表
+        :param interval: 轮询间隔 (秒)
+        :param kwargs: 其他参数，如 maxsize, workers, servers, pool，见 kitetdx.stream.SnapshotStream
+        :return: SnapshotStream 异步迭代器，每次产出 pd.DataFrame (索引为代码)
+        """
+        from kitetdx.stream import SnapshotStream
+
+        return SnapshotStream(symbols, interval=interval, **kwargs)
 
     def __init__(self, **kwargs):
         self._client = MooQuotes.factory(**kwargs)
 
+    @metrics.timed('quotes.bars')
     def bars(self, symbol='000001', frequency=9, start=0, offset=800, **kwargs):
         """
         获取实时日K线数据
@@ -34,6 +174,7 @@ class Quotes(object):
         """
         return self._client.bars(symbol=symbol, frequency=frequency, start=start, offset=offset, **kwargs)
 
+    @metrics.timed('quotes.index_bars')
     def index_bars(self, symbol='000001', frequency=9, start=0, offset=800, **kwargs):
         """
         获取指数K线数据
@@ -46,6 +187,7 @@ class Quotes(object):
         """
         return self._client.index_bars(symbol=symbol, frequency=frequency, start=start, offset=offset, **kwargs)
 
+    @metrics.timed('quotes.minute')
     def minute(self, symbol=None, **kwargs):
         """
         获取实时分时数据
@@ -55,6 +197,7 @@ class Quotes(object):
         """
         return self._client.minute(symbol=symbol, **kwargs)
 
+    @metrics.timed('quotes.minutes')
     def minutes(self, symbol=None, date='20191023', **kwargs):
         """
         分时历史数据
@@ -65,6 +208,7 @@ class Quotes(object):
         """
         return self._client.minutes(symbol=symbol, date=date, **kwargs)
 
+    @metrics.timed('quotes.transaction')
     def transaction(self, symbol='', start=0, offset=800, **kwargs):
         """
         查询分笔成交
@@ -76,6 +220,7 @@ class Quotes(object):
         """
         return self._client.transaction(symbol=symbol, start=start, offset=offset, **kwargs)
 
+    @metrics.timed('quotes.transactions')
     def transactions(self, symbol='', start=0, offset=800, date='20170209', **kwargs):
         """
         查询历史分笔成交
@@ -88,6 +233,7 @@ class Quotes(object):
         """
         return self._client.transactions(symbol=symbol, start=start, offset=offset, date=date, **kwargs)
 
+    @metrics.timed('quotes.F10')
     def F10(self, symbol='', name=''):
         """
         读取公司信息详情
@@ -98,6 +244,7 @@ class Quotes(object):
         """
         return self._client.F10(symbol=symbol, name=name)
 
+    @metrics.timed('quotes.finance')
     def finance(self, symbol='000001', **kwargs):
         """
         读取财务信息
@@ -107,6 +254,7 @@ class Quotes(object):
         """
         return self._client.finance(symbol=symbol, **kwargs)
 
+    @metrics.timed('quotes.k')
     def k(self, symbol='', begin=None, end=None, **kwargs):
         """
         读取k线信息
@@ -124,6 +272,7 @@ class Quotes(object):
         """
         return self.k(**kwargs)
 
+    @metrics.timed('quotes.block')
     def block(self, tofile='block.dat', **kwargs):
         """
         获取证券板块信息
@@ -133,6 +282,7 @@ class Quotes(object):
         """
         return self._client.block(tofile=tofile, **kwargs)
 
+    @metrics.timed('quotes.stock_count')
     def stock_count(self, market=MARKET_SH):
         """
         获取市场股票数量
@@ -142,6 +292,7 @@ class Quotes(object):
         """
         return self._client.stock_count(market=market)
 
+    @metrics.timed('quotes.stocks')
     def stocks(self, market=MARKET_SH):
         """
         获取股票列表
@@ -151,6 +302,7 @@ class Quotes(object):
         """
         return self._client.stocks(market=market)
 
+    @metrics.timed('quotes.stock_all')
     def stock_all(self):
         """
         获取所有股票列表
@@ -159,6 +311,7 @@ class Quotes(object):
         """
         return self._client.stock_all()
 
+    @metrics.timed('quotes.xdxr')
     def xdxr(self, symbol='', **kwargs):
         """
         读取除权除息信息
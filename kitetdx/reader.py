@@ -4,16 +4,18 @@ from pathlib import Path
 from typing import List, Optional
 import datetime  
 
+import numpy as np
 import pandas as pd
 from tdxpy.reader import TdxExHqDailyBarReader, TdxFileNotFoundException
-from tdxpy.reader import TdxLCMinBarReader
 from tdxpy.reader import TdxMinBarReader
 
-from mootdx.contrib.compat import MooTdxDailyBarReader
 from mootdx.utils import get_stock_market
 from mootdx.logger import logger
-from kitetdx.utils import read_data, to_data
+from kitetdx import metrics
+from kitetdx.utils import datetime64_to_date_int, normalize_adjust, read_data, to_data
 from kitetdx.downloader import TdxSeleniumDownloader
+from kitetdx.calendar import get_calendar
+from kitetdx.updater import DELTA_MAX_SESSIONS, DeltaUpdater, count_sessions, from_date_int
 import os
 
 def get_default_tdx_dir():
@@ -31,40 +33,78 @@ def get_default_tdx_dir():
     return os.path.join(os.path.expanduser('~'), '.kitetdx', 'tdx')
 
 
-def get_last_trading_day(date=None):
+def get_last_trading_day(date=None, calendar=None):
     """
     获取最近的交易日
     
     Args:
         date: 指定日期，默认为今天
+        calendar: 交易日历 (TradingCalendar)，不指定时只排除周末
         
     Returns:
         最近的交易日
     """
     if date is None:
         date = datetime.date.today()
+
+    if calendar is not None:
+        return from_date_int(calendar.shift(date, 0))
     
-    # 中国股市交易日：周一到周五，排除法定节假日
-    # 这里先简单处理周末，不考虑节假日
+    # 没有交易日历时只处理周末，不考虑节假日
     while date.weekday() >= 5:  # 周六(5)和周日(6)
         date -= datetime.timedelta(days=1)
     
     return date
 
 
-def is_trading_day(date):
+def is_trading_day(date, calendar=None):
     """
-    判断是否为交易日（简单版本，只判断周末）
+    判断是否为交易日
     
     Args:
         date: 要判断的日期
+        calendar: 交易日历 (TradingCalendar)，不指定时只判断周末
         
     Returns:
         bool: 是否为交易日
     """
+    if calendar is not None:
+        return calendar.is_trading_day(date)
+
     return date.weekday() < 5  # 周一到周五
 
 
+@metrics.timed('records.read_minute_tdxpy')
+def read_tdxpy_minute(path) -> pd.DataFrame:
+    """
+    用 tdxpy 解码 .1/.5 格式的分钟线
+
+    :param path: 分钟线文件路径
+    :return: pd.DataFrame
+    """
+    return TdxMinBarReader().get_df(str(path))
+
+
+def get_target_trading_day(calendar=None):
+    """
+    获取本地数据应当具备的最近交易日
+
+    交易日未收盘时为上一个交易日，否则为最近的交易日
+
+    Args:
+        calendar: 交易日历 (TradingCalendar)
+
+    Returns:
+        datetime.date
+    """
+    today = datetime.date.today()
+
+    if is_trading_day(today, calendar) and not is_after_market_close():
+        return get_last_trading_day(today - datetime.timedelta(days=1), calendar)
+
+    return get_last_trading_day(today, calendar)
+
+
 def is_after_market_close():
     """
     判断当前是否已收盘（15:00之后）
@@ -84,7 +124,7 @@ class Reader(object):
         """
         Reader 工厂方法
 
-        :param market: std 标准市场, ext 扩展市场
+        :param market: std 标准市场, ext 扩展市场, hybrid 本地优先、在线补齐, remote 本地数据服务客户端
         :param kwargs: 可变参数
         :return:
         """
@@ -92,9 +132,17 @@ class Reader(object):
         if market == 'ext':
             return ExtReader(**kwargs)
 
+        if market == 'remote':
+            from .server import RemoteReader
+            return RemoteReader(**kwargs)
+
         # 优先从 kwargs 获取 tdxdir，没有则读环境变量，最后取默认值
         tdxdir = kwargs.get('tdxdir') or os.environ.get('TDXDIR') or get_default_tdx_dir()
         kwargs['tdxdir'] = tdxdir
+
+        if market == 'hybrid':
+            from .hybrid import HybridReader
+            return HybridReader(**kwargs)
         
         return StdReader(**kwargs)
 
@@ -108,6 +156,36 @@ class Block:
 
 
 
+def to_blocks(df: pd.DataFrame) -> List[Block]:
+    """
+    板块成分股表转换为 Block 列表
+
+    :param df: parse_concept_data() 的返回值
+    :return: list[Block]
+    """
+    if df.empty:
+        return []
+        
+    blocks = []
+    # 按板块分组
+    grouped = df.groupby(['concept_name', 'concept_code', 'concept_type'])
+    
+    for (name, code, ctype), group in grouped:
+        stocks = group[['stock_code', 'stock_name']].to_dict('records')
+        blocks.append(Block(
+            concept_name=name,
+            concept_code=code,
+            concept_type=ctype,
+            stocks=stocks
+        ))
+        
+    return blocks
+
+
+# 复权因子来源
+FQ_SOURCES = ('sina', 'gbbq')
+
+
 class ReaderBase(ABC):
     # 默认通达信安装目录
     tdxdir = get_default_tdx_dir()
@@ -142,6 +220,7 @@ class ReaderBase(ABC):
 
         self.tdxdir = tdxdir
 
+    @metrics.timed('reader.find_path')
     def find_path(self, symbol=None, subdir='lday', suffix=None, **kwargs):
         """
         自动匹配文件路径，辅助函数
@@ -158,6 +237,9 @@ class ReaderBase(ABC):
         # 通达信特有的板块指数88****开头的日线数据放在 sh 文件夹下
         elif symbol.startswith('88'):
             market = 'sh'
+        # 已带市场前缀，如 bj830799 (mootdx 无法识别北交所前缀)
+        elif symbol[:2].lower() in ('sh', 'sz', 'bj') and symbol[2:].isdigit():
+            market = symbol[:2].lower()
         else:
             # 判断是sh还是sz
             market = get_stock_market(symbol, True)
@@ -187,82 +269,177 @@ class ReaderBase(ABC):
 class StdReader(ReaderBase):
     """股票市场"""
 
-    def update_data(self):
+    _manifest = None
+    _adjusted = None
+
+    def __init__(self, tdxdir=None, fq_source='sina', gbbq_key=None):
+        """
+        构造函数
+
+        :param tdxdir: 通达信安装目录
+        :param fq_source: 复权因子来源，'sina' 新浪接口，'gbbq' 本地 T0002/hq_cache/gbbq (不访问网络)
+        :param gbbq_key: gbbq 密钥表内容或路径，见 kitetdx.gbbq.load_key
+        """
+        super().__init__(tdxdir=tdxdir)
+
+        if fq_source not in FQ_SOURCES:
+            raise ValueError(f"不支持的复权因子来源: {fq_source}，可选 {FQ_SOURCES}")
+
+        self.fq_source = fq_source
+        self.gbbq_key = gbbq_key
+
+    @property
+    def manifest(self):
+        """Lazy-loaded 日线数据清单"""
+        if self._manifest is None:
+            from .manifest import Manifest
+            self._manifest = Manifest(self.tdxdir)
+        return self._manifest
+
+    @property
+    def adjusted(self):
+        """Lazy-loaded 复权日线存储 (见 kitetdx.adjusted.AdjustedStore)"""
+        if self._adjusted is None:
+            from .adjusted import AdjustedStore
+            self._adjusted = AdjustedStore(self)
+        return self._adjusted
+
+    @property
+    def calendar(self):
+        """由本地上证指数日线推导的交易日历，指数文件更新后自动重新加载"""
+        return get_calendar(self.tdxdir)
+
+    def freshness(self, target_date=None, refresh=True, active_only=True):
+        """
+        查询落后于目标交易日的证券
+
+        :param target_date: 目标交易日，默认为当前应具备数据的最近交易日
+        :param refresh: 是否先增量刷新数据清单
+        :param active_only: 只返回最后日期距目标日不超过 DELTA_MAX_SESSIONS 个交易日的证券，排除已退市证券
+        :return: pd.DataFrame (索引 symbol，列 last_date, count, size, mtime, lag)
+        """
+        calendar = self.calendar
+        target_date = target_date or get_target_trading_day(calendar)
+
+        if refresh:
+            self.manifest.refresh()
+
+        df = self.manifest.stale(target_date, calendar=calendar)
+
+        if active_only:
+            df = df[df['lag'].notna() & (df['lag'] <= DELTA_MAX_SESSIONS)]
+
+        return df
+
+    def update_data(self, mode='auto'):
         """
         手动检查并更新数据
+
+        :param mode: 更新方式
+            'auto'  本地数据落后不超过 DELTA_MAX_SESSIONS 个交易日时增量更新，否则下载完整数据包
+            'delta' 只从行情服务器增量补齐缺失的日线
+            'full'  下载完整的 hsjday.zip
         """
-        # 检查 lday 目录的更新时间
-        need_download = False
-        lday_dir = Path(self.tdxdir) / 'vipdoc' / 'sh' / 'lday'
-        
-        if lday_dir.exists():
-            try:
-                mtime = lday_dir.stat().st_mtime
-                dir_date = datetime.date.fromtimestamp(mtime)
-                today = datetime.date.today()
-                
-                # 获取最近的交易日
-                last_trading_day = get_last_trading_day(today)
-                
-                # 定义必须满足的目标日期
-                if is_trading_day(today) and not is_after_market_close():
-                    # 如果是交易日且未收盘，我们需要至少有上个交易日的数据
-                    target_date = get_last_trading_day(today - datetime.timedelta(days=1))
-                    log_msg = "今天尚未收盘，检查是否落后于上个交易日"
-                else:
-                    # 如果已收盘或非交易日，我们需要有最新的交易日数据
-                    target_date = last_trading_day
-                    log_msg = "检查是否落后于最新交易日"
-
-                # 如果目录日期早于目标日期，则需要下载
-                if dir_date < target_date:
-                    logger.info(f"数据目录过期 (目录日期: {dir_date}, 目标日期: {target_date}) - {log_msg}")
-                    need_download = True
-                else:
-                    logger.debug(f"数据目录满足要求 (目录日期: {dir_date}, 目标日期: {target_date})")
-                    need_download = False
-            except Exception as e:
-                logger.warning(f"无法检查目录日期，准备重新下载: {e}")
-                need_download = True
-        else:
-            need_download = True
+        calendar = self.calendar
+        target_date = get_target_trading_day(calendar)
 
-        if need_download:
-            should_download = True
-            # 旧逻辑删除：不再进行额外的 is_trading_day 判断来阻止下载
-            # 因为上面的逻辑已经很精细地控制了 need_download
-            
-            if should_download:
-                print("未找到数据目录或数据过期，开始下载... (请耐心等待)")
-                
+        # 根据仍在交易的证券中最旧的 K 线日期判断是否需要更新，个别较新的文件不代表整体已更新
+        try:
+            self.manifest.refresh()
+            data_date = self.manifest.data_date(calendar=calendar)
+        except Exception as e:
+            logger.warning(f"无法检查本地数据日期，准备重新下载: {e}")
+            data_date = None
+
+        if data_date is not None and data_date >= target_date:
+            logger.debug(f"本地数据满足要求 (数据日期: {data_date}, 目标日期: {target_date})")
+            logger.info("数据已是最新，无需下载")
+            print("数据已是最新，无需下载")
+            return
+
+        # 自建的连接池在检查和增量更新结束后关闭
+        with DeltaUpdater(self.tdxdir, calendar=calendar) as updater:
+            # 本地日历之后的节假日未知，向服务器确认是否真的产生了新的交易日
+            if data_date is not None:
                 try:
-                    downloader = TdxSeleniumDownloader(self.tdxdir)
-                    success = downloader.download(timeout=300)
-                    
-                    if success:
-                        logger.info("数据更新完成")
-                        print("数据更新完成")
-                    else:
-                        logger.error("下载失败")
+                    latest_session = updater.latest_session()
                 except Exception as e:
-                    logger.error(f"下载或解压失败: {e}")
+                    logger.debug(f"无法获取服务器最新交易日: {e}")
+                    latest_session = None
+
+                if latest_session is not None and latest_session <= data_date:
+                    logger.info(f"服务器没有新的交易日 (最新交易日: {latest_session})，数据已是最新")
+                    print("数据已是最新，无需下载")
+                    return
+
+            logger.info(f"本地数据过期 (数据日期: {data_date}, 目标日期: {target_date})")
+
+            # 落后不多时只补齐缺失的日线
+            use_delta = mode == 'delta' or (
+                mode == 'auto' and data_date is not None
+                and count_sessions(data_date, target_date, calendar) <= DELTA_MAX_SESSIONS
+            )
+
+            if use_delta:
+                if self._update_delta(target_date, updater) or mode == 'delta':
+                    return
+                logger.info("增量更新失败，改为下载完整数据")
+
+        print("未找到数据目录或数据过期，开始下载... (请耐心等待)")
+
+        try:
+            downloader = TdxSeleniumDownloader(self.tdxdir)
+            success = downloader.download(timeout=300)
+
+            if success:
+                changed = self.manifest.update(downloader.changed_files)
+                logger.info(f"数据更新完成，{len(changed)} 个日线文件发生变化")
+                print("数据更新完成")
             else:
-                logger.info("暂无需下载")
-                print("暂无需下载")
-        else:
-            logger.info("数据已是最新，无需下载")
-            print("数据已是最新，无需下载")
+                logger.error("下载失败")
+        except Exception as e:
+            logger.error(f"下载或解压失败: {e}")
+
+    def _update_delta(self, target_date, updater=None):
+        """
+        从行情服务器增量补齐日线
 
-    def daily(self, symbol=None, **kwargs):
+        :param target_date: 需要补齐到的交易日
+        :param updater: DeltaUpdater 实例
+        :return: bool 是否成功
+        """
+        updater = updater or DeltaUpdater(self.tdxdir, calendar=self.calendar)
+        print("数据过期，开始增量更新...")
+
+        try:
+            stale = self.freshness(target_date, refresh=False)
+            stats = updater.update(target_date, symbols=stale.index)
+        except Exception as e:
+            logger.error(f"增量更新失败: {e}")
+            return False
+
+        if stats['failed']:
+            logger.warning(f"{len(stats['failed'])} 个文件未能增量更新: {stats['failed'][:10]}")
+
+        self.manifest.refresh()
+
+        logger.info("数据更新完成")
+        print(f"数据更新完成 (增量更新 {stats['files']} 个文件, {stats['bars']} 根 K 线)")
+        return True
+
+    def daily(self, symbol=None, columns=None, dtype=None, **kwargs):
         """
         获取日线数据
 
         :param symbol: 证券代码
+        :param columns: 只读取的列，如 ['close', 'volume']，默认 open, high, low, close, amount, volume
+        :param dtype: 数值列的数据类型，如 'float32'，默认 float64
         :return: pd.dataFrame or None
         """
+        from .records import read_daily
+
         symbol = Path(symbol).stem
-        reader = MooTdxDailyBarReader(vipdoc_path=Path(self.tdxdir) / 'vipdoc')
-        
+
         # 查找股票文件
         vipdoc = self.find_path(symbol=symbol, subdir='lday', suffix='day')
         
@@ -270,21 +447,88 @@ class StdReader(ReaderBase):
             logger.warning(f"未找到 {symbol} 的日线数据文件")
             return None
         
-        result = reader.get_df(str(vipdoc))
+        result = read_daily(vipdoc, columns=columns, dtype=dtype or 'float64')
         
         if result is None or result.empty:
             logger.warning(f"读取 {symbol} 日线数据为空")
             return None
-       
-        return to_data(result, symbol=symbol, **kwargs)
+
+        if self.fq_source == 'gbbq' and normalize_adjust(kwargs.get('adjust')) and 'factors' not in kwargs:
+            kwargs['factors'] = self.fq_factor(symbol, normalize_adjust(kwargs['adjust']), bars=result)
+
+        result = to_data(result, symbol=symbol, **kwargs)
+
+        # 复权计算会把数值列提升为 float64
+        if dtype and kwargs.get('adjust'):
+            result = result.astype(dtype)
+
+        return result
+
+    def panel(self, symbols, fields=None, start=None, end=None, **kwargs):
+        """
+        获取按交易日历对齐的日线面板
+
+        :param symbols: 证券代码列表
+        :param fields: 字段列表，默认 open, high, low, close, amount, volume
+        :param start: 起始日期
+        :param end: 截止日期
+        :return: dict {字段: pd.DataFrame (日期 × 证券)}
+        """
+        from .panel import DEFAULT_FIELDS, build_panel
+
+        return build_panel(self, symbols, fields=fields or DEFAULT_FIELDS, start=start, end=end, **kwargs)
+
+    def shared_panel(self, symbols, fields=None, start=None, end=None, path=None, **kwargs):
+        """
+        将日线面板发布到共享内存，供多个子进程零拷贝挂载 (见 kitetdx.shared.SharedPanel)
+
+        :param symbols: 证券代码列表
+        :param fields: 字段列表，默认 open, high, low, close, amount, volume
+        :param start: 起始日期
+        :param end: 截止日期
+        :param path: 内存映射文件路径，默认使用共享内存
+        :return: SharedPanel，子进程使用 SharedPanel.attach(panel.descriptor) 挂载
+        """
+        from .panel import DEFAULT_FIELDS
+        from .shared import SharedPanel
+
+        return SharedPanel.publish(self, symbols, fields=fields or DEFAULT_FIELDS, start=start, end=end,
+                                   path=path, **kwargs)
+
+    def transactions(self, symbol='', date=None, columns=None, filters=None):
+        """
+        读取本地归档的历史分笔成交 (见 kitetdx.ticks.TickArchiver)
+
+        :param symbol: 股票代码
+        :param date: 日期
+        :param columns: 读取的列，如 ['time', 'price']，默认全部
+        :param filters: 额外的过滤条件，如 [('vol', '>=', 1000)]
+        :return: pd.DataFrame (time, price, vol, buyorsell)，没有归档数据时为空
+        """
+        from .ticks import read_ticks
+
+        wanted = list(columns) if columns else ['time', 'price', 'vol', 'buyorsell']
+        df = read_ticks(self.tdxdir, date, symbols=[symbol], columns=list(dict.fromkeys(wanted + ['seq'])),
+                        filters=filters)
+
+        if df.empty:
+            logger.warning(f"未找到 {symbol} {date} 的分笔成交归档")
+            return df[wanted]
+
+        return df.sort_values('seq')[wanted].reset_index(drop=True)
 
     def xdxr(self, symbol='', **kwargs):
         """
         读取除权除息信息
         
         :param symbol: 股票代码
+        :param source: 'gbbq' 返回本地 gbbq 中的除权除息记录，默认返回新浪复权因子
         :return: pd.DataFrame or None
         """
+        if kwargs.get('source', self.fq_source) == 'gbbq':
+            gbbq = self.gbbq
+            return gbbq.xdxr(symbol) if gbbq is not None else None
+
         from .adjust import fetch_fq_factor
         
         # 尝试使用sina的除权信息
@@ -296,24 +540,101 @@ class StdReader(ReaderBase):
             
         return None
 
-    def minute(self, symbol=None, suffix=1, **kwargs):  # noqa
+    @property
+    def gbbq(self):
+        """本地除权除息表 (T0002/hq_cache/gbbq)，文件更新后自动重新解码，没有文件时为 None"""
+        from .gbbq import get_gbbq
+        return get_gbbq(self.tdxdir, key=self.gbbq_key)
+
+    def fq_factor(self, symbol, method='qfq', bars=None):
+        """
+        获取复权因子，来源由 fq_source 决定
+
+        :param symbol: 股票代码
+        :param method: 'qfq' 前复权，'hfq' 后复权
+        :param bars: 已读取的完整不复权日线 (含 close)，gbbq 来源时用于计算前收盘，避免重复读取
+        :return: pd.DataFrame (索引 date，列 factor)，无法获取时为 None 或空表
+        """
+        if self.fq_source != 'gbbq':
+            from .adjust import fetch_fq_factor
+            return fetch_fq_factor(symbol=symbol, method=method)
+
+        from .records import DAY_RECORD, security_coefficient
+
+        empty = pd.DataFrame({'factor': []}, index=pd.DatetimeIndex([], name='date'))
+        gbbq = self.gbbq
+
+        if gbbq is None:
+            logger.warning(f"未找到 {self.tdxdir} 下的 gbbq 文件，无法计算 {symbol} 的复权因子")
+            return empty
+
+        if bars is not None and 'close' in bars.columns:
+            dates, closes = datetime64_to_date_int(bars.index.values), bars['close'].to_numpy()
+        else:
+            # 只需要日期和收盘价，直接解码原始记录
+            path = self.find_path(symbol=Path(symbol).stem, subdir='lday', suffix='day')
+            if path is None:
+                return empty
+
+            records = np.fromfile(path, dtype=DAY_RECORD, count=os.path.getsize(path) // DAY_RECORD.itemsize)
+            dates, closes = records['date'], records['close'] * security_coefficient(path)[0]
+
+        if not len(dates):
+            return empty
+
+        return gbbq.factors(symbol, dates, closes, method=method)
+
+    def minute(self, symbol=None, suffix=1, adjust=None, factors=None, **kwargs):  # noqa
         """
         获取1, 5分钟线
 
         :param suffix: 文件前缀
         :param symbol: 证券代码
+        :param adjust: 复权方式，'qfq' 前复权，'hfq' 后复权，与 daily() 使用同一组日线复权因子
+        :param factors: 已获取的复权因子，默认通过 fq_factor() 获取
         :return: pd.dataFrame or None
         """
         symbol = Path(symbol).stem
         subdir = 'fzline' if str(suffix) == '5' else 'minline'
         suffix = ['lc5', '5'] if str(suffix) == '5' else ['lc1', '1']
-        symbol = self.find_path(symbol, subdir=subdir, suffix=suffix)
+        path = self.find_path(symbol, subdir=subdir, suffix=suffix)
 
-        if symbol is not None:
-            reader = TdxMinBarReader() if 'lc' not in symbol.suffix else TdxLCMinBarReader()
-            return reader.get_df(str(symbol))
+        if path is None:
+            return None
 
-        return None
+        if 'lc' in path.suffix:
+            from .records import read_minute
+            result = read_minute(path)
+        else:
+            result = read_tdxpy_minute(path)
+
+        adjust = normalize_adjust(adjust)
+        if not adjust or result is None or result.empty:
+            return result
+
+        from .adjust import to_adjust
+
+        # 每根分钟线按所在日期取日线复权因子
+        factors = self.fq_factor(symbol, adjust) if factors is None else factors
+        return to_adjust(result, symbol=symbol, adjust=adjust, factors=factors)
+
+    def minute_many(self, symbols, suffix=1, adjust=None, **kwargs) -> dict:
+        """
+        批量获取分钟线
+
+        :param symbols: 证券代码列表
+        :param suffix: 1 或 5
+        :param adjust: 复权方式，'qfq' / 'hfq'
+        :return: dict {证券代码: pd.DataFrame}，没有数据的证券不包含在结果中
+        """
+        result = {}
+
+        for symbol in dict.fromkeys(symbols):
+            df = self.minute(symbol, suffix=suffix, adjust=adjust, **kwargs)
+            if df is not None and not df.empty:
+                result[symbol] = df
+
+        return result
 
     def fzline(self, symbol=None):
         """
@@ -353,24 +674,8 @@ class StdReader(ReaderBase):
         
         if return_df:
             return df
-            
-        if df.empty:
-            return []
-            
-        blocks = []
-        # 按板块分组
-        grouped = df.groupby(['concept_name', 'concept_code', 'concept_type'])
-        
-        for (name, code, ctype), group in grouped:
-            stocks = group[['stock_code', 'stock_name']].to_dict('records')
-            blocks.append(Block(
-                concept_name=name,
-                concept_code=code,
-                concept_type=ctype,
-                stocks=stocks
-            ))
-            
-        return blocks
+
+        return to_blocks(df)
 
     def parse_stock_mapping(self, file_path):
         """
@@ -0,0 +1,189 @@
+"""
+通达信二进制记录格式
+
+日线 .day 文件每 32 字节一条记录，字段均为小端序：
+日期(YYYYMMDD)、开/高/低/收(整数，按证券类型缩放)、成交额(float)、成交量(整数)、保留。
+
+分钟线 .lc1/.lc5 文件同样每 32 字节一条记录：
+日期(打包的年月日)、分钟数、开/高/低/收/成交额(float)、成交量(整数)、保留。
+"""
+
+import os
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mootdx.contrib.compat import MooTdxDailyBarReader
+from kitetdx import metrics
+from kitetdx.utils import date_int_to_datetime64, minute_int_to_datetime64
+
+
+DAY_RECORD = np.dtype([
+    ('date', '<u4'),
+    ('open', '<u4'),
+    ('high', '<u4'),
+    ('low', '<u4'),
+    ('close', '<u4'),
+    ('amount', '<f4'),
+    ('volume', '<u4'),
+    ('reserved', '<u4'),
+])
+
+DAY_RECORD_SIZE = DAY_RECORD.itemsize
+
+LC_RECORD = np.dtype([
+    ('date', '<u2'),
+    ('minute', '<u2'),
+    ('open', '<f4'),
+    ('high', '<f4'),
+    ('low', '<f4'),
+    ('close', '<f4'),
+    ('amount', '<f4'),
+    ('volume', '<u4'),
+    ('reserved', '<u4'),
+])
+
+# StdReader.daily() 输出的列
+DAILY_COLUMNS = ('open', 'high', 'low', 'close', 'amount', 'volume')
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+
+# 未知证券类型按 A 股处理
+DEFAULT_COEFFICIENT = (0.01, 0.01)
+
+_type_reader = MooTdxDailyBarReader()
+
+
+def security_type(filename) -> Optional[str]:
+    """
+    根据文件名判断证券类型，如 'SH_A_STOCK', 'SZ_INDEX'
+
+    :param filename: .day 文件路径，文件名形如 sh600000.day
+    :return: str or None
+    """
+    try:
+        return _type_reader.get_security_type(str(filename))
+    except NotImplementedError:
+        return None
+
+
+def security_coefficient(filename) -> Tuple[float, float]:
+    """
+    获取价格和成交量的缩放系数，与 MooTdxDailyBarReader 保持一致
+
+    :param filename: .day 文件路径
+    :return: (价格系数, 成交量系数)
+    """
+    coefficient = MooTdxDailyBarReader.SECURITY_COEFFICIENT.get(security_type(filename))
+    return tuple(coefficient) if coefficient else DEFAULT_COEFFICIENT
+
+
+def is_index(filename) -> bool:
+    """判断 .day 文件是否为指数"""
+    return str(security_type(filename)).endswith('_INDEX')
+
+
+def read_last_daily(filename) -> Optional[np.void]:
+    """
+    只读取 .day 文件的最后一条完整记录
+
+    :param filename: .day 文件路径
+    :return: DAY_RECORD 记录 or None
+    """
+    size = os.path.getsize(filename)
+    count = size // DAY_RECORD_SIZE
+
+    if count == 0:
+        return None
+
+    with open(filename, 'rb') as f:
+        f.seek((count - 1) * DAY_RECORD_SIZE)
+        return np.frombuffer(f.read(DAY_RECORD_SIZE), dtype=DAY_RECORD)[0]
+
+
+@metrics.timed('records.read_daily', size=lambda df: len(df) * DAY_RECORD_SIZE)
+def read_daily(filename, columns: Optional[Sequence[str]] = None, dtype='float64') -> pd.DataFrame:
+    """
+    用 numpy 直接解码 .day 文件，只解码需要的列
+
+    结果与 MooTdxDailyBarReader.get_df() 一致：索引为日期 (名为 date)，价格和成交量已按证券类型缩放。
+
+    :param filename: .day 文件路径
+    :param columns: 需要的列，默认 DAILY_COLUMNS
+    :param dtype: 数值列的数据类型，如 'float32'
+    :return: pd.DataFrame
+    """
+    columns = list(columns) if columns is not None else list(DAILY_COLUMNS)
+
+    unknown = [col for col in columns if col not in DAILY_COLUMNS]
+    if unknown:
+        raise ValueError(f"不支持的日线字段: {unknown}，可选 {list(DAILY_COLUMNS)}")
+
+    records = np.fromfile(filename, dtype=DAY_RECORD, count=os.path.getsize(filename) // DAY_RECORD_SIZE)
+    price_coef, volume_coef = security_coefficient(filename)
+
+    data = {}
+    for col in columns:
+        if col in PRICE_COLUMNS:
+            values = records[col] * price_coef
+        elif col == 'volume':
+            values = records[col] * volume_coef
+        else:
+            values = records[col]
+        data[col] = values.astype(dtype, copy=False)
+
+    index = pd.DatetimeIndex(date_int_to_datetime64(records['date']).astype('M8[ns]'), name='date')
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+@metrics.timed('records.read_minute', size=lambda df: len(df) * LC_RECORD.itemsize)
+def read_minute(filename) -> pd.DataFrame:
+    """
+    用 numpy 直接解码 .lc1/.lc5 分钟线文件
+
+    结果与 TdxLCMinBarReader.get_df() 一致，但不逐行格式化日期字符串再解析。
+
+    :param filename: .lc1/.lc5 文件路径
+    :return: pd.DataFrame 索引为时间 (名为 date)
+    """
+    records = np.fromfile(filename, dtype=LC_RECORD, count=os.path.getsize(filename) // LC_RECORD.itemsize)
+
+    data = {col: records[col].astype(np.float64) for col in ('open', 'high', 'low', 'close', 'amount')}
+    data['volume'] = records['volume'].astype(np.int64)
+
+    times = minute_int_to_datetime64(records['date'], records['minute'])
+    return pd.DataFrame(data, index=pd.DatetimeIndex(times.astype('M8[ns]'), name='date'))
+
+
+def pack_daily(bars: pd.DataFrame, filename) -> bytes:
+    """
+    将日线数据编码为 .day 原生记录
+
+    价格和成交量使用与读取时相同的单位（即 StdReader.daily() 的输出单位）。
+
+    :param bars: 包含 date(YYYYMMDD 整数), open, high, low, close, amount, volume 列
+    :param filename: 目标 .day 文件路径，用于确定缩放系数
+    :return: bytes
+    """
+    from kitetdx.writer import day_records
+
+    return day_records(bars, filename).tobytes()
+
+
+def append_daily(filename, bars: pd.DataFrame) -> int:
+    """
+    将日线数据追加到 .day 文件末尾
+
+    只追加晚于文件最后一条记录的日期；若文件末尾存在不完整的记录，会先截断再追加。
+
+    :param filename: .day 文件路径
+    :param bars: 见 pack_daily
+    :return: 追加的记录数
+    """
+    if bars is None or len(bars) == 0:
+        return 0
+
+    from kitetdx.writer import write_daily
+
+    return write_daily(filename, bars, mode='append')
@@ -0,0 +1,523 @@
+"""
+本地只读数据服务
+
+在一个进程中持有 StdReader，把解码后的 K 线、板块和行业数据缓存在内存中，
+多个 notebook / 服务通过 HTTP (或 Unix socket) 共享，不必各自重复解析文件。
+
+- 缓存项记录所依赖文件的 mtime 和大小，文件更新后自动失效；按 LRU 淘汰
+- 同一数据的并发请求合并为一次读取，其余请求等待结果
+- DataFrame 以 Arrow IPC 流格式返回 (保留索引)，其他结果以 JSON 返回
+
+启动服务::
+
+    kitetdx serve --port 8765
+    kitetdx serve --socket /tmp/kitetdx.sock
+
+客户端只需替换一行::
+
+    reader = Reader.factory(market='remote', url='http://127.0.0.1:8765')
+    reader = Reader.factory(market='remote', url='unix:///tmp/kitetdx.sock')
+"""
+
+import http.client
+import json
+import os
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterable
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import pandas as pd
+
+from mootdx.logger import logger
+from kitetdx import metrics
+from kitetdx.utils import import_pyarrow
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# 缓存的最大条目数
+DEFAULT_CACHE_SIZE = 1024
+
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+
+HQ_CACHE = ('T0002', 'hq_cache')
+
+
+def file_signature(paths: Iterable) -> tuple:
+    """依赖文件的 (路径, mtime, 大小)，文件不存在时为 None"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except (OSError, TypeError):
+            signature.append((str(path), None))
+    return tuple(signature)
+
+
+def to_arrow(df: pd.DataFrame) -> bytes:
+    """DataFrame 编码为 Arrow IPC 流"""
+    pa, _ = import_pyarrow()
+
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    sink = pa.BufferOutputStream()
+
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue().to_pybytes()
+
+
+def from_arrow(payload: bytes) -> pd.DataFrame:
+    """Arrow IPC 流解码为 DataFrame"""
+    pa, _ = import_pyarrow()
+    return pa.ipc.open_stream(payload).read_pandas()
+
+
+class DataService(object):
+    """
+    带缓存和请求合并的数据访问层
+    """
+
+    def __init__(self, reader=None, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        构造函数
+
+        :param reader: StdReader 实例，默认 Reader.factory(market='std')
+        :param cache_size: 缓存的最大条目数
+        """
+        if reader is None:
+            from kitetdx.reader import Reader
+            reader = Reader.factory(market='std')
+
+        self.reader = reader
+        self.cache_size = cache_size
+
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+
+    def _hq_files(self, *names):
+        return [Path(self.reader.tdxdir).joinpath(*HQ_CACHE, name) for name in names]
+
+    def cached(self, key, deps: Callable[[], list], loader: Callable):
+        """
+        读取缓存，未命中时加载；同一 key 的并发请求只加载一次
+
+        :param key: 缓存键
+        :param deps: 返回依赖文件列表的函数
+        :param loader: 加载函数
+        :return: 加载结果
+        """
+        signature = file_signature(deps())
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == signature:
+                self._cache.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            future.set_exception(e)
+            with self._lock:
+                self._inflight.pop(key, None)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+
+            if value is not None:
+                self._cache[key] = (signature, value)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._cache.clear()
+
+    def _daily_file(self, symbol):
+        return self.reader.find_path(symbol=symbol, subdir='lday', suffix='day')
+
+    def _gbbq_files(self, adjust) -> list:
+        """使用本地 gbbq 复权时，复权结果还依赖 gbbq 文件"""
+        if not adjust or getattr(self.reader, 'fq_source', None) != 'gbbq':
+            return []
+
+        from kitetdx.gbbq import gbbq_path
+        return [gbbq_path(self.reader.tdxdir)]
+
+    def daily(self, symbol, adjust=None, columns=None, dtype=None):
+        symbol = Path(symbol).stem
+        frame = self.cached(
+            ('daily', symbol, adjust),
+            lambda: [self._daily_file(symbol)] + self._gbbq_files(adjust),
+            lambda: self.reader.daily(symbol, adjust=adjust),
+        )
+        return self._project(frame, columns, dtype)
+
+    def _minute_files(self, symbol, subdir, suffixes, adjust) -> list:
+        paths = [self.reader.find_path(symbol, subdir=subdir, suffix=suffixes)]
+        gbbq = self._gbbq_files(adjust)
+
+        # gbbq 复权因子由日线收盘价计算，日线变化时分钟线的复权结果也会变化
+        return paths + [self._daily_file(symbol)] + gbbq if gbbq else paths
+
+    def minute(self, symbol, suffix=1, adjust=None, columns=None, dtype=None):
+        symbol = Path(symbol).stem
+        subdir = 'fzline' if str(suffix) == '5' else 'minline'
+        suffixes = ['lc5', '5'] if str(suffix) == '5' else ['lc1', '1']
+        frame = self.cached(
+            ('minute', symbol, str(suffix), adjust),
+            lambda: self._minute_files(symbol, subdir, suffixes, adjust),
+            lambda: self.reader.minute(symbol, suffix=suffix, adjust=adjust),
+        )
+        return self._project(frame, columns, dtype)
+
+    def block(self, concept_type=None):
+        return self.cached(
+            ('block', concept_type),
+            lambda: self._hq_files('infoharbor_block.dat', 'infoharbor_ex.code'),
+            lambda: self.reader.block(concept_type=concept_type, return_df=True),
+        )
+
+    def industries(self, source='tdx', level=1):
+        return self.cached(
+            ('industries', source, int(level)),
+            lambda: self._hq_files('tdxzs3.cfg'),
+            lambda: self.reader.get_industries(source=source, level=int(level)),
+        )
+
+    def industry_stocks(self, industry_code, source='tdx'):
+        return self.cached(
+            ('industry_stocks', industry_code, source),
+            lambda: self._hq_files('tdxzs3.cfg', 'tdxhy.cfg'),
+            lambda: self.reader.get_industry_stocks(industry_code, source=source),
+        )
+
+    def stock_industry(self, stock_code, source='tdx'):
+        return self.cached(
+            ('stock_industry', stock_code, source),
+            lambda: self._hq_files('tdxzs3.cfg', 'tdxhy.cfg'),
+            lambda: self.reader.get_stock_industry(stock_code, source=source),
+        )
+
+    @staticmethod
+    def _project(frame, columns=None, dtype=None):
+        """缓存保存完整数据，按请求选择列和类型"""
+        if frame is None:
+            return None
+        if columns:
+            frame = frame[list(columns)]
+        return frame.astype(dtype) if dtype else frame
+
+
+# {路径: (DataService 方法, 必需参数)}
+ROUTES = {
+    '/daily': ('daily', ('symbol',)),
+    '/minute': ('minute', ('symbol',)),
+    '/block': ('block', ()),
+    '/industries': ('industries', ()),
+    '/industry_stocks': ('industry_stocks', ('industry_code',)),
+    '/stock_industry': ('stock_industry', ('stock_code',)),
+}
+
+
+def make_handler(service: DataService):
+    """
+    创建绑定到 service 的请求处理类
+
+    :param service: DataService
+    :return: BaseHTTPRequestHandler 子类
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+        def address_string(self):
+            # Unix socket 的客户端地址为空字符串
+            return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+        def send_body(self, status, body: bytes, content_type):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_json(self, status, value):
+            self.send_body(status, json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'),
+                           'application/json; charset=utf-8')
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            params = dict(parse_qsl(url.query))
+
+            if url.path == '/health':
+                return self.send_json(200, {'status': 'ok', 'tdxdir': str(service.reader.tdxdir)})
+
+            if url.path == '/stats':
+                return self.send_json(200, dict(service.stats, entries=len(service._cache)))
+
+            if url.path == '/metrics':
+                return self.send_body(200, metrics.to_prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+
+            route = ROUTES.get(url.path)
+            if route is None:
+                return self.send_json(404, {'error': f'未知路径: {url.path}'})
+
+            method, required = route
+            missing = [name for name in required if not params.get(name)]
+            if missing:
+                return self.send_json(400, {'error': f'缺少参数: {missing}'})
+
+            if 'columns' in params:
+                params['columns'] = [col for col in params['columns'].split(',') if col]
+
+            try:
+                result = getattr(service, method)(**params)
+            except (TypeError, KeyError, ValueError) as e:
+                return self.send_json(400, {'error': str(e)})
+            except Exception as e:
+                logger.error(f"处理 {self.path} 失败: {e}")
+                return self.send_json(500, {'error': str(e)})
+
+            if result is None:
+                return self.send_json(404, {'error': '未找到数据'})
+
+            if isinstance(result, pd.DataFrame):
+                return self.send_body(200, to_arrow(result), ARROW_STREAM)
+
+            return self.send_json(200, result)
+
+    return Handler
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """监听 Unix socket 的多线程 HTTP 服务"""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        super().server_bind()
+
+
+def create_server(service: DataService, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+    """
+    创建 (未启动的) 服务
+
+    :param service: DataService
+    :param host: 监听地址
+    :param port: 监听端口，0 表示随机端口
+    :param socket_path: Unix socket 路径，指定时忽略 host / port
+    :return: socketserver 实例，调用 serve_forever() 启动
+    """
+    handler = make_handler(service)
+
+    if socket_path:
+        return UnixHTTPServer(str(socket_path), handler)
+
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(tdxdir=None, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, cache_size=DEFAULT_CACHE_SIZE,
+          **kwargs):
+    """
+    启动服务并阻塞，直到 Ctrl+C
+
+    :param tdxdir: 通达信数据目录
+    :param host: 监听地址
+    :param port: 监听端口
+    :param socket_path: Unix socket 路径
+    :param cache_size: 缓存的最大条目数
+    :param kwargs: 创建 StdReader 的其他参数，如 fq_source='gbbq'
+    """
+    from kitetdx.reader import Reader
+
+    import_pyarrow()
+
+    service = DataService(Reader.factory(market='std', tdxdir=tdxdir, **kwargs), cache_size=cache_size)
+    server = create_server(service, host=host, port=port, socket_path=socket_path)
+
+    address = f'unix://{socket_path}' if socket_path else f'http://{host}:{server.server_address[1]}'
+    print(f"kitetdx 数据服务已启动: {address} (数据目录: {service.reader.tdxdir})")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """通过 Unix socket 连接的 HTTPConnection"""
+
+    def __init__(self, socket_path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class RemoteReader(object):
+    """
+    数据服务客户端，接口与 StdReader 的读取方法一致
+    """
+
+    def __init__(self, url=f'http://{DEFAULT_HOST}:{DEFAULT_PORT}', timeout=30, **kwargs):
+        """
+        构造函数
+
+        :param url: 服务地址，如 'http://127.0.0.1:8765' 或 'unix:///tmp/kitetdx.sock'
+        :param timeout: 请求超时 (秒)
+        """
+        self.url = url
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        # 每个线程复用一个 keep-alive 连接
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            url = urlsplit(self.url)
+            if url.scheme == 'unix':
+                conn = UnixHTTPConnection(url.path, timeout=self.timeout)
+            else:
+                conn = http.client.HTTPConnection(url.hostname, url.port or DEFAULT_PORT, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def request(self, path, **params):
+        """
+        请求服务
+
+        :param path: 路径，如 '/daily'
+        :param params: 查询参数，值为 None 的参数会被忽略
+        :return: pd.DataFrame / JSON 值，服务返回 404 时为 None
+        """
+        query = urlencode({k: ','.join(v) if isinstance(v, (list, tuple)) else v
+                           for k, v in params.items() if v is not None})
+
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request('GET', f'{path}?{query}' if query else path)
+                response = conn.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # 服务端关闭了空闲连接时重连一次
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+        if response.status == 404:
+            return None
+
+        if response.status != 200:
+            error = json.loads(body).get('error', body) if body else response.reason
+            raise RuntimeError(f"数据服务请求 {path} 失败 ({response.status}): {error}")
+
+        if response.getheader('Content-Type', '').startswith(ARROW_STREAM):
+            return from_arrow(body)
+
+        return json.loads(body)
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def daily(self, symbol=None, columns=None, dtype=None, adjust=None, **kwargs):
+        """
+        获取日线数据
+
+        :param symbol: 证券代码
+        :param columns: 只返回的列
+        :param dtype: 数值列的数据类型
+        :param adjust: 复权方式 'qfq' / 'hfq'
+        :return: pd.DataFrame or None
+        """
+        return self.request('/daily', symbol=symbol, columns=columns, dtype=dtype, adjust=adjust)
+
+    def minute(self, symbol=None, suffix=1, adjust=None, **kwargs):
+        """
+        获取 1, 5 分钟线
+
+        :param symbol: 证券代码
+        :param suffix: 1 或 5
+        :param adjust: 复权方式 'qfq' / 'hfq'
+        :return: pd.DataFrame or None
+        """
+        return self.request('/minute', symbol=symbol, suffix=suffix, adjust=adjust)
+
+    def fzline(self, symbol=None):
+        return self.minute(symbol, suffix=5)
+
+    def block(self, concept_type=None, return_df=False):
+        """
+        获取板块数据
+
+        :param concept_type: 板块类型 'GN', 'FG', 'ZS'
+        :param return_df: 是否返回 DataFrame
+        :return: list[Block] or pd.DataFrame
+        """
+        from kitetdx.reader import to_blocks
+
+        df = self.request('/block', concept_type=concept_type)
+        df = df if df is not None else pd.DataFrame()
+        return df if return_df else to_blocks(df)
+
+    def get_industries(self, source='tdx', **kwargs):
+        df = self.request('/industries', source=source, level=kwargs.get('level', 1))
+        return df if df is not None else pd.DataFrame()
+
+    def get_industry_stocks(self, industry_code, source='tdx', **kwargs):
+        return self.request('/industry_stocks', industry_code=industry_code, source=source) or []
+
+    def get_stock_industry(self, stock_code, source='tdx', **kwargs):
+        return self.request('/stock_industry', stock_code=stock_code, source=source)
+
+    def stats(self) -> dict:
+        """服务端缓存统计"""
+        return self.request('/stats')
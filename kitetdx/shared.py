@@ -0,0 +1,285 @@
+"""
+共享内存日线面板
+
+多进程计算因子时，每个子进程各自调用 reader.panel() 会重复读取并各占一份内存。
+SharedPanel 在主进程中把 (字段 × 日期 × 证券) 矩阵一次性写入共享内存
+(multiprocessing.shared_memory) 或内存映射文件，子进程只需拿到一个很小的描述符
+即可零拷贝地挂载同一块内存。
+
+用法::
+
+    from kitetdx.shared import SharedPanel
+
+    with SharedPanel.publish(reader, symbols, fields=['close', 'volume']) as panel:
+        with ProcessPoolExecutor(16) as pool:
+            pool.map(compute, [panel.descriptor] * 16)
+
+    def compute(descriptor):
+        with SharedPanel.attach(descriptor) as panel:
+            close = panel['close']      # pd.DataFrame，与主进程共享内存，只读
+
+生命周期:
+- 发布方 (owner) 负责释放：退出 with 块、调用 unlink() 或对象被回收时删除共享内存/文件
+- 挂载方只关闭自己的映射，不会删除数据；挂载不登记到 resource_tracker，
+  子进程退出时不会误删发布方的共享内存
+- 子进程仍在使用时发布方不应提前释放，否则之后的挂载会失败
+"""
+
+import os
+import sys
+import threading
+import weakref
+from dataclasses import dataclass, replace
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mootdx.logger import logger
+from kitetdx.panel import DEFAULT_FIELDS, fill_panel
+from kitetdx.utils import date_int_to_datetime64
+
+
+BACKENDS = ('shm', 'mmap')
+
+# 临时屏蔽 resource_tracker.register 时使用，避免多线程同时挂载互相干扰
+_register_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class PanelDescriptor:
+    """
+    共享面板描述符，可 pickle 后传给子进程
+
+    :param name: 共享内存名称或内存映射文件路径
+    :param backend: 'shm' 或 'mmap'
+    :param fields: 字段
+    :param symbols: 证券代码，对应矩阵的列
+    :param dates: 交易日 (YYYYMMDD)，对应矩阵的行
+    :param dtype: 数据类型
+    """
+    name: str
+    backend: str
+    fields: Tuple[str, ...]
+    symbols: Tuple[str, ...]
+    dates: Tuple[int, ...]
+    dtype: str = 'float64'
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return len(self.fields), len(self.dates), len(self.symbols)
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+
+def attach_segment(name: str) -> SharedMemory:
+    """
+    挂载已存在的共享内存，不登记到 resource_tracker
+
+    Python 3.13 以前挂载也会登记，挂载进程退出时 resource_tracker 会删除共享内存，
+    这里在挂载期间临时屏蔽登记。
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+
+    with _register_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _release(segment, path: Optional[str], owner: bool):
+    """关闭映射，发布方同时删除共享内存/文件"""
+    if segment is not None:
+        try:
+            segment.close()
+        except BufferError:
+            # 外部仍持有 pandas/numpy 视图，映射随这些视图一起回收
+            logger.debug(f"共享内存 {segment.name} 仍被引用，暂不关闭映射")
+
+        if owner:
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+
+    if owner and path is not None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+class SharedPanel:
+    """
+    共享内存日线面板，通过 publish() 创建或 attach() 挂载，不直接实例化
+    """
+
+    def __init__(self, descriptor: PanelDescriptor, data: np.ndarray, segment=None, owner=False):
+        self.descriptor = descriptor
+        self.owner = owner
+        self._data = data
+        self._segment = segment
+        self._index = None
+
+        path = descriptor.name if descriptor.backend == 'mmap' else None
+        self._finalizer = weakref.finalize(self, _release, segment, path, owner)
+
+    @classmethod
+    def publish(cls, reader, symbols: Sequence[str], fields: Sequence[str] = DEFAULT_FIELDS,
+                start=None, end=None, dtype='float64', path=None, **kwargs) -> 'SharedPanel':
+        """
+        读取日线并发布到共享内存
+
+        :param reader: StdReader 实例
+        :param symbols: 证券代码列表
+        :param fields: 字段列表
+        :param start: 起始日期，默认交易日历第一天
+        :param end: 截止日期，默认最后一个已知交易日
+        :param dtype: 矩阵数据类型
+        :param path: 内存映射文件路径，默认使用共享内存 (/dev/shm)；
+                     数据量超过共享内存上限或需要跨容器共享时可指定磁盘文件
+        :param kwargs: 传给 reader.daily() 的参数，如 adjust='qfq'
+        :return: SharedPanel (发布方)
+        """
+        symbols = tuple(symbols)
+        fields = tuple(fields)
+        sessions = reader.calendar.sessions_between(start, end)
+
+        if not len(sessions) or not symbols or not fields:
+            raise ValueError("共享面板为空: 没有交易日、证券或字段")
+
+        descriptor = PanelDescriptor(
+            name='', backend='mmap' if path else 'shm', fields=fields, symbols=symbols,
+            dates=tuple(int(date) for date in sessions), dtype=np.dtype(dtype).name,
+        )
+
+        if path:
+            path = str(Path(path).resolve())
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            data = np.memmap(path, dtype=dtype, mode='w+', shape=descriptor.shape)
+            segment = None
+        else:
+            segment = SharedMemory(create=True, size=descriptor.nbytes)
+            data = np.ndarray(descriptor.shape, dtype=dtype, buffer=segment.buf)
+            path = segment.name
+
+        descriptor = replace(descriptor, name=path)
+        panel = cls(descriptor, data, segment=segment, owner=True)
+
+        try:
+            data.fill(np.nan)
+            fill_panel(reader, symbols, sessions, dict(zip(fields, data)), **kwargs)
+
+            if isinstance(data, np.memmap):
+                data.flush()
+        except BaseException:
+            panel.unlink()
+            raise
+
+        logger.debug(f"已发布共享面板 {descriptor.name}: {descriptor.shape}, {descriptor.nbytes} 字节")
+        return panel
+
+    @classmethod
+    def attach(cls, descriptor: PanelDescriptor, readonly=True) -> 'SharedPanel':
+        """
+        挂载已发布的共享面板 (零拷贝)
+
+        :param descriptor: 发布方的 panel.descriptor
+        :param readonly: 是否只读，默认只读，防止子进程误改共享数据
+        :return: SharedPanel (挂载方)
+        """
+        if descriptor.backend not in BACKENDS:
+            raise ValueError(f"不支持的共享方式: {descriptor.backend}，可选 {BACKENDS}")
+
+        if descriptor.backend == 'mmap':
+            data = np.memmap(descriptor.name, dtype=descriptor.dtype, mode='r' if readonly else 'r+',
+                             shape=descriptor.shape)
+            segment = None
+        else:
+            segment = attach_segment(descriptor.name)
+            data = np.ndarray(descriptor.shape, dtype=descriptor.dtype, buffer=segment.buf)
+
+            if readonly:
+                data.flags.writeable = False
+
+        return cls(descriptor, data, segment=segment, owner=False)
+
+    @property
+    def closed(self) -> bool:
+        return self._data is None
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return self.descriptor.fields
+
+    @property
+    def symbols(self) -> Tuple[str, ...]:
+        return self.descriptor.symbols
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """交易日索引"""
+        if self._index is None:
+            dates = np.asarray(self.descriptor.dates, dtype=np.int64)
+            self._index = pd.DatetimeIndex(date_int_to_datetime64(dates), name='date')
+        return self._index
+
+    def array(self, field: str) -> np.ndarray:
+        """
+        字段对应的 (日期 × 证券) 矩阵
+
+        :param field: 字段名
+        :return: np.ndarray，共享内存的视图
+        """
+        if self.closed:
+            raise ValueError("共享面板已关闭")
+
+        try:
+            return self._data[self.fields.index(field)]
+        except ValueError:
+            raise KeyError(field) from None
+
+    def frame(self, field: str) -> pd.DataFrame:
+        """
+        字段对应的 DataFrame
+
+        :param field: 字段名
+        :return: pd.DataFrame (索引为交易日，列为证券代码)，不复制数据
+        """
+        return pd.DataFrame(self.array(field), index=self.index, columns=list(self.symbols), copy=False)
+
+    __getitem__ = frame
+
+    def to_dict(self) -> Dict[str, pd.DataFrame]:
+        """与 reader.panel() 相同格式的 {字段: DataFrame}"""
+        return {field: self.frame(field) for field in self.fields}
+
+    def close(self):
+        """关闭映射，发布方同时删除共享数据"""
+        self._data = None
+        self._finalizer()
+
+    def unlink(self):
+        """删除共享数据 (仅发布方)"""
+        if not self.owner:
+            raise RuntimeError("只有发布方可以删除共享面板")
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        role = 'owner' if self.owner else 'attached'
+        return f"SharedPanel({self.descriptor.name!r}, shape={self.descriptor.shape}, {role})"
@@ -0,0 +1,193 @@
+"""
+实时行情快照推送
+
+按固定间隔批量获取自选股的行情快照 (每次请求最多 80 只)，
+与上一次快照比较后只推送发生变化的行。
+消费者处理不过来时，推送队列满后暂停轮询 (背压)，而不是无限堆积快照。
+"""
+
+import asyncio
+import functools
+import time
+from typing import Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from mootdx.logger import logger
+
+
+# 单次行情快照请求的最大证券数量
+SNAPSHOT_BATCH_SIZE = 80
+
+# 用于判断快照是否变化的字段
+DIFF_FIELDS = (
+    'price', 'open', 'high', 'low', 'vol', 'amount',
+    'bid1', 'ask1', 'bid_vol1', 'ask_vol1',
+    'bid2', 'ask2', 'bid_vol2', 'ask_vol2',
+    'bid3', 'ask3', 'bid_vol3', 'ask_vol3',
+    'bid4', 'ask4', 'bid_vol4', 'ask_vol4',
+    'bid5', 'ask5', 'bid_vol5', 'ask_vol5',
+)
+
+
+def chunked(items: Sequence, size: int) -> List[Sequence]:
+    """按固定大小切分列表"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def diff_snapshots(previous: Optional[pd.DataFrame], current: pd.DataFrame,
+                   fields: Sequence[str] = DIFF_FIELDS) -> pd.DataFrame:
+    """
+    找出与上一次快照相比发生变化的行
+
+    :param previous: 上一次快照 (索引为代码)，None 表示首次
+    :param current: 本次快照 (索引为代码)
+    :param fields: 比较的字段
+    :return: pd.DataFrame 新出现或字段值变化的行
+    """
+    if previous is None or previous.empty:
+        return current
+
+    fields = [field for field in fields if field in current.columns and field in previous.columns]
+    before = previous[fields].reindex(current.index)
+
+    changed = (current[fields] != before).any(axis=1) | before.isna().all(axis=1)
+    return current[changed]
+
+
+class SnapshotStream(object):
+    """
+    行情快照异步迭代器
+
+    后台任务按间隔轮询快照，把变化的行放入有界队列，迭代时从队列取出。
+    """
+
+    def __init__(self, symbols: Iterable[str], interval=3.0, batch_size=SNAPSHOT_BATCH_SIZE, maxsize=1,
+                 fields: Sequence[str] = DIFF_FIELDS, workers=4, servers=None, pool=None):
+        """
+        构造函数
+
+        :param symbols: 证券代码列表
+        :param interval: 轮询间隔 (秒)
+        :param batch_size: 单次请求的证券数量，最大 80
+        :param maxsize: 推送队列长度，队列满时暂停轮询
+        :param fields: 判断变化的字段
+        :param workers: 并发连接数
+        :param servers: 服务器列表 [(ip, port), ...]
+        :param pool: 已有的 QuotesPool，传入时忽略 servers 且不会关闭该连接池
+        """
+        from kitetdx.pool import QuotesPool
+
+        self.symbols = list(dict.fromkeys(symbols))
+        self.interval = interval
+        self.batch_size = min(batch_size, SNAPSHOT_BATCH_SIZE)
+        self.fields = fields
+
+        self._owned = pool is None
+        self.pool = pool or QuotesPool(servers=servers, size=workers)
+
+        self.maxsize = maxsize
+
+        # 已完成的轮询次数
+        self.rounds = 0
+
+        self._queue = None
+        self._task = None
+        self._fetched = None
+        self._snapshot = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> pd.DataFrame:
+        if self._task is None:
+            # 在事件循环中创建队列，兼容 Python 3.8/3.9
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._fetched = asyncio.Event()
+            self._fetched.set()
+            self._task = asyncio.ensure_future(self._run())
+
+        getter = asyncio.ensure_future(self._queue.get())
+        done, _ = await asyncio.wait([getter, self._task], return_when=asyncio.FIRST_COMPLETED)
+
+        if getter in done:
+            return getter.result()
+
+        # 轮询任务异常退出
+        getter.cancel()
+        await self.aclose()
+        self._task.result()
+        raise StopAsyncIteration
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def aclose(self):
+        """停止轮询并释放连接"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        # 等待进行中的一轮请求完成，再关闭连接池
+        if self._fetched is not None:
+            await self._fetched.wait()
+
+        if self._owned:
+            self.pool.close()
+
+    async def fetch(self) -> pd.DataFrame:
+        """
+        并发获取全部证券的一次快照
+
+        :return: pd.DataFrame 索引为代码
+        """
+        loop = asyncio.get_running_loop()
+        chunks = chunked(self.symbols, self.batch_size)
+
+        results = await asyncio.gather(*[
+            loop.run_in_executor(None, functools.partial(self.pool.call, 'quotes', symbol=list(chunk)))
+            for chunk in chunks
+        ], return_exceptions=True)
+
+        frames = []
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                logger.warning(f"获取 {len(chunk)} 只证券的行情快照失败: {result}")
+            elif isinstance(result, pd.DataFrame) and not result.empty:
+                frames.append(result)
+
+        if not frames:
+            return pd.DataFrame()
+
+        return pd.concat(frames).drop_duplicates('code', keep='last').set_index('code')
+
+    def _on_fetched(self, future):
+        self.rounds += 1
+        self._fetched.set()
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+
+            # 请求已提交到线程池，取消轮询时也让本轮完成
+            self._fetched.clear()
+            fetching = asyncio.ensure_future(self.fetch())
+            fetching.add_done_callback(self._on_fetched)
+            snapshot = await asyncio.shield(fetching)
+
+            if not snapshot.empty:
+                changed = diff_snapshots(self._snapshot, snapshot, self.fields)
+                self._snapshot = snapshot if self._snapshot is None else \
+                    pd.concat([self._snapshot[~self._snapshot.index.isin(snapshot.index)], snapshot])
+
+                if not changed.empty:
+                    # 队列满时在此等待，消费者取走后才进行下一轮轮询
+                    await self._queue.put(changed)
+
+            await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
@@ -2,6 +2,7 @@ import os
 import glob
 import logging
 import pandas as pd
+from kitetdx import metrics
 from kitetdx.downloader.sws import download_sws_data, get_default_cache_dir
 from kitetdx.reader import Block
 
@@ -52,6 +53,7 @@ class SwsReader:
             
         return None, None
 
+    @metrics.timed('sws.load_data')
     def _load_data(self):
         """Load and normalize the data."""
         # If force_update, prioritize cache (newly downloaded); otherwise use built-in
@@ -0,0 +1,271 @@
+"""
+分笔成交归档
+
+通过连接池并发获取多只证券的全天历史分笔成交 (每次请求最多 800 笔，自动翻页)，
+按日期分区保存为 zstd 压缩的 Parquet 文件: {tdxdir}/ticks/{YYYYMMDD}.parquet。
+
+分区内按代码排序并以较小的行组写入，读取单只证券时通过行组统计信息跳过无关数据。
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from mootdx.consts import MARKET_SH, MARKET_SZ
+from mootdx.logger import logger
+from mootdx.quotes import to_data
+from mootdx.utils import get_stock_market
+from kitetdx.calendar import to_date_ints
+from kitetdx.utils import atomic_write, import_pyarrow
+
+
+TICK_DIRNAME = 'ticks'
+
+# 单次请求的最大分笔数量
+TICK_PAGE_SIZE = 800
+
+# 单日分笔翻页上限，防止服务器异常时无限请求
+MAX_TICK_PAGES = 200
+
+# Parquet 行组大小，越小按代码过滤时跳过的数据越多
+TICK_ROW_GROUP_SIZE = 16384
+
+TICK_COLUMNS = ['symbol', 'seq', 'time', 'price', 'vol', 'buyorsell']
+
+
+# 分笔成交接口支持的市场
+TICK_MARKETS = {'sz': MARKET_SZ, 'sh': MARKET_SH}
+
+
+def tick_symbol(symbol: str) -> str:
+    """
+    统一为带市场前缀的代码，'600000' -> 'sh600000'
+
+    沪深存在相同数字代码 (如 sh000001 上证指数与 sz000001 平安银行)，分区中以带前缀的代码区分。
+    """
+    symbol = str(symbol).strip().lower()
+    return symbol if symbol[:2] in ('sh', 'sz', 'bj') else f'{get_stock_market(symbol, True)}{symbol}'
+
+
+def history_transactions(client, symbol: str, start: int, offset: int, date: int) -> pd.DataFrame:
+    """
+    按代码前缀指定的市场请求历史分笔成交
+
+    mootdx 的 transactions 会根据数字代码重新推断市场，无法请求 sh000001 这类与深市重号的代码。
+
+    :param client: mootdx 行情客户端
+    :param symbol: 带市场前缀的证券代码
+    :param start: 起始位置
+    :param offset: 获取数量
+    :param date: 日期
+    :return: pd.DataFrame
+    """
+    market = TICK_MARKETS.get(symbol[:2])
+
+    if market is None:
+        raise ValueError(f'{symbol} 不支持获取分笔成交，目前只支持沪深市场')
+
+    return to_data(client.client.get_history_transaction_data(market, symbol[2:], start, offset, date))
+
+
+def tick_path(tdxdir, date) -> Path:
+    """
+    分笔成交分区文件路径
+
+    :param tdxdir: 通达信数据目录
+    :param date: 日期
+    :return: Path
+    """
+    return Path(tdxdir) / TICK_DIRNAME / f'{int(to_date_ints(date))}.parquet'
+
+
+def normalize_ticks(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """
+    整理单只证券一天的分笔成交为存储格式
+
+    :param df: 按时间升序的分笔成交 (time, price, vol, buyorsell)
+    :param symbol: 证券代码
+    :return: pd.DataFrame
+    """
+    return pd.DataFrame({
+        'symbol': symbol,
+        'seq': np.arange(len(df), dtype=np.int32),
+        'time': df['time'].astype(str).to_numpy(),
+        'price': df['price'].to_numpy(dtype=np.float64),
+        'vol': df['vol'].to_numpy(dtype=np.int64),
+        'buyorsell': df['buyorsell'].to_numpy(dtype=np.int8),
+    })
+
+
+def write_partition(path, df: pd.DataFrame):
+    """
+    写入日期分区，写入临时文件后原子替换
+
+    :param path: 分区文件路径
+    :param df: 分笔成交 (TICK_COLUMNS)
+    """
+    pa, pq = import_pyarrow()
+
+    df = df.sort_values(['symbol', 'seq'], kind='stable')
+    table = pa.Table.from_pandas(df[TICK_COLUMNS], preserve_index=False)
+
+    with atomic_write(path) as tmp_path:
+        pq.write_table(table, tmp_path, compression='zstd', row_group_size=TICK_ROW_GROUP_SIZE,
+                       use_dictionary=['symbol', 'time'])
+
+
+def read_ticks(tdxdir, date, symbols: Optional[Sequence[str]] = None, columns: Optional[List[str]] = None,
+               filters=None) -> pd.DataFrame:
+    """
+    读取日期分区中的分笔成交
+
+    :param tdxdir: 通达信数据目录
+    :param date: 日期
+    :param symbols: 证券代码列表，默认全部
+    :param columns: 读取的列，默认全部
+    :param filters: 额外的 pyarrow 过滤条件，如 [('vol', '>=', 1000)]
+    :return: pd.DataFrame，分区不存在时为空
+    """
+    _, pq = import_pyarrow()
+    path = tick_path(tdxdir, date)
+
+    if not path.exists():
+        return pd.DataFrame(columns=columns or TICK_COLUMNS)
+
+    conditions = list(filters or [])
+    if symbols is not None:
+        conditions.append(('symbol', 'in', [tick_symbol(symbol) for symbol in symbols]))
+
+    table = pq.read_table(path, columns=columns, filters=conditions or None)
+    return table.to_pandas()
+
+
+class TickArchiver(object):
+    """
+    分笔成交归档器
+    """
+
+    def __init__(self, tdxdir, pool=None, workers=8, servers=None):
+        """
+        构造函数
+
+        :param tdxdir: 通达信数据目录
+        :param pool: 已有的 QuotesPool，传入时忽略 servers 且不会关闭该连接池
+        :param workers: 并发线程数 (同时也是连接数)
+        :param servers: 服务器列表 [(ip, port), ...]
+        """
+        from kitetdx.pool import QuotesPool
+
+        self.tdxdir = tdxdir
+        self.workers = workers
+        self._owned = pool is None
+        self.pool = pool or QuotesPool(servers=servers, size=workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """关闭自建的连接池"""
+        if self._owned:
+            self.pool.close()
+
+    def fetch_day(self, symbol: str, date) -> pd.DataFrame:
+        """
+        获取单只证券一天的全部分笔成交
+
+        服务器从最新的成交开始分页，返回不足一页时说明已取完。
+
+        :param symbol: 证券代码，不带市场前缀时按代码推断
+        :param date: 日期
+        :return: pd.DataFrame 按时间升序 (time, price, vol, buyorsell)
+        """
+        symbol = tick_symbol(symbol)
+        date = int(to_date_ints(date))
+        pages = []
+
+        for page in range(MAX_TICK_PAGES):
+            df = self.pool.call(history_transactions, symbol=symbol, start=page * TICK_PAGE_SIZE,
+                                offset=TICK_PAGE_SIZE, date=date)
+
+            if not isinstance(df, pd.DataFrame) or df.empty:
+                break
+
+            pages.append(df)
+
+            if len(df) < TICK_PAGE_SIZE:
+                break
+        else:
+            logger.warning(f"{symbol} {date} 分笔成交超过 {MAX_TICK_PAGES} 页，已截断")
+
+        if not pages:
+            return pd.DataFrame(columns=['time', 'price', 'vol', 'buyorsell'])
+
+        return pd.concat(pages[::-1], ignore_index=True)
+
+    def archive(self, symbols: Iterable[str], dates: Iterable, overwrite=False) -> dict:
+        """
+        归档多只证券多个交易日的分笔成交
+
+        :param symbols: 证券代码列表
+        :param dates: 日期列表
+        :param overwrite: 是否重新获取分区中已存在的证券
+        :return: dict 统计信息 {'dates': 写入分区数, 'symbols': 归档证券数, 'ticks': 分笔数, 'failed': [(代码, 日期)]}
+        """
+        _, pq = import_pyarrow()
+        symbols = list(dict.fromkeys(tick_symbol(symbol) for symbol in symbols))
+        stats = {'dates': 0, 'symbols': 0, 'ticks': 0, 'failed': []}
+
+        for date in [int(to_date_ints(d)) for d in dates]:
+            path = tick_path(self.tdxdir, date)
+
+            # 只读取代码列判断已归档的证券
+            done = set()
+            if path.exists() and not overwrite:
+                done = set(pq.read_table(path, columns=['symbol']).column('symbol').unique().to_pylist())
+
+            todo = [symbol for symbol in symbols if symbol not in done]
+
+            if not todo:
+                continue
+
+            def fetch(symbol):
+                try:
+                    return self.fetch_day(symbol, date)
+                except Exception as e:
+                    logger.warning(f"获取 {symbol} {date} 分笔成交失败: {e}")
+                    return None
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = dict(zip(todo, executor.map(fetch, todo)))
+
+            frames = []
+            for symbol, df in results.items():
+                if df is None:
+                    stats['failed'].append((symbol, date))
+                elif not df.empty:
+                    frames.append(normalize_ticks(df, symbol))
+
+            if not frames:
+                continue
+
+            fetched = pd.concat(frames, ignore_index=True)
+
+            # 分区中其他证券的数据原样保留，重新获取的证券以新数据为准
+            kept = pd.DataFrame(columns=TICK_COLUMNS)
+            if path.exists():
+                kept = read_ticks(self.tdxdir, date, filters=[('symbol', 'not in', list(fetched['symbol'].unique()))])
+
+            write_partition(path, pd.concat([kept, fetched], ignore_index=True) if not kept.empty else fetched)
+
+            stats['dates'] += 1
+            stats['symbols'] += len(frames)
+            stats['ticks'] += len(fetched)
+
+        logger.info(f"分笔成交归档完成: {stats['dates']} 个分区, {stats['symbols']} 只证券, {stats['ticks']} 笔")
+        return stats
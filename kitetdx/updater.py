@@ -0,0 +1,254 @@
+"""
+日线增量更新
+
+只从行情服务器拉取本地 .day 文件缺失的最近若干根 K 线并追加到文件末尾，
+避免每天重新下载完整的 hsjday.zip。
+"""
+
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from mootdx.logger import logger
+from kitetdx.pool import CONNECTION_ERRORS
+from kitetdx.records import append_daily, is_index, read_last_daily
+
+
+# 通达信行情协议中的市场代码
+MARKET_CODES = {'sz': 0, 'sh': 1, 'bj': 2}
+
+# 日线 K 线类别
+DAILY_CATEGORY = 9
+
+# 单次请求的最大 K 线数量
+MAX_BARS_PER_REQUEST = 800
+
+# 多取几根，覆盖盘中未完成的当日 K 线
+FETCH_PADDING = 2
+
+# auto 模式下，落后超过该交易日数时改用全量下载
+DELTA_MAX_SESSIONS = 20
+
+# 自建连接池的连接数 (同时也是并发更新的文件数)
+DELTA_WORKERS = 8
+
+
+def to_date_int(date) -> int:
+    """datetime.date -> YYYYMMDD 整数"""
+    return date.year * 10000 + date.month * 100 + date.day
+
+
+def from_date_int(value) -> datetime.date:
+    """YYYYMMDD 整数 -> datetime.date"""
+    value = int(value)
+    return datetime.date(value // 10000, value // 100 % 100, value % 100)
+
+
+def count_sessions(last_date: datetime.date, target_date: datetime.date, calendar=None) -> int:
+    """
+    last_date (不含) 到 target_date (含) 之间的交易日数量
+
+    没有交易日历时只排除周末，节假日会使估算值偏大，多取的 K 线会被日期过滤掉。
+    """
+    if target_date <= last_date:
+        return 0
+
+    if calendar is not None:
+        return calendar.count(to_date_int(last_date), to_date_int(target_date))
+
+    return int(np.busday_count(last_date + datetime.timedelta(days=1), target_date + datetime.timedelta(days=1)))
+
+
+def iter_daily_files(tdxdir, markets: Iterable[str] = ('sh', 'sz', 'bj')):
+    """
+    遍历本地全部日线文件
+
+    :param tdxdir: 通达信数据目录
+    :param markets: 市场列表
+    :return: Path 迭代器
+    """
+    for market in markets:
+        lday_dir = Path(tdxdir) / 'vipdoc' / market / 'lday'
+        if lday_dir.exists():
+            yield from sorted(lday_dir.glob('*.day'))
+
+
+def daily_bars(client, market: int, code: str, count: int, index=False) -> List[dict]:
+    """
+    获取最近的 count 根日线
+
+    :param client: mootdx 行情客户端
+    :param market: 市场代码
+    :param code: 证券代码
+    :param count: K 线数量
+    :param index: 是否为指数
+    :return: list[dict]
+    """
+    api = client.client
+
+    if index:
+        return api.get_index_bars(DAILY_CATEGORY, market, code, 0, count) or []
+
+    return api.get_security_bars(DAILY_CATEGORY, market, code, 0, count) or []
+
+
+class DeltaUpdater(object):
+    """
+    日线增量更新器
+
+    读取每个 .day 文件的最后一条记录，按缺失的交易日数向服务器请求最近的 K 线，
+    过滤出新的日期后以原生二进制格式追加到文件末尾。
+    """
+
+    def __init__(self, tdxdir, client=None, calendar=None, pool=None, workers=DELTA_WORKERS):
+        """
+        构造函数
+
+        :param tdxdir: 通达信数据目录
+        :param client: mootdx 行情客户端 (Quotes.factory 的返回值)，传入时通过该连接逐个请求
+        :param calendar: 交易日历，默认由本地上证指数推导
+        :param pool: 已有的 QuotesPool，传入时不会关闭该连接池
+        :param workers: 未传入 client 和 pool 时自建连接池的连接数
+        """
+        from kitetdx.calendar import get_calendar
+
+        self.tdxdir = tdxdir
+        self.calendar = calendar if calendar is not None else get_calendar(tdxdir)
+        self.workers = workers
+        self._client = client
+        self._pool = pool
+        self._owned = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def pool(self):
+        """Lazy-created 行情连接池"""
+        if self._pool is None:
+            from kitetdx.pool import QuotesPool
+
+            self._pool = QuotesPool(size=self.workers)
+            self._owned = True
+        return self._pool
+
+    def close(self):
+        """关闭自建的连接池"""
+        if self._owned:
+            self._pool.close()
+            self._pool = None
+            self._owned = False
+
+    def fetch_bars(self, path: Path, count: int) -> List[dict]:
+        """
+        从服务器获取指定文件对应证券最近的 count 根日线
+
+        :param path: .day 文件路径
+        :param count: K 线数量
+        :return: list[dict]
+        """
+        market = MARKET_CODES[path.stem[:2].lower()]
+        code = path.stem[2:]
+
+        if self._client is not None:
+            return daily_bars(self._client, market, code, count, index=is_index(path))
+
+        return self.pool.call(daily_bars, market, code, count, index=is_index(path))
+
+    def latest_session(self):
+        """
+        服务器上参考指数最新一根日线的日期，用于识别本地日历之后的节假日
+
+        :return: datetime.date or None
+        """
+        from kitetdx.calendar import CALENDAR_SYMBOL
+
+        path = Path(self.tdxdir) / 'vipdoc' / CALENDAR_SYMBOL[:2] / 'lday' / f'{CALENDAR_SYMBOL}.day'
+        bars = self.fetch_bars(path, 1)
+
+        if not bars:
+            return None
+
+        return datetime.date(bars[-1]['year'], bars[-1]['month'], bars[-1]['day'])
+
+    def update_file(self, path, target_date: datetime.date) -> int:
+        """
+        补齐单个 .day 文件
+
+        :param path: .day 文件路径
+        :param target_date: 需要补齐到的交易日
+        :return: 追加的 K 线数量
+        """
+        path = Path(path)
+        last = read_last_daily(path)
+
+        if last is None:
+            logger.debug(f"{path.name} 为空文件，跳过增量更新")
+            return 0
+
+        last_date = from_date_int(last['date'])
+        sessions = count_sessions(last_date, target_date, self.calendar)
+
+        if sessions == 0:
+            return 0
+
+        count = sessions + FETCH_PADDING
+        if count > MAX_BARS_PER_REQUEST:
+            raise ValueError(f"{path.name} 缺失 {sessions} 个交易日，超出增量更新范围")
+
+        bars = pd.DataFrame(self.fetch_bars(path, count))
+        if bars.empty:
+            return 0
+
+        bars['date'] = bars['year'] * 10000 + bars['month'] * 100 + bars['day']
+
+        # 返回的 K 线都晚于本地最后日期，说明缺口比请求范围更大，不能直接追加
+        if len(bars) >= count and bars['date'].min() > last['date']:
+            raise ValueError(f"{path.name} 本地数据与服务器数据之间存在缺口")
+
+        bars = bars[(bars['date'] > last['date']) & (bars['date'] <= to_date_int(target_date))]
+        bars = bars.drop_duplicates('date').sort_values('date')
+
+        return append_daily(path, bars.rename(columns={'vol': 'volume'}))
+
+    def update(self, target_date: datetime.date, symbols: Optional[Iterable[str]] = None) -> dict:
+        """
+        增量更新全部 (或指定) 日线文件
+
+        通过连接池并发请求，单个文件请求或校验失败时记录到 failed，不影响其他文件。
+
+        :param target_date: 需要补齐到的交易日
+        :param symbols: 文件名列表 (如 'sh600000')，默认全部
+        :return: dict 统计信息 {'files': 更新文件数, 'bars': 追加 K 线数, 'failed': 失败文件列表}
+        """
+        stats = {'files': 0, 'bars': 0, 'failed': []}
+        wanted = {s.lower() for s in symbols} if symbols is not None else None
+        paths = [path for path in iter_daily_files(self.tdxdir) if wanted is None or path.stem.lower() in wanted]
+
+        def update(path):
+            try:
+                return self.update_file(path, target_date)
+            except (KeyError, ValueError) + CONNECTION_ERRORS as e:
+                logger.warning(f"增量更新 {path.name} 失败: {e}")
+                return None
+
+        # 单个客户端连接不能并发使用
+        workers = 1 if self._client is not None else self.pool.size
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for path, appended in zip(paths, executor.map(update, paths)):
+                if appended is None:
+                    stats['failed'].append(path.stem)
+                elif appended:
+                    stats['files'] += 1
+                    stats['bars'] += appended
+
+        logger.info(f"增量更新完成: {stats['files']} 个文件, {stats['bars']} 根 K 线, 失败 {len(stats['failed'])} 个")
+        return stats
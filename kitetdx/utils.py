@@ -1,11 +1,31 @@
+import contextlib
 import logging
+import os
+import stat
+import tempfile
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
+from kitetdx import metrics
+
 
 logger = logging.getLogger(__name__)
 
 
+def _current_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# 导入时读取一次 umask，避免写文件时临时修改进程的 umask 影响其他线程
+UMASK = _current_umask()
+
+
+@metrics.timed('utils.to_data')
 def to_data(v, **kwargs):
     """
     数值转换为 pd.DataFrame，并支持复权处理
@@ -13,20 +33,11 @@ def to_data(v, **kwargs):
     :param v: 输入数据，支持 DataFrame、list、dict
     :param symbol: 股票代码（复权时需要）
     :param adjust: 复权方式，'qfq'/'01' 前复权，'hfq'/'02' 后复权
+    :param factors: 已有的复权因子，见 kitetdx.adjust.to_adjust
     :return: pd.DataFrame
     """
     symbol = kwargs.get('symbol')
-    adjust = kwargs.get('adjust', '')
-    
-    # 标准化复权参数
-    if adjust:
-        adjust = adjust.lower()
-        if adjust in ['01', 'qfq', 'before']:
-            adjust = 'qfq'
-        elif adjust in ['02', 'hfq', 'after']:
-            adjust = 'hfq'
-        else:
-            adjust = None
+    adjust = normalize_adjust(kwargs.get('adjust'))
 
     # 空值处理
     if not isinstance(v, DataFrame) and not v:
@@ -42,25 +53,120 @@ def to_data(v, **kwargs):
     else:
         result = pd.DataFrame(data=[])
 
-    # 设置日期索引
-    if 'datetime' in result.columns:
-        result.index = pd.to_datetime(result.datetime)
-
-    if 'date' in result.columns:
-        result.index = pd.to_datetime(result.date)
+    # 设置日期索引，只构建一次 (date 优先于 datetime)
+    index = to_datetime_index(result)
+    if index is not None:
+        result.index = index
 
-    # 统一成交量列名
+    # 统一成交量列名，直接重命名而不是复制一列
     if 'vol' in result.columns:
-        result['volume'] = result.vol
+        result = result.drop(columns='volume') if 'volume' in result.columns else result
+        result = result.rename(columns={'vol': 'volume'})
 
     # 复权处理
     if adjust and adjust in ['qfq', 'hfq'] and symbol:
         from kitetdx.adjust import to_adjust
-        result = to_adjust(result, symbol=symbol, adjust=adjust)
+        result = to_adjust(result, symbol=symbol, adjust=adjust, factors=kwargs.get('factors'))
 
     return result
 
 
+def normalize_adjust(adjust):
+    """
+    标准化复权参数
+
+    :param adjust: 'qfq'/'01'/'before' 前复权，'hfq'/'02'/'after' 后复权
+    :return: 'qfq', 'hfq' 或 None
+    """
+    if not adjust:
+        return None
+
+    adjust = str(adjust).lower()
+    if adjust in ['01', 'qfq', 'before']:
+        return 'qfq'
+    if adjust in ['02', 'hfq', 'after']:
+        return 'hfq'
+    return None
+
+
+def date_int_to_datetime64(dates):
+    """
+    YYYYMMDD 整数转换为 datetime64[D]，纯向量化运算
+
+    :param dates: 整数数组，如 [20240102, 20240103]
+    :return: np.ndarray (datetime64[D])
+    """
+    dates = np.asarray(dates, dtype=np.int64)
+    years = (dates // 10000 - 1970).astype('M8[Y]')
+    months = (dates // 100 % 100 - 1).astype('m8[M]')
+    days = (dates % 100 - 1).astype('m8[D]')
+    return (years + months).astype('M8[D]') + days
+
+
+def minute_int_to_datetime64(dates, minutes):
+    """
+    通达信分钟线打包的日期和分钟数转换为 datetime64[m]
+
+    日期为 (年 - 2004) * 2048 + 月 * 100 + 日，分钟数为从 0 点开始的分钟数。
+
+    :param dates: 打包的日期数组
+    :param minutes: 分钟数数组
+    :return: np.ndarray (datetime64[m])
+    """
+    dates = np.asarray(dates, dtype=np.int64)
+    years = dates // 2048 + 2004
+    rest = dates % 2048
+    days = date_int_to_datetime64(years * 10000 + rest).astype('M8[m]')
+    return days + np.asarray(minutes, dtype=np.int64).astype('m8[m]')
+
+
+def to_datetime_index(df: DataFrame):
+    """
+    根据 date / datetime 列构建 DatetimeIndex
+
+    整数 YYYYMMDD 和 year/month/day(/hour/minute) 分量列直接用向量化运算转换，
+    其他格式 (如字符串) 才交给 pd.to_datetime 解析。
+
+    :param df: pd.DataFrame
+    :return: pd.DatetimeIndex，没有日期列时为 None
+    """
+    column = 'date' if 'date' in df.columns else 'datetime' if 'datetime' in df.columns else None
+
+    if column is None:
+        return None
+
+    values = df[column]
+
+    if {'year', 'month', 'day'}.issubset(df.columns):
+        dates = date_int_to_datetime64(df['year'] * 10000 + df['month'] * 100 + df['day'])
+        if {'hour', 'minute'}.issubset(df.columns):
+            minutes = np.asarray(df['hour'] * 60 + df['minute'], dtype=np.int64).astype('m8[m]')
+            dates = dates.astype('M8[m]') + minutes
+        index = dates
+    elif pd.api.types.is_integer_dtype(values):
+        index = date_int_to_datetime64(values)
+    else:
+        return pd.DatetimeIndex(pd.to_datetime(values), name=column)
+
+    return pd.DatetimeIndex(index.astype('M8[ns]'), name=column)
+
+
+def datetime64_to_date_int(dates):
+    """
+    datetime64 (或 DatetimeIndex) 转换为 YYYYMMDD 整数
+
+    :param dates: datetime64 数组
+    :return: np.ndarray (int32)
+    """
+    days = np.asarray(dates, dtype='M8[D]')
+    years = days.astype('M8[Y]')
+    months = days.astype('M8[M]')
+    year = years.astype(np.int64) + 1970
+    month = (months - years).astype(np.int64) + 1
+    day = (days - months).astype(np.int64) + 1
+    return (year * 10000 + month * 100 + day).astype(np.int32)
+
+
 def read_data(file_path):
     """
     读取文件内容
@@ -74,3 +180,53 @@ def read_data(file_path):
     except Exception as e:
         logger.error(f"读取文件时出错: {e}")
         return None
+
+
+def import_pyarrow():
+    """
+    延迟导入 pyarrow (可选依赖)
+
+    :return: (pyarrow, pyarrow.parquet)
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            f"该功能需要 pyarrow，请安装: pip install kitetdx[parquet]\n"
+            f"错误信息: {e}"
+        ) from e
+
+    return pyarrow, pyarrow.parquet
+
+
+@contextlib.contextmanager
+def atomic_write(filename, prefix=None):
+    """
+    原子写入文件: 先写入同目录下的临时文件，成功后替换目标文件，失败时删除临时文件
+
+    tempfile 创建的临时文件权限为 0600，替换前改为原文件的权限，新文件按 umask 设置 (通常为 0644)。
+
+    :param filename: 目标文件路径
+    :param prefix: 临时文件名前缀，默认为 '{文件名}.'
+    :return: 上下文管理器，返回供写入的临时文件路径 (str)
+    """
+    path = Path(filename)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=prefix or f'{path.name}.', suffix='.tmp', dir=path.parent)
+    os.close(fd)
+
+    try:
+        yield tmp_path
+
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~UMASK
+
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
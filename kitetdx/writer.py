@@ -0,0 +1,208 @@
+"""
+通达信二进制文件写入
+
+按原生记录格式批量写入日线 (.day) 和分钟线 (.lc1/.lc5)，写入结果可以直接被
+StdReader.daily() / minute() 以及通达信客户端读取。用于保存本地计算的自定义指数、
+用在线数据补齐缺口、快速生成大规模测试数据。
+
+写入方式:
+- 'append'  只追加晚于文件最后一根 K 线的数据 (原地追加，先截断末尾不完整的记录)
+- 'merge'   与已有数据按时间合并，相同时间以新数据为准，可用于补齐中间的缺口
+- 'rewrite' 用新数据替换整个文件
+
+'merge' 和 'rewrite' 先写入临时文件再原子替换，中途失败不会损坏原文件。
+"""
+
+import os
+from pathlib import Path
+from typing import Mapping, Union
+
+import numpy as np
+import pandas as pd
+
+from kitetdx.records import DAY_RECORD, LC_RECORD, security_coefficient
+from kitetdx.utils import atomic_write, date_int_to_datetime64, datetime64_to_date_int
+
+
+WRITE_MODES = ('append', 'merge', 'rewrite')
+
+Bars = Union[pd.DataFrame, Mapping[str, np.ndarray]]
+
+# lc 文件的日期以 (年 - 2004) * 2048 + 月 * 100 + 日 存为 uint16
+LC_MIN_YEAR = 2004
+LC_MAX_YEAR = 2035
+
+
+def bar_times(bars: Bars, key='date') -> np.ndarray:
+    """
+    取出 K 线的时间
+
+    优先使用 key 列 (YYYYMMDD 整数或日期时间)，没有时使用 DatetimeIndex。
+
+    :param bars: pd.DataFrame 或 {列名: np.ndarray}
+    :param key: 时间列名
+    :return: np.ndarray (datetime64[m])
+    """
+    if key in bars:
+        values = np.asarray(bars[key])
+    elif isinstance(bars, pd.DataFrame) and isinstance(bars.index, pd.DatetimeIndex):
+        values = bars.index.values
+    else:
+        raise ValueError(f"K 线数据缺少时间: 需要 {key} 列或 DatetimeIndex")
+
+    if np.issubdtype(values.dtype, np.integer):
+        return date_int_to_datetime64(values).astype('M8[m]')
+
+    return pd.DatetimeIndex(values).values.astype('M8[m]')
+
+
+def day_records(bars: Bars, filename) -> np.ndarray:
+    """
+    日线转换为 .day 原生记录
+
+    价格和成交量使用 StdReader.daily() 的输出单位，按文件名对应的证券类型缩放。
+
+    :param bars: 包含 open, high, low, close, amount, volume 及时间 (date 列或 DatetimeIndex)
+    :param filename: 目标 .day 文件路径，用于确定缩放系数
+    :return: np.ndarray (DAY_RECORD)
+    """
+    price_coef, volume_coef = security_coefficient(filename)
+    times = bar_times(bars)
+
+    records = np.zeros(len(times), dtype=DAY_RECORD)
+    records['date'] = datetime64_to_date_int(times)
+
+    for col in ('open', 'high', 'low', 'close'):
+        records[col] = np.rint(np.asarray(bars[col], dtype=np.float64) / price_coef)
+
+    records['amount'] = np.asarray(bars['amount'], dtype=np.float64)
+    records['volume'] = np.rint(np.asarray(bars['volume'], dtype=np.float64) / volume_coef)
+
+    return records
+
+
+def lc_records(bars: Bars) -> np.ndarray:
+    """
+    分钟线转换为 .lc1/.lc5 原生记录
+
+    :param bars: 包含 open, high, low, close, amount, volume 及时间 (date 列或 DatetimeIndex)
+    :return: np.ndarray (LC_RECORD)
+    """
+    times = bar_times(bars)
+    days = times.astype('M8[D]')
+
+    years = days.astype('M8[Y]').astype(np.int64) + 1970
+    if len(years) and (years.min() < LC_MIN_YEAR or years.max() > LC_MAX_YEAR):
+        raise ValueError(f"分钟线日期超出 lc 文件可表示的范围 ({LC_MIN_YEAR}-{LC_MAX_YEAR})")
+
+    dates = datetime64_to_date_int(days).astype(np.int64)
+
+    records = np.zeros(len(times), dtype=LC_RECORD)
+    records['date'] = (years - LC_MIN_YEAR) * 2048 + dates % 10000
+    records['minute'] = (times - days).astype(np.int64)
+
+    for col in ('open', 'high', 'low', 'close', 'amount'):
+        records[col] = np.asarray(bars[col], dtype=np.float64)
+
+    records['volume'] = np.rint(np.asarray(bars['volume'], dtype=np.float64))
+
+    return records
+
+
+def record_keys(records: np.ndarray) -> np.ndarray:
+    """记录的排序键，日线为日期，分钟线为打包日期 * 1440 + 分钟数"""
+    if records.dtype == LC_RECORD:
+        return records['date'].astype(np.int64) * 1440 + records['minute']
+    return records['date'].astype(np.int64)
+
+
+def read_records(filename, dtype: np.dtype) -> np.ndarray:
+    """读取全部完整记录，文件不存在时返回空数组"""
+    if not os.path.exists(filename):
+        return np.zeros(0, dtype=dtype)
+    return np.fromfile(filename, dtype=dtype, count=os.path.getsize(filename) // dtype.itemsize)
+
+
+def replace_file(filename, records: np.ndarray):
+    """写入临时文件后原子替换，保留原文件的权限"""
+    with atomic_write(filename) as tmp_path:
+        records.tofile(tmp_path)
+
+
+def write_records(filename, records: np.ndarray, mode='append') -> int:
+    """
+    按写入方式写入原生记录
+
+    :param filename: 目标文件路径
+    :param records: DAY_RECORD 或 LC_RECORD 数组
+    :param mode: 'append', 'merge' 或 'rewrite'
+    :return: int 写入 (追加或合并后新增/更新) 的记录数
+    """
+    if mode not in WRITE_MODES:
+        raise ValueError(f"不支持的写入方式: {mode}，可选 {WRITE_MODES}")
+
+    # 同一时间出现多次时保留最后一条
+    keys = record_keys(records)
+    order = np.argsort(keys, kind='stable')
+    keys, records = keys[order], records[order]
+    last = np.r_[keys[1:] != keys[:-1], True] if len(keys) else np.zeros(0, dtype=bool)
+    keys, records = keys[last], records[last]
+
+    if mode == 'rewrite':
+        replace_file(filename, records)
+        return len(records)
+
+    existing = read_records(filename, records.dtype)
+
+    if mode == 'merge':
+        if len(existing):
+            kept = existing[~np.isin(record_keys(existing), keys)]
+            merged = np.concatenate([kept, records])
+            records = merged[np.argsort(record_keys(merged), kind='stable')]
+            count = len(records) - len(kept)
+        else:
+            count = len(records)
+
+        replace_file(filename, records)
+        return count
+
+    if len(existing):
+        records = records[keys > record_keys(existing[-1:])[0]]
+
+    if not len(records):
+        return 0
+
+    path = Path(filename)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, 'ab') as f:
+        size = f.tell()
+        if size % records.dtype.itemsize:
+            f.truncate(size - size % records.dtype.itemsize)
+        f.write(records.tobytes())
+
+    return len(records)
+
+
+def write_daily(filename, bars: Bars, mode='append') -> int:
+    """
+    写入 .day 日线文件
+
+    :param filename: .day 文件路径，文件名需带市场前缀 (如 sh600000.day) 以确定缩放系数
+    :param bars: 日线数据，格式见 day_records
+    :param mode: 'append', 'merge' 或 'rewrite'
+    :return: int 写入的记录数
+    """
+    return write_records(filename, day_records(bars, filename), mode=mode)
+
+
+def write_minute(filename, bars: Bars, mode='append') -> int:
+    """
+    写入 .lc1/.lc5 分钟线文件
+
+    :param filename: .lc1/.lc5 文件路径
+    :param bars: 分钟线数据，格式见 lc_records
+    :param mode: 'append', 'merge' 或 'rewrite'
+    :return: int 写入的记录数
+    """
+    return write_records(filename, lc_records(bars), mode=mode)
@@ -0,0 +1,248 @@
+"""
+本地模拟的通达信行情服务器，只实现测试用到的协议子集
+"""
+
+import math
+import socket
+import socketserver
+import struct
+import threading
+from collections import Counter
+
+CMD_SETUP = (0x000D, 0x0FDB)
+CMD_BARS = 0x052D
+CMD_QUOTES = 0x053E
+CMD_HISTORY_TRANSACTIONS = 0x0FB5
+
+INDEX_HEADS = {1: ('000', '880', '999'), 0: ('399',)}
+
+
+def encode_price(value: int) -> bytes:
+    """tdxpy.helper.get_price 的逆运算"""
+    sign = value < 0
+    value = abs(value)
+
+    first = (value & 0x3F) | (0x40 if sign else 0)
+    value >>= 6
+
+    out = [first | (0x80 if value else 0)]
+    while value:
+        byte = value & 0x7F
+        value >>= 7
+        out.append(byte | (0x80 if value else 0))
+
+    return bytes(out)
+
+
+def encode_volume(value: float) -> int:
+    """tdxpy.helper.get_volume 的逆运算，tdxpy 对小于 128 的值解码有误，测试数据应避开"""
+    if value <= 0:
+        return 0
+
+    exponent = math.floor(math.log2(value))
+
+    if (exponent + 127) % 2 == 0:
+        logpoint = (exponent + 127) // 2
+        frac = value / 2.0 ** exponent - 1
+        high = int(frac * 128)
+        rem = frac * 128 - high
+    else:
+        logpoint = (exponent + 126) // 2
+        frac = value / 2.0 ** (exponent - 1) - 2
+        high = int(frac * 64)
+        rem = frac * 64 - high
+        high |= 0x80
+
+    mid = int(rem * 256)
+    low = min(255, round((rem * 256 - mid) * 256))
+
+    return (logpoint << 24) | (high << 16) | (mid << 8) | low
+
+
+def encode_bars(bars, category, index=False) -> bytes:
+    body = bytearray(struct.pack('<H', len(bars)))
+    pre_close = 0
+
+    for bar in bars:
+        date = bar['date']
+        if category < 4 or category in (7, 8):
+            zip_day = (date // 10000 - 2004) * 2048 + date % 10000
+            body += struct.pack('<HH', zip_day, bar.get('hour', 15) * 60 + bar.get('minute', 0))
+        else:
+            body += struct.pack('<I', date)
+
+        open_, close, high, low = (round(bar[k] * 1000) for k in ('open', 'close', 'high', 'low'))
+
+        body += encode_price(open_ - pre_close)
+        body += encode_price(close - open_)
+        body += encode_price(high - open_)
+        body += encode_price(low - open_)
+        body += struct.pack('<II', encode_volume(bar['vol']), encode_volume(bar['amount']))
+
+        if index:
+            body += struct.pack('<HH', bar.get('up_count', 0), bar.get('down_count', 0))
+
+        pre_close = close
+
+    return bytes(body)
+
+
+def encode_quotes(stocks) -> bytes:
+    """
+    编码实时行情快照，价格按 A 股系数 0.01 缩放
+
+    :param stocks: [(market, code, quote), ...]，quote 为包含 price, last_close, open, high, low, vol, amount 的 dict
+    """
+    body = bytearray(struct.pack('<HH', 0, len(stocks)))
+
+    for market, code, quote in stocks:
+        price = round(quote['price'] * 100)
+
+        def diff(key):
+            return encode_price(round(quote.get(key, 0) * 100) - price if key in quote else 0)
+
+        body += struct.pack('<B6sH', market, code.encode(), 0)
+        body += encode_price(price)
+        body += diff('last_close') + diff('open') + diff('high') + diff('low')
+        body += encode_price(0) + encode_price(0)
+        body += encode_price(int(quote.get('vol', 0))) + encode_price(int(quote.get('cur_vol', 0)))
+        body += struct.pack('<I', encode_volume(quote.get('amount', 0)))
+        body += encode_price(0) * 4
+
+        for level in range(1, 6):
+            body += diff(f'bid{level}') + diff(f'ask{level}')
+            body += encode_price(int(quote.get(f'bid_vol{level}', 0)))
+            body += encode_price(int(quote.get(f'ask_vol{level}', 0)))
+
+        body += struct.pack('<H', 0) + encode_price(0) * 4 + struct.pack('<hH', 0, 0)
+
+    return bytes(body)
+
+
+def encode_transactions(ticks) -> bytes:
+    """
+    编码历史分笔成交
+
+    :param ticks: [tick, ...]，tick 为包含 time ('HH:MM'), price, vol, buyorsell 的 dict
+    """
+    body = bytearray(struct.pack('<HI', len(ticks), 0))
+    last_price = 0
+
+    for tick in ticks:
+        hour, minute = map(int, tick['time'].split(':'))
+        price = round(tick['price'] * 100)
+
+        body += struct.pack('<H', hour * 60 + minute)
+        body += encode_price(price - last_price) + encode_price(int(tick['vol']))
+        body += encode_price(int(tick.get('buyorsell', 0))) + encode_price(0)
+
+        last_price = price
+
+    return bytes(body)
+
+
+class FakeTdxServer(object):
+    """
+    模拟行情服务器
+
+    :param bars: {(market, code): [bar, ...]}，bar 为包含 date, open, close, high, low, vol, amount 的 dict，按时间升序
+    :param quotes: {(market, code): quote}，实时行情快照，测试中可随时修改
+    :param ticks: {(market, code, date): [tick, ...]}，历史分笔成交，按时间升序
+    """
+
+    def __init__(self, bars=None, quotes=None, ticks=None):
+        self.bars = bars or {}
+        self.quotes = quotes if quotes is not None else {}
+        self.ticks = ticks or {}
+        self.requests = Counter()
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                server._handle(self.request)
+
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _handle(self, sock):
+        while True:
+            prefix = _recv_exact(sock, 10)
+            if not prefix:
+                return
+
+            (length,) = struct.unpack('<H', prefix[6:8])
+            body = _recv_exact(sock, length)
+            if body is None:
+                return
+
+            (cmd,) = struct.unpack('<H', body[:2])
+
+            with self._lock:
+                self.requests[cmd] += 1
+
+            response = self.respond(cmd, body)
+            sock.sendall(struct.pack('<IIIHH', 0, 0, 0, len(response), len(response)) + response)
+
+    def respond(self, cmd, body) -> bytes:
+        if cmd in CMD_SETUP:
+            return b'\x00'
+
+        if cmd == CMD_BARS:
+            market, code, category, _, start, count = struct.unpack('<H6sHHHH', body[2:18])
+            code = code.decode()
+            data = self.bars.get((market, code), [])
+            end = max(len(data) - start, 0)
+            index = code.startswith(INDEX_HEADS.get(market, ()))
+            return encode_bars(data[max(end - count, 0):end], category, index=index)
+
+        if cmd == CMD_QUOTES:
+            (count,) = struct.unpack('<H', body[10:12])
+            stocks = []
+            for i in range(count):
+                market, code = struct.unpack('<B6s', body[12 + i * 7:19 + i * 7])
+                key = (market, code.decode())
+                if key in self.quotes:
+                    stocks.append((market, key[1], dict(self.quotes[key])))
+            return encode_quotes(stocks)
+
+        if cmd == CMD_HISTORY_TRANSACTIONS:
+            date, market, code, start, count = struct.unpack('<IH6sHH', body[2:18])
+            data = self.ticks.get((market, code.decode(), date), [])
+            end = max(len(data) - start, 0)
+            return encode_transactions(data[max(end - count, 0):end])
+
+        raise NotImplementedError(f'unsupported command {cmd:#x}')
+
+
+def _recv_exact(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        try:
+            chunk = sock.recv(size - len(buf))
+        except (ConnectionError, socket.timeout):
+            return None
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
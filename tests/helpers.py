@@ -0,0 +1,70 @@
+"""
+测试共用的数据构造函数：本地日线文件、gbbq 密钥与权息文件
+"""
+
+import numpy as np
+import pandas as pd
+
+from kitetdx.gbbq import GBBQ_RECORD, KEY_SIZE, encode_records, gbbq_path, load_key
+from kitetdx.records import append_daily
+
+# 2024-10-01 ~ 2024-10-07 国庆休市
+SESSIONS = [20240926, 20240927, 20240930, 20241008, 20241009, 20241010]
+
+
+def daily_bars(dates, closes):
+    return pd.DataFrame({'date': dates, 'open': closes, 'high': closes, 'low': closes, 'close': closes,
+                         'amount': 1e6, 'volume': 1000.0})
+
+
+def write_bars(tdxdir, name, dates, close=10.0):
+    path = tdxdir / 'vipdoc' / name[:2] / 'lday' / f'{name}.day'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    append_daily(path, pd.DataFrame({
+        'date': dates,
+        'open': close, 'high': close, 'low': close, 'close': close,
+        'amount': 1e6, 'volume': 1000.0,
+    }))
+    return path
+
+
+def make_day_file(tdxdir, name, dates):
+    path = tdxdir / 'vipdoc' / name[:2] / 'lday' / f'{name}.day'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    append_daily(path, pd.DataFrame({
+        'date': dates,
+        'open': 10.0, 'high': 11.0, 'low': 9.5, 'close': 10.5,
+        'amount': 1e6, 'volume': 1000.0,
+    }))
+    return path
+
+
+def make_key(tmp_path):
+    path = tmp_path / 'gbbq.key'
+    path.write_bytes(np.random.default_rng(1).integers(0, 2 ** 32, KEY_SIZE // 4, dtype=np.uint32).tobytes())
+    return path
+
+
+def make_gbbq(tmp_path, key_path):
+    records = np.zeros(4, dtype=GBBQ_RECORD)
+    records[0] = (1, b'600000', 20240930, 1, 1.0, 0.0, 10.0, 0.0)      # 每 10 股派 1 元送 10 股
+    records[1] = (1, b'600000', 20240926, 5, 100.0, 200.0, 150.0, 250.0)
+    records[2] = (0, b'000001', 20241008, 1, 5.0, 0.0, 0.0, 0.0)
+    records[3] = (0, b'000001', 20250101, 1, 5.0, 0.0, 0.0, 0.0)       # 本地数据之后的事件忽略
+
+    path = gbbq_path(tmp_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(encode_records(records, load_key(key_path)))
+    return path
+
+
+def add_event(tmp_path, key_path, record):
+    """在已有的 gbbq 文件末尾追加一条记录"""
+    records = np.zeros(1, dtype=GBBQ_RECORD)
+    records[0] = record
+
+    path = gbbq_path(tmp_path)
+    content = path.read_bytes()
+    count = int(np.frombuffer(content[:4], dtype='<u4')[0])
+    path.write_bytes(np.uint32(count + 1).tobytes() + content[4:]
+                     + encode_records(records, load_key(key_path))[4:])
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kitetdx import Reader
+from kitetdx.gbbq import GBBQ_RECORD, encode_records, gbbq_path, load_key
+from kitetdx.writer import write_daily
+from tests.helpers import SESSIONS, daily_bars, make_gbbq, make_key, write_bars
+
+
+@pytest.fixture
+def reader(tmp_path):
+    key_path = make_key(tmp_path)
+    make_gbbq(tmp_path, key_path)
+    write_bars(tmp_path, 'sh000001', SESSIONS)
+
+    bars = daily_bars(SESSIONS, [10.0, 10.0, 4.95, 5.0, 5.0, 5.0])
+    write_daily(tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day', bars, mode='rewrite')
+    write_daily(tmp_path / 'vipdoc' / 'sz' / 'lday' / 'sz000001.day', bars, mode='rewrite')
+
+    return Reader.factory(market='std', tdxdir=str(tmp_path), fq_source='gbbq', gbbq_key=key_path)
+
+
+def assert_matches_daily(reader, symbol, method):
+    expected = reader.daily(symbol, adjust=method)
+    pd.testing.assert_frame_equal(reader.adjusted.daily(symbol, method), expected)
+
+
+class TestAdjustedStore:
+    def test_build_and_serve(self, reader):
+        stats = reader.adjusted.build(['600000', '000001'])
+        assert stats['recomputed'] == ['600000', '000001']
+
+        for method in ('qfq', 'hfq'):
+            assert_matches_daily(reader, '600000', method)
+            assert_matches_daily(reader, '000001', method)
+
+        stats = reader.adjusted.build(['600000', '000001'])
+        assert stats == {'unchanged': 4, 'appended': [], 'recomputed': [], 'missing': []}
+
+    def test_append_only_adjusts_new_bars(self, reader, tmp_path):
+        store = reader.adjusted
+        store.build(['600000', '000001'])
+
+        write_daily(tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day', daily_bars([20241011], [5.5]))
+        stats = store.build(['600000', '000001'])
+
+        assert stats['appended'] == ['600000']
+        assert stats['unchanged'] == 2
+        assert_matches_daily(reader, '600000', 'qfq')
+        assert store.daily('600000', 'qfq')['close'].iloc[-1] == pytest.approx(5.5)
+
+    def test_new_event_recomputes_symbol(self, reader, tmp_path):
+        store = reader.adjusted
+        store.build(['600000', '000001'])
+
+        # 000001 新增一次除权
+        records = np.zeros(1, dtype=GBBQ_RECORD)
+        records[0] = (0, b'000001', 20241010, 1, 2.0, 0.0, 0.0, 0.0)
+        key = load_key(tmp_path / 'gbbq.key')
+        path = gbbq_path(tmp_path)
+        content = path.read_bytes()
+        count = int(np.frombuffer(content[:4], dtype='<u4')[0])
+        path.write_bytes(np.uint32(count + 1).tobytes() + content[4:] + encode_records(records, key)[4:])
+
+        stats = store.build(['600000', '000001'])
+        assert stats['recomputed'] == ['000001']
+        assert stats['unchanged'] == 2
+        assert_matches_daily(reader, '000001', 'qfq')
+
+    def test_daily_refreshes_stale_symbol(self, reader, tmp_path):
+        store = reader.adjusted
+        assert store.daily('missing') is None
+
+        # 首次读取时自动构建
+        assert len(store.daily('600000', 'hfq', columns=['close'])) == len(SESSIONS)
+
+        write_daily(tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day', daily_bars([20241011], [5.5]))
+        assert len(store.daily('600000', 'hfq')) == len(SESSIONS) + 1
+
+    def test_pending_event_takes_effect_on_append(self, reader, tmp_path):
+        store = reader.adjusted
+        store.build(['000001'])
+
+        # 20250101 的除权在本地数据之后，追加 20250102 的 K 线后才生效，已保存的前复权历史需要重算
+        write_daily(tmp_path / 'vipdoc' / 'sz' / 'lday' / 'sz000001.day', daily_bars([20250102], [5.0]))
+        stats = store.build(['000001'])
+
+        assert stats['recomputed'] == ['000001']
+        assert_matches_daily(reader, '000001', 'qfq')
+        assert_matches_daily(reader, '000001', 'hfq')
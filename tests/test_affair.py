@@ -1,6 +1,14 @@
+import shutil
+import struct
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
 import pytest
 from unittest.mock import patch
 from kitetdx import Affair
+from kitetdx.affair import AffairCache, build_factor_panel, file_md5
 
 class TestAffair:
     def test_files_delegation(self):
@@ -12,3 +20,104 @@ class TestAffair:
         with patch('mootdx.affair.Affair.fetch') as mock_fetch:
             Affair.fetch(downdir='tmp', filename='test.zip')
             mock_fetch.assert_called_once_with(downdir='tmp', filename='test.zip')
+
+
+def make_gpcw(path, report_date, rows, fields=4):
+    """生成与通达信 gpcw*.zip 格式一致的财务文件"""
+    header = struct.calcsize('<1hI1H3L')
+    item = struct.calcsize('<6s1c1L')
+    offset = header + item * len(rows)
+
+    body = bytearray(struct.pack('<1hI1H3L', 1, report_date, len(rows), 0, fields * 4, 0))
+    for i, code in enumerate(rows):
+        body += struct.pack('<6s1c1L', code.encode(), b'\x00', offset + i * fields * 4)
+    for values in rows.values():
+        body += struct.pack(f'<{fields}f', *values)
+
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr(path.stem + '.dat', bytes(body))
+
+    return {'filename': path.name, 'hash': file_md5(path), 'filesize': path.stat().st_size}
+
+
+class TestAffairSync:
+    @pytest.fixture()
+    def remote(self, tmp_path):
+        source = tmp_path / 'remote'
+        source.mkdir()
+
+        files = [
+            make_gpcw(source / 'gpcw20231231.zip', 20231231, {'600000': [1, 2, 3, 4], '000001': [5, 6, 7, 8]}),
+            make_gpcw(source / 'gpcw20240331.zip', 20240331, {'600000': [9, 10, 11, 12]}),
+        ]
+
+        downloads = []
+
+        def download(downdir, filename):
+            downloads.append(filename)
+            shutil.copy(source / filename, Path(downdir) / filename)
+
+        with patch('mootdx.affair.Affair.files', return_value=files), \
+                patch('kitetdx.affair.download_file', side_effect=download):
+            yield files, downloads
+
+    def test_sync_and_parse_cache(self, tmp_path, remote):
+        pytest.importorskip('pyarrow')
+        files, downloads = remote
+        downdir = tmp_path / 'down'
+
+        stats = Affair.sync(downdir, workers=2)
+        assert stats == {'files': 2, 'downloaded': 2, 'parsed': 2, 'failed': []}
+
+        df = Affair.parse(downdir)
+        assert len(df) == 3
+        assert df.loc['000001'].iloc[1:].tolist() == [5.0, 6.0, 7.0, 8.0]
+        assert sorted(df.iloc[:, 0].unique()) == [20231231, 20240331]
+
+        single = Affair.parse(downdir, filename='gpcw20240331.zip', header='en')
+        assert single.loc['600000', 'col4'] == 12.0
+
+        subset = AffairCache(downdir).read(columns=['report_date', 'col4', 'col2'])
+        assert subset.columns.tolist() == ['report_date', '每股净资产', '扣除非经常性损益每股收益']
+        assert subset.loc['000001', '每股净资产'] == 8.0
+        assert subset.loc['000001', '扣除非经常性损益每股收益'] == 6.0
+
+        # 远程哈希未变化时不再下载和解析
+        assert Affair.sync(downdir) == {'files': 2, 'downloaded': 0, 'parsed': 0, 'failed': []}
+        assert sorted(downloads) == ['gpcw20231231.zip', 'gpcw20240331.zip']
+
+
+class TestAffairPanel:
+    def test_point_in_time_alignment(self):
+        df = pd.DataFrame({
+            'report_date': [20231231, 20240331, 20231231, 20230930],
+            'col4': [1.0, 2.0, 3.0, 4.0],
+            # 600000 年报 2024-04-20 公告、一季报 2024-04-25 公告；000001 年报缺少公告日期
+            'col314': [240420.0, 240425.0, 0.0, 231025.0],
+        }, index=pd.Index(['600000', '600000', '000001', '000001'], name='code'))
+
+        dates = ['2024-04-19', '2024-04-22', '2024-04-25', '2024-04-30']
+        panel = build_factor_panel(df, ['每股净资产'], dates, stocks=['600000', '000001', '600036'])
+        bvps = panel['每股净资产']
+
+        assert bvps.dtypes.unique().tolist() == [np.float32]
+        assert isinstance(bvps.columns, pd.CategoricalIndex)
+        assert bvps['600000'].tolist()[1:] == [1.0, 2.0, 2.0]
+        assert np.isnan(bvps['600000'].iloc[0])
+        # 缺少公告日期的年报按 4 月 30 日披露截止日生效
+        assert bvps['000001'].tolist() == [4.0, 4.0, 4.0, 3.0]
+        assert bvps['600036'].isna().all()
+
+    def test_panel_from_cache(self, tmp_path):
+        pytest.importorskip('pyarrow')
+        source = tmp_path / 'remote'
+        source.mkdir()
+        files = [make_gpcw(source / 'gpcw20231231.zip', 20231231, {'600000': [1, 2, 3, 4]})]
+
+        with patch('mootdx.affair.Affair.files', return_value=files), \
+                patch('kitetdx.affair.download_file', side_effect=lambda d, f: shutil.copy(source / f, Path(d) / f)):
+            Affair.sync(tmp_path / 'down', workers=1)
+
+        panel = Affair.panel(['col2'], ['2024-04-29', '2024-04-30'], downdir=tmp_path / 'down')
+        assert panel['col2']['600000'].tolist()[1] == 2.0
+        assert np.isnan(panel['col2']['600000'].iloc[0])
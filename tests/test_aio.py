@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from kitetdx import Reader
+from kitetdx.aio import AsyncReader
+from tests.helpers import SESSIONS, write_bars
+
+
+class SlowReader:
+    """记录同时执行的调用数"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def daily(self, symbol=None, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.calls.append(symbol)
+        try:
+            time.sleep(self.delay)
+            if symbol == 'bad':
+                raise ValueError(symbol)
+            return symbol
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    block = daily
+
+
+class TestAsyncReader:
+    def test_daily_many(self, tmp_path):
+        write_bars(tmp_path, 'sh000001', SESSIONS)
+        write_bars(tmp_path, 'sh600000', SESSIONS, close=11.0)
+        sync = Reader.factory(market='std', tdxdir=str(tmp_path))
+
+        async def run():
+            async with AsyncReader(tdxdir=str(tmp_path)) as reader:
+                single = await reader.daily('600000')
+                many = await reader.daily_many(['600000', '000001'], columns=['close'])
+            return single, many
+
+        single, many = asyncio.run(run())
+        pd.testing.assert_frame_equal(single, sync.daily('600000'))
+        assert list(many) == ['600000', '000001']
+        assert many['600000']['close'].tolist() == [11.0] * len(SESSIONS)
+
+    def test_concurrency_limits(self):
+        slow = SlowReader()
+
+        async def run():
+            with AsyncReader(slow, max_workers=8, limits={'block': 1}) as reader:
+                order = []
+
+                async def read():
+                    await reader.daily_many(range(12), concurrency=3)
+                    order.append('read')
+
+                async def tick():
+                    await asyncio.sleep(0.01)
+                    order.append('tick')
+
+                # 读取期间事件循环仍然可以调度其他任务
+                await asyncio.gather(read(), tick())
+                peak_many, slow.peak = slow.peak, 0
+
+                await asyncio.gather(*[reader.block(i) for i in range(4)])
+                return peak_many, slow.peak, order
+
+        peak_many, peak_block, order = asyncio.run(run())
+        assert peak_many == 3
+        assert peak_block == 1
+        assert order == ['tick', 'read']
+
+    def test_errors_cancel_remaining(self):
+        slow = SlowReader()
+
+        async def run():
+            with AsyncReader(slow, max_workers=1) as reader:
+                with pytest.raises(ValueError):
+                    await reader.daily_many(['bad', 'a', 'b', 'c'])
+
+                results = await reader.daily_many(['bad', 'a'], return_exceptions=True)
+                return results
+
+        results = asyncio.run(run())
+        assert isinstance(results['bad'], ValueError)
+        assert results['a'] == 'a'
+        # 第一次批量读取失败后，排队的证券不再读取
+        assert slow.calls.count('c') == 0
+
+    def test_cancellation_releases_slot(self):
+        slow = SlowReader(delay=0.2)
+
+        async def run():
+            with AsyncReader(slow, max_workers=1) as reader:
+                task = asyncio.ensure_future(reader.daily('a'))
+                queued = asyncio.ensure_future(reader.daily('b'))
+                await asyncio.sleep(0.05)
+
+                task.cancel()
+                queued.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+
+                # 正在运行的读取结束后名额才释放，之后的调用正常执行
+                return await asyncio.wait_for(reader.daily('c'), 2)
+
+        assert asyncio.run(run()) == 'c'
+        assert slow.calls == ['a', 'c']
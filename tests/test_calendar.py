@@ -0,0 +1,65 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from kitetdx import Reader
+from kitetdx.calendar import TradingCalendar, get_calendar
+from kitetdx.reader import get_last_trading_day, is_trading_day
+from kitetdx.records import append_daily
+from tests.helpers import SESSIONS, write_bars
+
+
+class TestTradingCalendar:
+    def test_vectorized_queries(self):
+        calendar = TradingCalendar(SESSIONS)
+
+        assert calendar.is_trading_day(20241008)
+        assert not calendar.is_trading_day(datetime.date(2024, 10, 2))
+        assert calendar.is_trading_day(['2024-09-30', '2024-10-01']).tolist() == [True, False]
+
+        # 本地数据之后按工作日延伸
+        assert calendar.is_trading_day(20241011)
+        assert not calendar.is_trading_day(20241012)
+
+        assert calendar.shift(20241003, 0) == 20240930
+        assert calendar.shift(20241003, 1) == 20241008
+        assert calendar.shift(20240930, 1) == 20241008
+        assert calendar.shift(np.array([20240927, 20241008]), -1).tolist() == [20240926, 20240930]
+
+        assert calendar.sessions_between(20240928, 20241009).tolist() == [20240930, 20241008, 20241009]
+        assert calendar.count(20240930, 20241009) == 2
+        assert calendar.count([20240926, 20241010], [20241010, 20241010]).tolist() == [5, 0]
+
+        index = calendar.to_index()
+        assert index[0] == pd.Timestamp('2024-09-26')
+
+    def test_reader_helpers(self):
+        calendar = TradingCalendar(SESSIONS)
+
+        assert get_last_trading_day(datetime.date(2024, 10, 4), calendar) == datetime.date(2024, 9, 30)
+        assert get_last_trading_day(datetime.date(2024, 10, 4)) == datetime.date(2024, 10, 4)
+        assert not is_trading_day(datetime.date(2024, 10, 4), calendar)
+
+    def test_get_calendar_reloads(self, tmp_path):
+        path = write_bars(tmp_path, 'sh000001', SESSIONS[:3])
+        assert get_calendar(tmp_path).last == 20240930
+
+        append_daily(path, pd.DataFrame({
+            'date': [20241008], 'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'amount': 1.0, 'volume': 1.0,
+        }))
+        assert get_calendar(tmp_path).last == 20241008
+
+    def test_panel(self, tmp_path):
+        write_bars(tmp_path, 'sh000001', SESSIONS)
+        write_bars(tmp_path, 'sh600000', [20240927, 20241008, 20241010], close=11.0)
+        write_bars(tmp_path, 'sz000001', [20241009], close=12.0)
+
+        reader = Reader.factory(market='std', tdxdir=str(tmp_path))
+        panel = reader.panel(['600000', '000001'], fields=['close'], start=20240927)
+
+        close = panel['close']
+        assert list(close.index.strftime('%Y%m%d')) == ['20240927', '20240930', '20241008', '20241009', '20241010']
+        assert close['600000'].iloc[[0, 2, 4]].tolist() == [11.0, 11.0, 11.0]
+        assert np.isnan(close['600000'].iloc[1])
+        assert close['000001'].dropna().index.strftime('%Y%m%d').tolist() == ['20241009']
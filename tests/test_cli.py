@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+
+from kitetdx.cli import cli, resolve_universe
+from tests.helpers import make_day_file
+
+
+@pytest.fixture()
+def tdxdir(tmp_path):
+    make_day_file(tmp_path, 'sh600000', [20240102, 20240103])
+    make_day_file(tmp_path, 'sz000001', [20240102, 20240103, 20240104])
+    make_day_file(tmp_path, 'bj830799', [20240104])
+    return tmp_path
+
+
+def invoke(tdxdir, *args):
+    return CliRunner().invoke(cli, ['--tdxdir', str(tdxdir), *args], obj={})
+
+
+class TestCli:
+    def test_resolve_universe(self, tdxdir, tmp_path):
+        assert [p.stem for p in resolve_universe(tdxdir, 'all')] == ['sh600000', 'sz000001', 'bj830799']
+        assert [p.stem for p in resolve_universe(tdxdir, 'sz,bj')] == ['sz000001', 'bj830799']
+
+        symbols = tmp_path / 'symbols.txt'
+        symbols.write_text('SH600000\nsz000001\nsz399001\n')
+        assert [p.stem for p in resolve_universe(tdxdir, f'@{symbols}')] == ['sh600000', 'sz000001']
+
+    def test_export_daily(self, tdxdir, tmp_path):
+        out = tmp_path / 'out'
+        result = invoke(tdxdir, 'export', 'daily', '--out', str(out), '--workers', '2', '--quiet',
+                        '--columns', 'close,volume', '--dtype', 'float32')
+
+        assert result.exit_code == 0, result.output
+        assert '3 个文件, 6 行' in result.output
+
+        df = pd.read_parquet(out / 'sz000001.parquet')
+        assert df.columns.tolist() == ['close', 'volume']
+        assert df['close'].dtype == 'float32'
+        assert df.index[-1] == pd.Timestamp('2024-01-04')
+
+        result = invoke(tdxdir, 'export', 'daily', '--universe', 'sh600000', '--out', str(out),
+                        '--format', 'csv', '--quiet')
+        assert result.exit_code == 0, result.output
+        assert len(pd.read_csv(out / 'sh600000.csv')) == 2
+
+    def test_bad_universe(self, tdxdir, tmp_path):
+        result = invoke(tdxdir, 'export', 'daily', '--universe', '600000', '--out', str(tmp_path / 'out'))
+        assert result.exit_code == 2
+
+    def test_export_adjusted_uses_reader_fq_source(self, tmp_path, monkeypatch):
+        import kitetdx.adjust
+        from kitetdx import Reader
+        from kitetdx.writer import write_daily
+        from tests.helpers import daily_bars, make_gbbq, make_key
+
+        root = tmp_path / 'tdx'
+        key_path = make_key(tmp_path)
+        make_gbbq(root, key_path)
+        write_daily(root / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day',
+                    daily_bars([20240926, 20240927, 20240930, 20241008], [10.0, 10.0, 4.95, 5.0]), mode='rewrite')
+
+        def offline(*args, **kwargs):
+            raise AssertionError("不应请求新浪复权因子")
+
+        monkeypatch.setattr(kitetdx.adjust, 'fetch_fq_factor', offline)
+
+        out = tmp_path / 'out'
+        result = CliRunner().invoke(cli, ['--tdxdir', str(root), '--fq-source', 'gbbq', '--gbbq-key', str(key_path),
+                                          'export', 'daily', '--universe', 'sh600000', '--out', str(out),
+                                          '--adjust', 'qfq', '--quiet'], obj={})
+        assert result.exit_code == 0, result.output
+
+        expected = Reader.factory(market='std', tdxdir=str(root), fq_source='gbbq', gbbq_key=key_path).daily(
+            '600000', adjust='qfq')
+        pd.testing.assert_frame_equal(pd.read_parquet(out / 'sh600000.parquet'), expected, check_freq=False)
@@ -0,0 +1,48 @@
+import os
+import stat
+import zipfile
+
+from kitetdx.downloader import TdxSeleniumDownloader
+from kitetdx.utils import UMASK
+
+
+def make_zip(path, files):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    return path
+
+
+class TestUnzip:
+    def test_extract_and_skip_unchanged(self, tmp_path):
+        downloader = TdxSeleniumDownloader(str(tmp_path))
+        files = {
+            'vipdoc/sh/lday/sh600000.day': b'a' * 64,
+            'vipdoc/sz/lday/sz000001.day': b'b' * 96,
+        }
+
+        assert downloader._unzip_file(make_zip(tmp_path / 'hsjday.zip', files), workers=2)
+        assert len(downloader.changed_files) == 2
+        assert (tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day').read_bytes() == b'a' * 64
+        assert not (tmp_path / 'hsjday.zip').exists()
+
+        target = tmp_path / 'vipdoc' / 'sz' / 'lday' / 'sz000001.day'
+        assert stat.S_IMODE(os.stat(target).st_mode) == 0o666 & ~UMASK
+        os.chmod(target, 0o644)
+
+        # 只有内容变化的成员会被重写，并保留原文件的权限
+        files['vipdoc/sz/lday/sz000001.day'] = b'c' * 96
+        assert downloader._unzip_file(make_zip(tmp_path / 'hsjday.zip', files), workers=2)
+        assert downloader.changed_files == [tmp_path.resolve() / 'vipdoc' / 'sz' / 'lday' / 'sz000001.day']
+        assert target.read_bytes() == b'c' * 96
+        assert stat.S_IMODE(os.stat(target).st_mode) == 0o644
+
+        # 没有残留的临时文件
+        assert not list((tmp_path / 'vipdoc').rglob('*.tmp'))
+
+    def test_invalid_zip(self, tmp_path):
+        downloader = TdxSeleniumDownloader(str(tmp_path))
+        bad = tmp_path / 'hsjday.zip'
+        bad.write_bytes(b'not a zip')
+
+        assert not downloader._unzip_file(bad)
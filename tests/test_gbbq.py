@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import kitetdx.adjust
+from kitetdx import Reader
+from kitetdx.gbbq import decrypt, encrypt, gbbq_path, load_key, read_gbbq
+from kitetdx.writer import write_daily, write_minute
+from tests.helpers import SESSIONS, make_gbbq, make_key, write_bars
+
+
+@pytest.fixture
+def tdxdir(tmp_path):
+    key_path = make_key(tmp_path)
+    make_gbbq(tmp_path, key_path)
+    write_bars(tmp_path, 'sh000001', SESSIONS)
+
+    closes = [10.0, 10.0, 4.95, 5.0, 5.0, 5.0]
+    bars = pd.DataFrame({'date': SESSIONS, 'open': closes, 'high': closes, 'low': closes, 'close': closes,
+                         'amount': 1e6, 'volume': 1000.0})
+    write_daily(tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day', bars, mode='rewrite')
+    write_daily(tmp_path / 'vipdoc' / 'sz' / 'lday' / 'sz000001.day', bars, mode='rewrite')
+    return tmp_path, key_path
+
+
+class TestGbbq:
+    def test_cipher_roundtrip(self, tmp_path):
+        key = load_key(make_key(tmp_path))
+        blocks = np.arange(20, dtype=np.uint32).reshape(10, 2)
+
+        encrypted = encrypt(blocks, key)
+        assert not np.array_equal(encrypted, blocks)
+        np.testing.assert_array_equal(decrypt(encrypted, key), blocks)
+
+    def test_read_gbbq(self, tdxdir):
+        tmp_path, key_path = tdxdir
+        df = read_gbbq(gbbq_path(tmp_path), key=key_path)
+
+        assert df['symbol'].tolist() == ['sh600000', 'sh600000', 'sz000001', 'sz000001']
+        assert df['date'].tolist() == [20240926, 20240930, 20241008, 20250101]
+
+        bonus = df.iloc[1]
+        assert (bonus['name'], bonus['fenhong'], bonus['songzhuangu']) == ('除权除息', 1.0, 10.0)
+        assert np.isnan(bonus['qianzongguben'])
+        assert df.iloc[0]['houzongguben'] == 250.0
+
+    def test_missing_key(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            load_key(tmp_path / 'missing.key')
+
+    def test_adjust_without_network(self, tdxdir, monkeypatch):
+        tmp_path, key_path = tdxdir
+
+        def offline(*args, **kwargs):
+            raise AssertionError("不应请求新浪复权因子")
+
+        monkeypatch.setattr(kitetdx.adjust, 'fetch_fq_factor', offline)
+        reader = Reader.factory(market='std', tdxdir=str(tmp_path), fq_source='gbbq', gbbq_key=key_path)
+
+        assert reader.xdxr('600000')['category'].tolist() == [5, 1]
+
+        # 前收盘 10，除权参考价 (10 - 0.1) / 2 = 4.95
+        qfq = reader.daily('600000', adjust='qfq')
+        np.testing.assert_allclose(qfq['close'].to_numpy(), [4.95, 4.95, 4.95, 5.0, 5.0, 5.0])
+
+        hfq = reader.daily('600000', adjust='hfq', columns=['close'])
+        np.testing.assert_allclose(hfq['close'].to_numpy(), [10.0, 10.0, 10.0, 5.0 / 0.495, 5.0 / 0.495, 5.0 / 0.495])
+
+        # 20250101 的事件在本地数据之后，只有 20241008 生效: 前收盘 4.95 / (4.95 - 0.5)
+        factors = reader.fq_factor('000001', 'hfq')
+        assert factors.index.strftime('%Y%m%d').tolist() == ['20240926', '20241008']
+        np.testing.assert_allclose(factors['factor'].to_numpy(), [1.0, 4.95 / 4.45])
+
+    def test_explicit_factors_skip_gbbq(self, tdxdir, monkeypatch):
+        tmp_path, key_path = tdxdir
+        reader = Reader.factory(market='std', tdxdir=str(tmp_path), fq_source='gbbq', gbbq_key=key_path)
+        factors = reader.fq_factor('600000', 'qfq')
+
+        def computed(*args, **kwargs):
+            raise AssertionError("传入 factors 时不应再计算复权因子")
+
+        monkeypatch.setattr(reader, 'fq_factor', computed)
+        qfq = reader.daily('600000', adjust='qfq', factors=factors)
+        np.testing.assert_allclose(qfq['close'].to_numpy(), [4.95, 4.95, 4.95, 5.0, 5.0, 5.0])
+
+    def test_minute_adjust(self, tdxdir, monkeypatch):
+        tmp_path, key_path = tdxdir
+        monkeypatch.setattr(kitetdx.adjust, 'fetch_fq_factor', lambda *args, **kwargs: None)
+
+        closes = np.repeat([10.0, 10.0, 4.95, 5.0, 5.0, 5.0], 2)
+        times = pd.to_datetime(np.repeat(SESSIONS, 2).astype(str)) + pd.to_timedelta(np.tile([571, 900], 6), 'min')
+        bars = pd.DataFrame({'open': closes, 'high': closes, 'low': closes, 'close': closes,
+                             'amount': 1e5, 'volume': 100.0}, index=times)
+        for symbol in ('sh600000', 'sz000001'):
+            write_minute(tmp_path / 'vipdoc' / symbol[:2] / 'minline' / f'{symbol}.lc1', bars, mode='rewrite')
+
+        reader = Reader.factory(market='std', tdxdir=str(tmp_path), fq_source='gbbq', gbbq_key=key_path)
+
+        qfq = reader.minute('600000', adjust='qfq')
+        assert len(qfq) == 12
+        np.testing.assert_allclose(qfq['close'].to_numpy(), np.repeat([4.95, 4.95, 4.95, 5.0, 5.0, 5.0], 2))
+
+        # 每个交易日最后一根分钟线与复权日线收盘价一致
+        daily = reader.daily('600000', adjust='hfq')
+        hfq = reader.minute('600000', adjust='hfq')
+        np.testing.assert_allclose(hfq['close'].groupby(hfq.index.normalize()).last().to_numpy(),
+                                   daily['close'].to_numpy())
+
+        raw = reader.minute('600000')
+        np.testing.assert_allclose(raw['close'].to_numpy(), closes)
+
+        frames = reader.minute_many(['600000', '000001', '600999'], adjust='qfq')
+        assert list(frames) == ['600000', '000001']
+        pd.testing.assert_frame_equal(frames['600000'], qfq)
+        np.testing.assert_allclose(frames['000001']['close'].to_numpy()[-6:], 5.0)
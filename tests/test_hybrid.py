@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+from freezegun import freeze_time
+from mootdx.quotes import Quotes as MooQuotes
+
+from kitetdx import Reader
+from kitetdx.records import read_last_daily
+from tests.fake_tdx import CMD_BARS, FakeTdxServer
+from tests.helpers import make_day_file
+
+SESSIONS = [20240102, 20240103, 20240104, 20240105, 20240108, 20240109, 20240110, 20240111]
+
+
+@pytest.fixture()
+def server():
+    bars = [dict(date=date, open=10.0, close=10.0 + i, high=20.0, low=9.0, vol=3000.0, amount=3e6)
+            for i, date in enumerate(SESSIONS)]
+
+    with FakeTdxServer({(1, '600000'): bars}) as server:
+        yield server
+
+
+@pytest.fixture()
+def reader(tmp_path, server):
+    make_day_file(tmp_path, 'sh600000', SESSIONS[:4])
+    client = MooQuotes.factory(market='std', server=server.address, auto_retry=False, raise_exception=True)
+    return Reader.factory(market='hybrid', tdxdir=str(tmp_path), client=client)
+
+
+class TestHybridReader:
+    @freeze_time('2024-01-10 16:00:00')
+    def test_missing_tail_is_cached(self, reader, server, tmp_path):
+        df = reader.daily('600000')
+
+        assert df.index.strftime('%Y%m%d').tolist() == [str(d) for d in SESSIONS[:7]]
+        assert df['close'].iloc[-1] == 16.0
+        assert df['volume'].iloc[-1] == 3000.0
+
+        path = tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day'
+        assert read_last_daily(path)['date'] == 20240110
+
+        # 已补齐的文件不再访问服务器
+        requests = server.requests[CMD_BARS]
+        assert len(reader.daily('600000')) == 7
+        assert server.requests[CMD_BARS] == requests
+
+    @freeze_time('2024-01-11 10:00:00')
+    def test_live_bar_is_not_cached(self, reader, tmp_path):
+        df = reader.daily('600000', live=True)
+
+        assert df.index[-1] == pd.Timestamp('2024-01-11')
+        assert df['close'].iloc[-1] == 17.0
+
+        path = tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day'
+        assert read_last_daily(path)['date'] == 20240110
+
+    @freeze_time('2024-01-11 10:00:00')
+    def test_frame_is_built_once(self, reader):
+        from kitetdx import metrics
+
+        metrics.reset()
+        metrics.enable()
+        try:
+            df = reader.daily('600000', live=True, columns=['close'], dtype='float32')
+        finally:
+            metrics.disable()
+
+        assert metrics.snapshot()['utils.to_data']['count'] == 1
+        assert df.columns.tolist() == ['close']
+        assert df['close'].dtype == 'float32'
+        assert len(df) == 8
+        metrics.reset()
@@ -0,0 +1,55 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import kitetdx
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# import kitetdx 的累计耗时上限 (微秒)，本机约 15ms，留出慢速 CI 的余量
+IMPORT_BUDGET_US = 150_000
+
+# 只有访问对应公开名称时才应该导入的重量级依赖
+DEFERRED_MODULES = ['pandas', 'mootdx', 'tdxpy', 'quickjs', 'kitetdx.quotes', 'kitetdx.reader']
+
+
+def import_times(statement='import kitetdx'):
+    """运行 python -X importtime，返回 {模块: 累计耗时(微秒)}"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, _, cumulative, name = [part.strip() for part in line.replace('import time:', '|').split('|')]
+        times[name] = int(cumulative)
+
+    return times
+
+
+class TestLazyImport:
+    def test_startup_is_light(self):
+        times = import_times()
+
+        loaded = [name for name in DEFERRED_MODULES if name in times]
+        assert loaded == []
+        assert times['kitetdx'] < IMPORT_BUDGET_US
+
+    def test_public_names_resolve_on_access(self):
+        code = "import sys; from kitetdx import Reader; print(' '.join(sorted(sys.modules)))"
+        modules = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                                 check=True).stdout.split()
+        assert 'kitetdx.reader' in modules
+        assert 'kitetdx.quotes' not in modules
+
+        from kitetdx.reader import Reader
+        assert kitetdx.Reader is Reader
+        assert 'Reader' in vars(kitetdx)
+        assert set(kitetdx.__all__) <= set(dir(kitetdx))
+
+    def test_unknown_attribute(self):
+        with pytest.raises(AttributeError):
+            kitetdx.NotAThing
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kitetdx import Reader
+from kitetdx.indicators import IndicatorEngine, compute
+from tests.helpers import SESSIONS, write_bars
+
+
+def make_panel(rows=200, size=5, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 10 + np.cumsum(rng.normal(0, 0.2, (rows, size)), axis=0)
+    high = close + rng.uniform(0, 0.3, (rows, size))
+    low = close - rng.uniform(0, 0.3, (rows, size))
+
+    # 停牌、上市前和整列缺失
+    missing = rng.random((rows, size)) < 0.1
+    missing[:50, 1] = True
+    missing[:, -1] = True
+    for values in (close, high, low):
+        values[missing] = np.nan
+
+    index = pd.bdate_range('2020-01-01', periods=rows, name='date')
+    symbols = [f'60000{i}' for i in range(size)]
+    return {field: pd.DataFrame(values, index=index, columns=symbols)
+            for field, values in (('high', high), ('low', low), ('close', close))}
+
+
+def expected(high, low, close):
+    """单只证券去掉缺失日后用 pandas 计算"""
+    result = {'ma5': close.rolling(5).mean(), 'ema12': close.ewm(span=12, adjust=False).mean()}
+
+    dif = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    dea = dif.ewm(span=9, adjust=False).mean()
+    result.update(dif=dif, dea=dea, macd=2 * (dif - dea))
+
+    diff = close.diff()
+    gain = diff.clip(lower=0).ewm(alpha=1 / 6, adjust=False).mean()
+    result['rsi6'] = gain / diff.abs().ewm(alpha=1 / 6, adjust=False).mean() * 100
+
+    prev = close.shift()
+    tr = pd.concat([high - low, (high - prev).abs(), (low - prev).abs()], axis=1).max(axis=1)
+    result['atr14'] = tr.rolling(14).mean()
+
+    mid, std = close.rolling(20).mean(), close.rolling(20).std()
+    result.update(boll=mid, boll_upper=mid + 2 * std, boll_lower=mid - 2 * std)
+    return result
+
+
+class TestIndicators:
+    def test_matches_pandas(self):
+        panel = make_panel()
+        result = IndicatorEngine(ma=(5,), ema=(12,), rsi=(6,)).compute(panel)
+
+        assert set(result) == {'ma5', 'ema12', 'dif', 'dea', 'macd', 'rsi6', 'atr14', 'boll', 'boll_upper',
+                               'boll_lower'}
+
+        for symbol in panel['close'].columns[:-1]:
+            close = panel['close'][symbol].dropna()
+            for name, series in expected(panel['high'][symbol].dropna(), panel['low'][symbol].dropna(),
+                                         close).items():
+                got = result[name][symbol]
+                assert got[panel['close'][symbol].isna()].isna().all()
+                np.testing.assert_allclose(got[close.index].to_numpy(), series.to_numpy(), rtol=1e-9, atol=1e-9,
+                                           err_msg=f'{name} {symbol}')
+
+        assert all(result[name].iloc[:, -1].isna().all() for name in result)
+
+    def test_incremental_update(self):
+        panel = make_panel()
+        full = IndicatorEngine().compute(panel)
+
+        engine = IndicatorEngine()
+        engine.compute({field: frame.iloc[:-10] for field, frame in panel.items()})
+
+        for i in range(len(full['ma5']) - 10, len(full['ma5'])):
+            date = panel['close'].index[i]
+            # 停牌的证券不在 Series 中
+            row = engine.update({field: frame.iloc[i].dropna() for field, frame in panel.items()}, date=date)
+
+            for name, values in row.items():
+                assert values.name == date
+                np.testing.assert_allclose(values.to_numpy(), full[name].iloc[i].to_numpy(), rtol=1e-9, atol=1e-9,
+                                           err_msg=name)
+
+        with pytest.raises(ValueError):
+            engine.update({field: frame.iloc[-1] for field, frame in panel.items()}, date=panel['close'].index[-1])
+
+    def test_range_index(self):
+        panel = {field: frame.reset_index(drop=True) for field, frame in make_panel(rows=30).items()}
+        engine = IndicatorEngine(ma=(5,), rsi=(), atr=(), macd=None, boll=None)
+
+        result = engine.compute(panel)
+        assert engine.last_date is None
+        assert isinstance(result['ma5'].index, pd.RangeIndex)
+
+        row = engine.update({field: frame.iloc[-1] for field, frame in panel.items()})
+        assert row['ma5'].index.tolist() == list(panel['close'].columns)
+
+    def test_ndarray_input(self):
+        panel = make_panel(rows=30)
+        arrays = {field: frame.to_numpy() for field, frame in panel.items()}
+
+        result = compute(arrays, ma=(5,), rsi=None, atr=None, macd=None, boll=None)
+        assert list(result) == ['ma5']
+        np.testing.assert_array_equal(result['ma5'], compute(panel, ma=(5,), rsi=(), atr=(), macd=None,
+                                                             boll=None)['ma5'].to_numpy())
+
+        engine = IndicatorEngine(ma=(5,))
+        with pytest.raises(RuntimeError):
+            engine.update({field: values[-1] for field, values in arrays.items()})
+
+        engine.compute(arrays)
+        with pytest.raises(ValueError):
+            engine.update({field: values[-1, :2] for field, values in arrays.items()})
+
+    def test_reader_panel(self, tmp_path):
+        write_bars(tmp_path, 'sh000001', SESSIONS)
+        write_bars(tmp_path, 'sh600000', SESSIONS, close=11.0)
+        write_bars(tmp_path, 'sz000001', [20240927, 20241008, 20241010], close=12.0)
+        reader = Reader.factory(market='std', tdxdir=str(tmp_path))
+
+        engine = IndicatorEngine(ma=(3,), ema=(), rsi=(), atr=(), macd=None, boll=(3, 2))
+        result = engine.compute(reader.panel(['600000', '000001'], fields=engine.fields))
+
+        np.testing.assert_allclose(result['ma3']['600000'].to_numpy(), [np.nan, np.nan, 11, 11, 11, 11])
+        # 000001 只有 3 个交易日有数据，第 3 个有效日才满窗口
+        np.testing.assert_allclose(result['ma3']['000001'].to_numpy(), [np.nan] * 5 + [12])
+        np.testing.assert_allclose(result['boll_upper']['000001'].iloc[-1], 12)
@@ -0,0 +1,82 @@
+import datetime
+
+import pandas as pd
+
+from kitetdx import Reader
+from kitetdx.manifest import Manifest
+from kitetdx.records import append_daily
+
+
+def write_bars(path, dates):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    append_daily(path, pd.DataFrame({
+        'date': dates,
+        'open': 10.0, 'high': 11.0, 'low': 9.5, 'close': 10.5,
+        'amount': 1e6, 'volume': 1000.0,
+    }))
+
+
+class TestManifest:
+    def test_refresh_is_incremental(self, tmp_path):
+        sh = tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day'
+        sz = tmp_path / 'vipdoc' / 'sz' / 'lday' / 'sz000001.day'
+        write_bars(sh, [20240102, 20240103])
+        write_bars(sz, [20240102])
+
+        manifest = Manifest(tmp_path)
+        assert sorted(manifest.refresh()) == ['sh600000', 'sz000001']
+        assert manifest.entries['sh600000']['last_date'] == 20240103
+        assert manifest.entries['sh600000']['count'] == 2
+        assert manifest.latest_date() == datetime.date(2024, 1, 3)
+
+        # 未变化的文件不会被重新读取
+        assert manifest.refresh() == []
+
+        write_bars(sz, [20240103, 20240104])
+        assert manifest.refresh() == ['sz000001']
+        assert manifest.last_date('sz000001') == datetime.date(2024, 1, 4)
+
+        # 重新加载后保持一致
+        assert Manifest(tmp_path).entries == manifest.entries
+
+        sh.unlink()
+        assert manifest.refresh() == ['sh600000']
+        assert 'sh600000' not in manifest.entries
+
+    def test_freshness(self, tmp_path):
+        write_bars(tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day', [20240104, 20240105])
+        write_bars(tmp_path / 'vipdoc' / 'sz' / 'lday' / 'sz000001.day', [20240103])
+        write_bars(tmp_path / 'vipdoc' / 'sz' / 'lday' / 'sz000002.day', [20200103])
+
+        reader = Reader.factory(market='std', tdxdir=str(tmp_path))
+
+        stale = reader.freshness(target_date=datetime.date(2024, 1, 5))
+        assert list(stale.index) == ['sz000001']
+        assert stale.loc['sz000001', 'lag'] == 2
+
+        stale = reader.freshness(target_date=datetime.date(2024, 1, 5), active_only=False)
+        assert list(stale.index) == ['sz000002', 'sz000001']
+
+    def test_data_date_ignores_single_fresh_file(self, tmp_path, monkeypatch):
+        # 上证指数单独刷新到最新，其余证券仍落后；sz000002 已退市
+        sessions = pd.bdate_range('2019-12-02', '2024-01-05').strftime('%Y%m%d').astype(int)
+        write_bars(tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh000001.day', sessions)
+        write_bars(tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day', [20240103])
+        write_bars(tmp_path / 'vipdoc' / 'sz' / 'lday' / 'sz000001.day', [20240103])
+        write_bars(tmp_path / 'vipdoc' / 'sz' / 'lday' / 'sz000002.day', [20200103])
+
+        reader = Reader.factory(market='std', tdxdir=str(tmp_path))
+        reader.manifest.refresh()
+        assert reader.manifest.latest_date() == datetime.date(2024, 1, 5)
+        assert reader.manifest.data_date(reader.calendar) == datetime.date(2024, 1, 3)
+
+        import kitetdx.reader
+        monkeypatch.setattr(kitetdx.reader, 'get_target_trading_day', lambda calendar=None: datetime.date(2024, 1, 5))
+        monkeypatch.setattr(kitetdx.reader.DeltaUpdater, 'latest_session', lambda self: datetime.date(2024, 1, 5))
+
+        updated = []
+        monkeypatch.setattr(type(reader), '_update_delta',
+                            lambda self, target_date, updater=None: updated.append(target_date) or True)
+
+        reader.update_data()
+        assert updated == [datetime.date(2024, 1, 5)]
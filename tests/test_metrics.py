@@ -0,0 +1,92 @@
+import pytest
+
+from kitetdx import Reader, metrics
+from tests.helpers import make_day_file
+
+
+@pytest.fixture()
+def enabled():
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+class TestMetrics:
+    def test_disabled_records_nothing(self, tmp_path):
+        metrics.reset()
+        make_day_file(tmp_path, 'sh600000', [20240102])
+        Reader.factory(market='std', tdxdir=str(tmp_path)).daily('600000')
+
+        assert metrics.snapshot() == {}
+
+    def test_reader_hot_path(self, tmp_path, enabled):
+        make_day_file(tmp_path, 'sh600000', [20240102, 20240103, 20240104])
+        Reader.factory(market='std', tdxdir=str(tmp_path)).daily('600000')
+
+        stats = metrics.snapshot()
+        assert stats['reader.find_path']['count'] == 1
+        assert stats['records.read_daily']['bytes'] == 3 * 32
+        assert stats['utils.to_data']['count'] == 1
+        assert stats['records.read_daily']['buckets'][float('inf')] == 1
+
+    def test_errors_and_callbacks(self, enabled):
+        calls = []
+        metrics.add_callback(lambda *args: calls.append(args))
+
+        @metrics.timed('test.fail')
+        def fail():
+            raise ValueError()
+
+        try:
+            with pytest.raises(ValueError):
+                fail()
+        finally:
+            metrics.remove_callback(metrics._callbacks[-1])
+
+        assert metrics.snapshot()['test.fail']['errors'] == 1
+        assert calls[0][0] == 'test.fail' and calls[0][3] is True
+
+    def test_prometheus_format(self, enabled):
+        metrics.record('records.read_daily', 0.002, nbytes=64)
+        metrics.record('records.read_daily', 3.0, nbytes=32)
+
+        text = metrics.to_prometheus()
+        assert '# TYPE kitetdx_latency_seconds histogram' in text
+        assert 'kitetdx_bytes_read_total{op="records.read_daily"} 96' in text
+        assert 'kitetdx_latency_seconds_bucket{op="records.read_daily",le="0.0025"} 1' in text
+        assert 'kitetdx_latency_seconds_bucket{op="records.read_daily",le="+Inf"} 2' in text
+        assert 'kitetdx_latency_seconds_count{op="records.read_daily"} 2' in text
+
+    def test_quotes_factory_is_timed(self, enabled, monkeypatch):
+        import kitetdx.quotes
+        from kitetdx.quotes import Quotes
+
+        class FakeClient(object):
+            timeout = 5
+
+            def bars(self, symbol='000001', **kwargs):
+                return symbol
+
+            def close(self):
+                return 'closed'
+
+        monkeypatch.setattr(kitetdx.quotes.MooQuotes, 'factory', lambda **kwargs: FakeClient())
+
+        client = Quotes.factory(market='std')
+        assert client.bars(symbol='600036') == '600036'
+        assert client.bars(symbol='000001') == '000001'
+        assert client.close() == 'closed'
+        assert client.timeout == 5
+
+        client.timeout = 10
+        assert client._client.timeout == 10
+
+        stats = metrics.snapshot()
+        assert stats['quotes.bars']['count'] == 2
+        assert 'quotes.close' not in stats
+
+        # 关闭埋点时返回 mootdx 客户端本身
+        metrics.disable()
+        assert isinstance(Quotes.factory(market='std'), FakeClient)
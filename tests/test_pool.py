@@ -0,0 +1,108 @@
+import socket
+
+import pandas as pd
+import pytest
+
+from kitetdx import Quotes
+from kitetdx.pool import QuotesPool, estimate_pages
+from tests.fake_tdx import CMD_BARS, FakeTdxServer
+
+
+def make_bars(count, base=10.0):
+    return [
+        dict(date=20240102 + i, open=base, close=base + 0.1 * i, high=base + 1, low=base - 1,
+             vol=1000.0 * (i + 1), amount=1e6 * (i + 1))
+        for i in range(count)
+    ]
+
+
+BARS = {
+    (1, '600000'): make_bars(5, 10.0),
+    (0, '000001'): make_bars(5, 20.0),
+    (1, '600036'): make_bars(3, 30.0),
+}
+
+
+def dead_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.fixture()
+def servers():
+    with FakeTdxServer(BARS) as first, FakeTdxServer(BARS) as second:
+        yield first, second
+
+
+class TestQuotesPool:
+    def test_batch_combines_frames(self, servers):
+        addresses = [server.address for server in servers]
+
+        df = Quotes.batch('bars', ['600000', '000001', '600036', '600000'], workers=2,
+                          servers=addresses, frequency=9, offset=800)
+
+        assert sorted(df['symbol'].unique()) == ['000001', '600000', '600036']
+        assert len(df) == 13
+        assert df[df['symbol'] == '600036']['close'].round(2).tolist() == [30.0, 30.1, 30.2]
+        assert df[df['symbol'] == '000001']['volume'].tolist() == [1000.0, 2000.0, 3000.0, 4000.0, 5000.0]
+
+        # 请求分配到了两台服务器
+        assert all(server.requests[CMD_BARS] > 0 for server in servers)
+
+    def test_failover_to_live_server(self, servers):
+        addresses = [('127.0.0.1', dead_port()), servers[0].address]
+
+        with QuotesPool(servers=addresses, size=2, timeout=1) as pool:
+            results = pool.map('bars', ['600000', '600036'], frequency=9, offset=2)
+
+            assert len(results['600000']) == 2
+            assert len(results['600036']) == 2
+            assert addresses[0] in pool._failed
+
+    def test_all_servers_down(self):
+        with QuotesPool(servers=[('127.0.0.1', dead_port())], retries=1, timeout=1) as pool:
+            assert pool.map('bars', ['600000']) == {'600000': None}
+
+        df = Quotes.batch('bars', ['600000'], servers=[('127.0.0.1', dead_port())])
+        assert df.empty
+
+
+class TestBarsRange:
+    # 2024 年 1 月的工作日，去掉 15、16 日模拟休市
+    SESSIONS = [int(d.strftime('%Y%m%d')) for d in pd.bdate_range('2024-01-02', '2024-01-31')
+                if d.day not in (15, 16)]
+
+    @pytest.fixture()
+    def server(self):
+        bars = [dict(date=date, open=10.0, close=10.0 + i * 0.01, high=11.0, low=9.0, vol=1000.0, amount=1e6)
+                for i, date in enumerate(self.SESSIONS)]
+
+        with FakeTdxServer({(1, '600000'): bars, (1, '000001'): bars}) as server:
+            yield server
+
+    def test_estimate_pages(self):
+        assert estimate_pages(9, '2024-01-10', '2024-01-20', today='2024-01-31', page_size=5) == [5, 10, 15]
+        assert estimate_pages(8, '2024-01-31', None, today='2024-01-31', page_size=800) == [0]
+
+    def test_pages_are_merged(self, server):
+        with QuotesPool(servers=[server.address], size=3) as pool:
+            df = pool.bars_range('600000', 9, '2024-01-10', '2024-01-25', today='2024-01-31', page_size=5)
+
+        expected = [d for d in self.SESSIONS if 20240110 <= d <= 20240125]
+        assert df.index.strftime('%Y%m%d').astype(int).tolist() == expected
+        assert df.index.is_unique
+        assert df.index.is_monotonic_increasing
+
+    def test_underestimated_window_is_extended(self, server):
+        # today 远早于实际数据的最新日期，估算的分页位置偏小，需要向更旧的方向补页
+        with QuotesPool(servers=[server.address], size=2) as pool:
+            df = pool.bars_range('000001', 9, '2024-01-02', None, index=True, today='2024-01-05', page_size=4)
+
+        assert len(df) == len(self.SESSIONS)
+
+    def test_quotes_bars_range(self, server):
+        df = Quotes.bars_range('600000', 9, '2024-01-29', servers=[server.address])
+        assert df.index.strftime('%Y%m%d').tolist() == ['20240129', '20240130', '20240131']
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from mootdx.contrib.compat import MooTdxDailyBarReader
+from tdxpy.reader import TdxLCMinBarReader
+
+from kitetdx import Reader
+from kitetdx.records import LC_RECORD, read_daily, read_minute
+from kitetdx.utils import to_data, to_datetime_index
+from tests.helpers import make_day_file
+
+
+class TestReadDaily:
+    @pytest.mark.parametrize('name', ['sh600000', 'sh000001', 'sz159915'])
+    def test_matches_mootdx_reader(self, tmp_path, name):
+        path = make_day_file(tmp_path, name, [20240102, 20240103, 20240104])
+
+        expected = MooTdxDailyBarReader().get_df(str(path))
+        pd.testing.assert_frame_equal(read_daily(path), expected, check_freq=False, check_index_type=False)
+
+    def test_column_projection_and_dtype(self, tmp_path):
+        make_day_file(tmp_path, 'sh600000', [20240102, 20240103])
+        reader = Reader.factory(market='std', tdxdir=str(tmp_path))
+
+        df = reader.daily('600000', columns=['close', 'volume'], dtype='float32')
+
+        assert df.columns.tolist() == ['close', 'volume']
+        assert df.dtypes.tolist() == [np.float32, np.float32]
+        assert df['close'].tolist() == [10.5, 10.5]
+        assert df.index.name == 'date'
+
+        with pytest.raises(ValueError):
+            read_daily(tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day', columns=['vol'])
+
+    def test_to_data_renames_vol(self):
+        df = to_data(pd.DataFrame({'close': [1.0], 'vol': [100.0]}))
+        assert df.columns.tolist() == ['close', 'volume']
+
+    def test_to_data_builds_index_from_integers(self):
+        df = to_data(pd.DataFrame({'date': [20240102, 20240103], 'close': [1.0, 2.0]}))
+        assert df.index.tolist() == [pd.Timestamp('2024-01-02'), pd.Timestamp('2024-01-03')]
+
+        bars = pd.DataFrame({'datetime': ['2024-01-02 09:31'], 'year': [2024], 'month': [1], 'day': [2],
+                             'hour': [9], 'minute': [31]})
+        assert to_datetime_index(bars)[0] == pd.Timestamp('2024-01-02 09:31')
+
+        strings = to_data(pd.DataFrame({'date': ['2024-01-02'], 'close': [1.0]}))
+        assert strings.index[0] == pd.Timestamp('2024-01-02')
+
+
+class TestReadMinute:
+    def test_matches_tdxpy_reader(self, tmp_path):
+        records = np.zeros(3, dtype=LC_RECORD)
+        records['date'] = (2024 - 2004) * 2048 + 102
+        records['minute'] = [571, 572, 900]
+        records['open'] = [10.0, 10.25, 10.5]
+        records['close'] = [10.25, 10.5, 10.75]
+        records['amount'] = 1e6
+        records['volume'] = [100, 200, 300]
+
+        path = tmp_path / 'sh600000.lc1'
+        records.tofile(path)
+
+        expected = TdxLCMinBarReader().get_df(str(path))
+        df = read_minute(path)
+
+        pd.testing.assert_frame_equal(df, expected, check_index_type=False)
+        assert df.index[-1] == pd.Timestamp('2024-01-02 15:00')
@@ -0,0 +1,122 @@
+import socket
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate
+from kitetdx import Reader
+from kitetdx.server import DataService, create_server
+
+
+@pytest.fixture(scope='module')
+def tdxdir(tmp_path_factory):
+    path = tmp_path_factory.mktemp('tdx')
+    generate(path, stocks=4, days=30, minute_days=2, blocks=3, industries=2)
+    return path
+
+
+def start(service, **kwargs):
+    server = create_server(service, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture()
+def server(tdxdir):
+    server = start(DataService(Reader.factory(market='std', tdxdir=str(tdxdir))), port=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestDataServer:
+    def test_remote_reader_mirrors_std_reader(self, tdxdir, server):
+        local = Reader.factory(market='std', tdxdir=str(tdxdir))
+        remote = Reader.factory(market='remote', url=f'http://127.0.0.1:{server.server_address[1]}')
+
+        pd.testing.assert_frame_equal(remote.daily('sz000001'), local.daily('sz000001'))
+        pd.testing.assert_frame_equal(remote.minute('sh600000'), local.minute('sh600000'))
+
+        df = remote.daily('sz000001', columns=['close'], dtype='float32')
+        assert df.columns.tolist() == ['close'] and df['close'].dtype == 'float32'
+
+        assert remote.daily('sz399999') is None
+        assert [b.concept_code for b in remote.block()] == [b.concept_code for b in local.block()]
+        assert remote.get_stock_industry('600000') == local.get_stock_industry('600000')
+        assert remote.get_industry_stocks('T1001') == local.get_industry_stocks('T1001')
+
+        # 第二次读取命中缓存
+        assert remote.stats()['hits'] >= 1
+        remote.close()
+
+    def test_concurrent_requests_are_coalesced(self, tdxdir):
+        reader = Reader.factory(market='std', tdxdir=str(tdxdir))
+        calls = []
+        daily = reader.daily
+
+        def slow_daily(*args, **kwargs):
+            calls.append(args)
+            time.sleep(0.2)
+            return daily(*args, **kwargs)
+
+        reader.daily = slow_daily
+        service = DataService(reader)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(service.daily('sh600000'))) for _ in range(5)]
+        [t.start() for t in threads]
+        [t.join() for t in threads]
+
+        assert len(calls) == 1
+        assert all(df is results[0] for df in results)
+        assert service.stats['coalesced'] == 4
+
+    def test_cache_invalidated_when_file_changes(self, tdxdir):
+        from kitetdx.writer import write_daily
+
+        service = DataService(Reader.factory(market='std', tdxdir=str(tdxdir)))
+        before = service.daily('sh600001')
+
+        path = tdxdir / 'vipdoc' / 'sh' / 'lday' / 'sh600001.day'
+        extra = before.iloc[-1:].copy()
+        extra.index = pd.DatetimeIndex([pd.Timestamp('2025-01-02')], name='date')
+        write_daily(path, extra)
+
+        assert len(service.daily('sh600001')) == len(before) + 1
+
+    @pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='需要 Unix socket')
+    def test_unix_socket(self, tdxdir, tmp_path):
+        path = tmp_path / 'kitetdx.sock'
+        server = start(DataService(Reader.factory(market='std', tdxdir=str(tdxdir))), socket_path=path)
+
+        try:
+            remote = Reader.factory(market='remote', url=f'unix://{path}')
+            assert len(remote.daily('sh600000')) == 30
+            assert remote.request('/health')['status'] == 'ok'
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_gbbq_change_invalidates_adjusted_cache(self, tmp_path):
+        import numpy as np
+        from kitetdx.writer import write_daily
+        from tests.helpers import add_event, daily_bars, make_gbbq, make_key
+
+        key_path = make_key(tmp_path)
+        make_gbbq(tmp_path, key_path)
+        write_daily(tmp_path / 'vipdoc' / 'sz' / 'lday' / 'sz000001.day',
+                    daily_bars([20240926, 20240927, 20240930, 20241008, 20241009, 20241010],
+                               [10.0, 10.0, 4.95, 5.0, 5.0, 5.0]), mode='rewrite')
+
+        reader = Reader.factory(market='std', tdxdir=str(tmp_path), fq_source='gbbq', gbbq_key=key_path)
+        service = DataService(reader)
+        before = service.daily('sz000001', adjust='qfq')
+
+        # 新增 20241010 的除权记录，日线文件不变
+        add_event(tmp_path, key_path, (0, b'000001', 20241010, 1, 2.0, 0.0, 0.0, 0.0))
+
+        after = service.daily('sz000001', adjust='qfq')
+        assert not np.allclose(after['close'].to_numpy(), before['close'].to_numpy())
+        pd.testing.assert_frame_equal(after, reader.daily('sz000001', adjust='qfq'))
@@ -0,0 +1,76 @@
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kitetdx import Reader
+from kitetdx.shared import SharedPanel
+from tests.helpers import SESSIONS, write_bars
+
+
+def column_sums(descriptor):
+    """子进程: 挂载共享面板并汇总收盘价"""
+    with SharedPanel.attach(descriptor) as panel:
+        close = panel['close']
+        assert not panel.array('close').flags.writeable
+        return close.sum().to_dict()
+
+
+@pytest.fixture
+def reader(tmp_path):
+    write_bars(tmp_path, 'sh000001', SESSIONS)
+    write_bars(tmp_path, 'sh600000', [20240927, 20241008, 20241010], close=11.0)
+    write_bars(tmp_path, 'sz000001', [20241009], close=12.0)
+    return Reader.factory(market='std', tdxdir=str(tmp_path))
+
+
+class TestSharedPanel:
+    def test_matches_panel(self, reader):
+        symbols = ['600000', '000001']
+        expected = reader.panel(symbols, fields=['close', 'volume'])
+
+        with reader.shared_panel(symbols, fields=['close', 'volume']) as panel:
+            for field in ('close', 'volume'):
+                pd.testing.assert_frame_equal(panel[field], expected[field], check_index_type=False)
+
+            # DataFrame 直接使用共享内存
+            assert np.shares_memory(panel['close'].to_numpy(), panel.array('close'))
+
+    def test_workers_attach(self, reader):
+        with reader.shared_panel(['600000', '000001'], fields=['close']) as panel:
+            ctx = multiprocessing.get_context('spawn')
+            with ctx.Pool(2) as pool:
+                results = pool.map(column_sums, [panel.descriptor] * 2)
+
+            # 子进程退出后共享内存仍然有效
+            assert panel['close']['600000'].sum() == 33.0
+
+        assert results == [{'600000': 33.0, '000001': 12.0}] * 2
+
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=panel.descriptor.name)
+
+    def test_mmap_backend(self, reader, tmp_path):
+        path = tmp_path / 'panel.bin'
+
+        with reader.shared_panel(['600000'], fields=['close'], start=20241008, path=path) as panel:
+            assert panel.descriptor.backend == 'mmap'
+            assert column_sums(panel.descriptor) == {'600000': 22.0}
+
+        assert not path.exists()
+
+    def test_attached_close_keeps_data(self, reader):
+        panel = reader.shared_panel(['600000'], fields=['close'])
+        attached = SharedPanel.attach(panel.descriptor)
+        attached.close()
+
+        assert attached.closed
+        with pytest.raises(RuntimeError):
+            attached.unlink()
+        assert panel['close']['600000'].sum() == 33.0
+
+        panel.unlink()
+        with pytest.raises(FileNotFoundError):
+            SharedPanel.attach(panel.descriptor)
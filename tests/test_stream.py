@@ -0,0 +1,82 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from kitetdx import Quotes
+from kitetdx.stream import diff_snapshots
+from tests.fake_tdx import CMD_QUOTES, FakeTdxServer
+
+
+def quote(price, vol=1000):
+    return dict(price=price, last_close=10.0, open=10.0, high=11.0, low=9.0, vol=vol, amount=1e6,
+                bid1=price - 0.01, ask1=price + 0.01, bid_vol1=100, ask_vol1=200)
+
+
+class TickingQuotes(dict):
+    """每次读取成交量加一，模拟持续变化的行情"""
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        value['vol'] += 1
+        return value
+
+
+@pytest.fixture()
+def quotes():
+    return {(1, '600000'): quote(10.5), (0, '000002'): quote(8.0), (1, '600036'): quote(35.0)}
+
+
+def collect(server, count, symbols, on_item=None, **kwargs):
+    async def run():
+        items = []
+        async with Quotes.stream(symbols, servers=[server.address], **kwargs) as stream:
+            async for changed in stream:
+                items.append(changed)
+                if on_item:
+                    on_item(len(items))
+                if len(items) == count:
+                    break
+        return items, stream
+
+    return asyncio.run(run())
+
+
+class TestSnapshotStream:
+    def test_diff_snapshots(self):
+        before = pd.DataFrame({'price': [1.0, 2.0], 'vol': [10, 20]}, index=['a', 'b'])
+        after = pd.DataFrame({'price': [1.0, 2.5, 3.0], 'vol': [10, 20, 30]}, index=['a', 'b', 'c'])
+
+        assert diff_snapshots(None, after).index.tolist() == ['a', 'b', 'c']
+        assert diff_snapshots(before, after).index.tolist() == ['b', 'c']
+
+    def test_only_changed_rows_are_emitted(self, quotes):
+        with FakeTdxServer(quotes=quotes) as server:
+            def on_item(n):
+                if n == 1:
+                    quotes[(1, '600000')] = quote(10.6)
+
+            items, stream = collect(server, 2, ['600000', '000002', '600036'], on_item=on_item,
+                                    interval=0.01, batch_size=2)
+
+        assert sorted(items[0].index) == ['000002', '600000', '600036']
+        assert items[0].loc['600036', 'price'] == 35.0
+        assert items[1].index.tolist() == ['600000']
+        assert items[1].loc['600000', 'price'] == pytest.approx(10.6)
+
+        # 3 只证券、每批 2 只，每轮 2 个请求；关闭时等待进行中的一轮完成
+        assert stream.rounds >= 2
+        assert server.requests[CMD_QUOTES] == 2 * stream.rounds
+
+    def test_backpressure_pauses_polling(self, quotes):
+        with FakeTdxServer(quotes=TickingQuotes(quotes)) as server:
+            async def run():
+                async with Quotes.stream(['600000'], servers=[server.address], interval=0.001) as stream:
+                    await stream.__anext__()
+                    # 消费者停顿期间，队列满后不再轮询
+                    await asyncio.sleep(0.3)
+                    return server.requests[CMD_QUOTES]
+
+            requests = asyncio.run(run())
+
+        assert requests <= 3
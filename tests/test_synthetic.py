@@ -0,0 +1,34 @@
+import pandas as pd
+
+import kitetdx.adjust
+
+from benchmarks.run import build_benchmarks
+from benchmarks.synthetic import generate
+from kitetdx import Reader
+
+
+class TestSynthetic:
+    def test_generated_directory_is_readable(self, tmp_path):
+        data = generate(tmp_path, stocks=4, days=30, minute_days=2, blocks=3, industries=2)
+        reader = Reader.factory(market='std', tdxdir=str(tmp_path))
+
+        assert data['symbols'] == ['sh600000', 'sh600001', 'sz000001', 'sz000002']
+        assert len(reader.daily('sz000002')) == 30
+        assert reader.calendar.sessions[-1] == 20241231
+
+        minutes = reader.minute('sh600001')
+        assert len(minutes) == 2 * 240
+        assert minutes.index[-1] == pd.Timestamp('2024-12-31 15:00')
+        assert len(reader.fzline('sh600001')) == 2 * 48
+
+        assert reader.block(return_df=True)['concept_code'].nunique() == 3
+        assert reader.get_stock_industry('600000')['industry_code'].startswith('T1')
+
+    def test_benchmarks_run_offline(self, tmp_path, monkeypatch):
+        # build_benchmarks 会把复权因子缓存指向合成目录，测试结束后恢复
+        monkeypatch.setattr(kitetdx.adjust, 'CACHE_DIR', kitetdx.adjust.CACHE_DIR)
+        benchmarks = build_benchmarks(generate(tmp_path, stocks=2, days=20, minute_days=1))
+
+        adjusted = benchmarks['to_adjust']()
+        assert len(adjusted) == 2 and not adjusted[0].empty
+        assert len(benchmarks['daily']()) == 2
@@ -0,0 +1,99 @@
+import pytest
+
+from kitetdx import Reader
+from kitetdx.ticks import TICK_PAGE_SIZE, TickArchiver, read_ticks, tick_path
+from tests.fake_tdx import CMD_HISTORY_TRANSACTIONS, FakeTdxServer
+
+pytest.importorskip('pyarrow')
+
+
+def make_ticks(count, base):
+    return [
+        dict(time=f'{9 + (i // 3000):02d}:{(i // 60) % 60:02d}', price=base + (i % 7) * 0.01,
+             vol=100 + i, buyorsell=i % 2)
+        for i in range(count)
+    ]
+
+
+TICKS = {
+    (1, '600000', 20240105): make_ticks(TICK_PAGE_SIZE * 2 + 15, 10.0),
+    (0, '000001', 20240105): make_ticks(30, 9.0),
+    (1, '600000', 20240108): make_ticks(5, 10.5),
+    (1, '000001', 20240108): make_ticks(7, 3000.0),
+}
+
+
+@pytest.fixture()
+def server():
+    with FakeTdxServer(ticks=TICKS) as server:
+        yield server
+
+
+class TestTickArchiver:
+    def test_archive_and_read(self, tmp_path, server):
+        with TickArchiver(tmp_path, servers=[server.address], workers=2) as archiver:
+            stats = archiver.archive(['sh600000', '000001'], ['2024-01-05', 20240108])
+
+        assert stats == {'dates': 2, 'symbols': 3, 'ticks': TICK_PAGE_SIZE * 2 + 15 + 30 + 5, 'failed': []}
+        assert tick_path(tmp_path, 20240105).exists()
+
+        reader = Reader.factory(market='std', tdxdir=str(tmp_path))
+        df = reader.transactions('600000', date='20240105')
+
+        expected = TICKS[(1, '600000', 20240105)]
+        assert len(df) == len(expected)
+        assert df['vol'].tolist() == [tick['vol'] for tick in expected]
+        assert df['time'].iloc[-1] == expected[-1]['time']
+        assert df['price'].iloc[:3].tolist() == pytest.approx([10.0, 10.01, 10.02])
+
+        big = reader.transactions('sz000001', date=20240105, columns=['vol'], filters=[('vol', '>=', 120)])
+        assert big['vol'].tolist() == list(range(120, 130))
+
+        assert reader.transactions('600036', date=20240105).empty
+
+    def test_archived_symbols_are_skipped(self, tmp_path, server):
+        with TickArchiver(tmp_path, servers=[server.address]) as archiver:
+            archiver.archive(['600000'], [20240108])
+            requests = server.requests[CMD_HISTORY_TRANSACTIONS]
+
+            stats = archiver.archive(['600000', '000001'], [20240108])
+
+        # 只请求了新增的 000001，其当日没有成交
+        assert server.requests[CMD_HISTORY_TRANSACTIONS] == requests + 1
+        assert stats['symbols'] == 0
+        assert sorted(read_ticks(tmp_path, 20240108)['symbol'].unique()) == ['sh600000']
+
+    def test_same_code_in_both_markets(self, tmp_path, server):
+        with TickArchiver(tmp_path, servers=[server.address]) as archiver:
+            stats = archiver.archive(['sh000001', 'sz000001'], [20240105, 20240108])
+
+        assert stats['symbols'] == 2
+        assert sorted(read_ticks(tmp_path, 20240108)['symbol'].unique()) == ['sh000001']
+
+        reader = Reader.factory(market='std', tdxdir=str(tmp_path))
+        assert reader.transactions('sh000001', date=20240108)['price'].iloc[0] == pytest.approx(3000.0)
+        # 不带前缀的 000001 按代码推断为深市
+        assert reader.transactions('000001', date=20240108).empty
+        assert len(reader.transactions('000001', date=20240105)) == 30
+        assert reader.transactions('sh000001', date=20240105).empty
+
+    def test_append_symbol_keeps_partition(self, tmp_path, server):
+        from kitetdx import metrics
+
+        metrics.reset()
+        metrics.enable()
+        try:
+            with TickArchiver(tmp_path, servers=[server.address]) as archiver:
+                archiver.archive(['600000'], [20240105])
+                stats = archiver.archive(['600000', '000001'], [20240105])
+        finally:
+            metrics.disable()
+
+        assert stats['symbols'] == 1
+        df = read_ticks(tmp_path, 20240105)
+        assert df.groupby('symbol').size().to_dict() == {'sh600000': TICK_PAGE_SIZE * 2 + 15, 'sz000001': 30}
+
+        snapshot = metrics.snapshot()
+        assert snapshot['quotes.history_transactions']['count'] == 4
+        assert 'quotes.transactions' not in snapshot
+        metrics.reset()
@@ -0,0 +1,113 @@
+import datetime
+from unittest.mock import MagicMock
+
+from kitetdx import Reader
+from kitetdx.records import read_last_daily
+from kitetdx.updater import DeltaUpdater
+from tests.helpers import make_day_file
+
+
+def bar(date, close):
+    return {
+        'open': 10.0, 'close': close, 'high': 12.0, 'low': 9.0,
+        'vol': 2000.0, 'amount': 2e6,
+        'year': date.year, 'month': date.month, 'day': date.day, 'hour': 15, 'minute': 0,
+    }
+
+
+class TestDeltaUpdater:
+    def test_append_missing_bars(self, tmp_path):
+        path = make_day_file(tmp_path, 'sh600000', [20240102, 20240103])
+
+        client = MagicMock()
+        client.client.get_security_bars.return_value = [
+            bar(datetime.date(2024, 1, 3), 10.5),
+            bar(datetime.date(2024, 1, 4), 11.0),
+            bar(datetime.date(2024, 1, 5), 11.5),
+            bar(datetime.date(2024, 1, 8), 12.0),
+        ]
+
+        stats = DeltaUpdater(tmp_path, client=client).update(datetime.date(2024, 1, 5))
+
+        assert stats == {'files': 1, 'bars': 2, 'failed': []}
+        category, market, code, start, count = client.client.get_security_bars.call_args[0]
+        assert (category, market, code, start) == (9, 1, '600000', 0)
+        assert read_last_daily(path)['date'] == 20240105
+
+        df = Reader.factory(market='std', tdxdir=str(tmp_path)).daily('600000')
+        assert len(df) == 4
+        assert df['close'].iloc[-1] == 11.5
+        assert df['volume'].iloc[-1] == 2000.0
+
+    def test_up_to_date_skips_request(self, tmp_path):
+        make_day_file(tmp_path, 'sz000001', [20240104, 20240105])
+        client = MagicMock()
+
+        stats = DeltaUpdater(tmp_path, client=client).update(datetime.date(2024, 1, 5))
+
+        assert stats['bars'] == 0
+        client.client.get_security_bars.assert_not_called()
+
+    def test_gap_is_reported(self, tmp_path):
+        make_day_file(tmp_path, 'sz000001', [20240102])
+        client = MagicMock()
+        client.client.get_security_bars.return_value = [
+            bar(datetime.date(2024, 1, 8), 11.0),
+            bar(datetime.date(2024, 1, 9), 11.0),
+            bar(datetime.date(2024, 1, 10), 11.0),
+            bar(datetime.date(2024, 1, 11), 11.0),
+            bar(datetime.date(2024, 1, 12), 11.0),
+            bar(datetime.date(2024, 1, 15), 11.0),
+            bar(datetime.date(2024, 1, 16), 11.0),
+            bar(datetime.date(2024, 1, 17), 11.0),
+            bar(datetime.date(2024, 1, 18), 11.0),
+            bar(datetime.date(2024, 1, 19), 11.0),
+        ]
+
+        stats = DeltaUpdater(tmp_path, client=client).update(datetime.date(2024, 1, 12))
+
+        assert stats['failed'] == ['sz000001']
+
+    def test_network_error_is_reported_per_file(self, tmp_path):
+        make_day_file(tmp_path, 'sh600000', [20240103])
+        make_day_file(tmp_path, 'sz000001', [20240103])
+
+        def bars(category, market, code, start, count):
+            if code == '600000':
+                raise ConnectionResetError('reset by peer')
+            return [bar(datetime.date(2024, 1, 4), 11.0)]
+
+        client = MagicMock()
+        client.client.get_security_bars.side_effect = bars
+
+        stats = DeltaUpdater(tmp_path, client=client).update(datetime.date(2024, 1, 4))
+
+        assert stats == {'files': 1, 'bars': 1, 'failed': ['sh600000']}
+
+    def test_fetch_through_pool(self, tmp_path):
+        from kitetdx.pool import QuotesPool
+
+        names = ['sh600000', 'sh600036', 'sz000001', 'sz000002']
+        for name in names:
+            make_day_file(tmp_path, name, [20240103])
+
+        clients = []
+
+        def client_factory(server):
+            client = MagicMock()
+            client.client.get_security_bars.return_value = [bar(datetime.date(2024, 1, 4), 11.0)]
+            clients.append(client)
+            return client
+
+        with QuotesPool(servers=[('127.0.0.1', 7709)], size=2, client_factory=client_factory) as pool:
+            with DeltaUpdater(tmp_path, pool=pool) as updater:
+                stats = updater.update(datetime.date(2024, 1, 4))
+
+            # 传入的连接池不会被关闭
+            assert pool.call(lambda client: 'ok') == 'ok'
+
+        assert stats == {'files': 4, 'bars': 4, 'failed': []}
+        assert 1 <= len(clients) <= 2
+        assert sum(client.client.get_security_bars.call_count for client in clients) == 4
+        assert all(read_last_daily(tmp_path / 'vipdoc' / name[:2] / 'lday' / f'{name}.day')['date'] == 20240104
+                   for name in names)
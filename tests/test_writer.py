@@ -0,0 +1,90 @@
+import os
+import stat
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from kitetdx import Reader
+from kitetdx.utils import UMASK
+from kitetdx.writer import write_daily, write_minute
+
+
+def daily_bars(dates, close=10.5):
+    index = pd.DatetimeIndex(pd.to_datetime([str(d) for d in dates]), name='date')
+    return pd.DataFrame({
+        'open': 10.0, 'high': 11.0, 'low': 9.5, 'close': close,
+        'amount': 1e6, 'volume': 1000.0,
+    }, index=index)
+
+
+def minute_bars(times):
+    index = pd.DatetimeIndex(pd.to_datetime(times), name='date')
+    count = len(index)
+    return pd.DataFrame({
+        'open': np.linspace(10, 11, count), 'high': 11.5, 'low': 9.5, 'close': np.linspace(10.25, 11.25, count),
+        'amount': 1e5, 'volume': np.arange(count, dtype=np.int64) + 100,
+    }, index=index)
+
+
+@pytest.fixture()
+def reader(tmp_path):
+    return Reader.factory(market='std', tdxdir=str(tmp_path))
+
+
+class TestWriter:
+    @pytest.mark.parametrize('name', ['sh600000', 'sh000001', 'sz159915'])
+    def test_daily_round_trip(self, tmp_path, reader, name):
+        bars = daily_bars([20240102, 20240103, 20240104], close=[10.5, 10.52, 10.61])
+        path = tmp_path / 'vipdoc' / name[:2] / 'lday' / f'{name}.day'
+
+        assert write_daily(path, bars, mode='rewrite') == 3
+
+        df = reader.daily(name)
+        pd.testing.assert_frame_equal(df[bars.columns], bars, check_index_type=False, rtol=1e-6)
+
+    def test_append_and_merge(self, tmp_path, reader):
+        path = tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day'
+        write_daily(path, daily_bars([20240102, 20240105]))
+
+        # append 只追加晚于最后一根的 K 线
+        assert write_daily(path, daily_bars([20240104, 20240108])) == 1
+
+        # merge 补齐中间的缺口，相同日期以新数据为准
+        assert write_daily(path, daily_bars([20240103, 20240104, 20240108], close=12.0), mode='merge') == 3
+
+        df = reader.daily('600000')
+        assert df.index.strftime('%Y%m%d').tolist() == ['20240102', '20240103', '20240104', '20240105', '20240108']
+        assert df['close'].tolist() == [10.5, 12.0, 12.0, 10.5, 12.0]
+
+        with pytest.raises(ValueError):
+            write_daily(path, daily_bars([20240109]), mode='insert')
+
+    def test_rewrite_keeps_file_mode(self, tmp_path):
+        path = tmp_path / 'vipdoc' / 'sh' / 'lday' / 'sh600000.day'
+
+        write_daily(path, daily_bars([20240102]), mode='rewrite')
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~UMASK
+
+        os.chmod(path, 0o644)
+        write_daily(path, daily_bars([20240103]), mode='merge')
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+        os.chmod(path, 0o664)
+        write_daily(path, daily_bars([20240104]), mode='rewrite')
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o664
+
+    @pytest.mark.parametrize('suffix, subdir', [(1, 'minline'), (5, 'fzline')])
+    def test_minute_round_trip(self, tmp_path, reader, suffix, subdir):
+        bars = minute_bars(['2024-01-02 09:31', '2024-01-02 15:00', '2024-01-03 09:31'])
+        path = tmp_path / 'vipdoc' / 'sz' / subdir / f'sz000001.lc{suffix}'
+
+        assert write_minute(path, bars, mode='rewrite') == 3
+        assert write_minute(path, minute_bars(['2024-01-03 09:31', '2024-01-03 09:32'])) == 1
+
+        df = reader.minute('000001', suffix=suffix)
+        assert len(df) == 4
+        pd.testing.assert_frame_equal(df.iloc[:3], bars, check_index_type=False, rtol=1e-6)
+
+        with pytest.raises(ValueError):
+            write_minute(path, minute_bars(['2003-12-31 09:31']))